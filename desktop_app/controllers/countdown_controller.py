@@ -1,55 +1,112 @@
 # file: desktop_app/controllers/countdown_controller.py
 
-from PySide6.QtCore import QTimer
+import math
+import time
+from PySide6.QtCore import QTimer, Qt
 from infrastructure.logger import logger
 from infrastructure.config import load_config
+from infrastructure.profiler import profiled
+
+FRAME_MS = 100        # visible: recompute at least this often (recovers fast after GUI stalls)
+HIDDEN_MS = 1000      # hidden/tray: only wake on whole-second boundaries
+BOUNDARY_SLACK_MS = 5 # land just after the boundary, never just before
+
+
+class CountdownClock:
+    """
+    Countdown anchored to a monotonic deadline computed once at POP.
+    Remaining time is always recomputed from the clock, so timer jitter
+    and stalls never accumulate as drift.
+    """
+
+    def __init__(self, deadline: float, clock=time.monotonic):
+        self.deadline = deadline
+        self.clock = clock
+
+    @classmethod
+    def start_in(cls, seconds: float, clock=time.monotonic) -> "CountdownClock":
+        return cls(clock() + seconds, clock)
+
+    def remaining(self) -> float:
+        return max(self.deadline - self.clock(), 0.0)
+
+    def remaining_whole(self) -> int:
+        """Seconds shown to the user (ceil: 0 only when the deadline passed)."""
+        return math.ceil(self.remaining())
+
+    def next_wakeup_ms(self, visible: bool = True) -> int:
+        rem = self.remaining()
+        if rem <= 0:
+            return 0
+        to_boundary = (rem - math.floor(rem)) or 1.0
+        ms = int(to_boundary * 1000) + BOUNDARY_SLACK_MS
+        return max(1, min(ms, FRAME_MS if visible else HIDDEN_MS))
+
 
 class CountdownController:
     def __init__(self, main_window):
         self.main = main_window
         self.timer = None
+        self.clock = None
         self.remaining = 0
         self.running = False
 
-    def start(self, seconds: int):
+    def start(self, seconds: int, deadline: float | None = None):
         """
         Start a countdown using the *latest* values stored in config.json.
         This allows runtime changes without restarting the app.
+        When `deadline` (time.monotonic based) is given, it is used as is so
+        the UI counts down to the same instant as the endsAt sent to the phone.
         """
         try:
             self.stop()
 
-            # ✅ Always refresh config dynamically
-            cfg = load_config()
-            configured = int(cfg.get("countdown_time", seconds))
-            self.remaining = max(configured, 1)  # fallback sanity
+            if deadline is not None:
+                self.clock = CountdownClock(deadline)
+            else:
+                # ✅ Always refresh config dynamically
+                cfg = load_config()
+                configured = int(cfg.get("countdown_time", seconds))
+                self.clock = CountdownClock.start_in(max(configured, 1))  # fallback sanity
 
+            self.remaining = max(self.clock.remaining_whole(), 1)
             self.running = True
 
             self.main.queue_tab.start_countdown_ui(self.remaining)
             self.main.queue_tab.update_countdown_ui(self.remaining)
 
             self.timer = QTimer(self.main)
+            self.timer.setSingleShot(True)
+            self.timer.setTimerType(Qt.PreciseTimer)
             self.timer.timeout.connect(self._tick)
-            self.timer.start(1000)
+            self._arm()
 
             logger.user(f"⏱ Countdown started: {self.remaining}s")
 
         except Exception as e:
             logger.error(f"❌ CountdownController.start(): {e}")
 
+    def _arm(self):
+        visible = self.main.isVisible() if hasattr(self.main, "isVisible") else True
+        self.timer.start(self.clock.next_wakeup_ms(visible))
+
+    @profiled("countdown._tick")
     def _tick(self):
         try:
             if not self.running:
                 return
 
-            self.remaining -= 1
+            remaining = self.clock.remaining_whole()
 
-            if self.remaining > 0:
-                self.main.queue_tab.update_countdown_ui(self.remaining)
+            if remaining > 0:
+                if remaining != self.remaining:
+                    self.remaining = remaining
+                    self.main.queue_tab.update_countdown_ui(remaining)
+                self._arm()
                 return
 
             # == 0 seconds ==
+            self.remaining = 0
             self.stop(hide_only=False)
             self.main.queue_tab.set_status("⚔️ FIGHT!", "#ff4444", big=True)
 
@@ -1,10 +1,28 @@
 # -*- coding: utf-8 -*-
+import os
 import time
 from PySide6.QtCore import QTimer
 from infrastructure.logger import logger
-from infrastructure.watcher import get_latest_screenshot_info
-from infrastructure.utils import PrintScreenListener
+from infrastructure.watcher import (
+    get_latest_screenshot_info, list_new_screenshots, probe_screenshot_ready
+)
+from infrastructure.utils import PrintScreenListener, ExpiringCache, get_deleter, is_pending_delete
+from infrastructure.combat_log import CombatLogTailer
+from infrastructure.trace import TraceRecorder
+from infrastructure.history import get_history
+from infrastructure import flight_recorder as flight
+from infrastructure.profiler import profiled
 from services import arena_logic
+from services.firebase_notify import delivery_summary_string
+from services.time_sync import warm_clock_sync
+from services.tag_detector import latency_summary_string
+from controllers.poll_scheduler import PollScheduler
+
+READY_RETRY_MS = 50      # re-probe a partially written screenshot
+READY_MAX_WAIT_S = 3.0   # give up waiting and decode whatever is there
+
+RECENT_TTL_S = 30        # dedupe window is 3 s, keep a margin
+RECENT_MAX = 256
 
 class ListenerController:
     def __init__(self, main):
@@ -12,10 +30,24 @@ class ListenerController:
         self.timer = QTimer()
         self.timer.timeout.connect(self.check_screenshots)
 
+        # one re-probe for partially written screenshots, however many are pending
+        self.ready_timer = QTimer()
+        self.ready_timer.setSingleShot(True)
+        self.ready_timer.setInterval(READY_RETRY_MS)
+        self.ready_timer.timeout.connect(self.check_screenshots)
+
         self.pulse_timer = QTimer()
+        self.pulse_timer.setInterval(500)
         self.pulse_timer.timeout.connect(self.animate_status)
 
+        # pulse is cosmetic → paused while the window is hidden
+        self.main.timers.add("pulse", self.pulse_timer)
+        self.main.timers.add("screenshots", self.timer, visible_only=False)
+
         self.print_listener = PrintScreenListener()
+        self.scheduler = PollScheduler()
+        self.combat_log = None
+        self.trace = None
         self.reset_runtime_state()
 
     def reset_runtime_state(self):
@@ -23,9 +55,12 @@ class ListenerController:
         self.last_screenshot_time = None
         self.high_watermark = 0
         self.app_start_time = time.time()
-        self._recent = {}
-        self._cooldown_until = 0
+        self.looked_at = self.app_start_time   # last poll that saw the whole folder (stale check)
+        self._recent = ExpiringCache(RECENT_TTL_S, RECENT_MAX)
+        self._pending = ExpiringCache(READY_MAX_WAIT_S * 4, RECENT_MAX)
         self.pulse_state = False
+        self.scheduler.screenshot_delay = float(self.main.cfg.get("delay_offset", 2))
+        self.scheduler.reset()
 
     def start(self):
         self.reset_runtime_state()
@@ -35,8 +70,25 @@ class ListenerController:
         _, self.last_screenshot_time = get_latest_screenshot_info(self.main.game_folder)
         self.high_watermark = self.last_screenshot_time or 0
 
-        self.timer.start(1000)
-        self.pulse_timer.start(500)
+        # second channel: combat log lines (screenshots stay the fallback)
+        self.combat_log = None
+        if self.main.cfg.get("combat_log_enabled", True) and self.main.game_folder:
+            self.combat_log = CombatLogTailer(self.main.game_folder)
+            self.combat_log.start()
+
+        # optional session trace for scripts/replay_trace.py
+        self.trace = None
+        if self.main.cfg.get("trace_sessions", False):
+            try:
+                self.trace = TraceRecorder.for_session(self.main.cfg)
+            except Exception as e:
+                logger.dev(f"Trace recording disabled: {e}")
+
+        warm_clock_sync(self.main.cfg)
+        arena_logic.warm_up_detector()
+
+        self.timer.start(self.scheduler.interval_ms())
+        self.main.timers.start("pulse")
         logger.user("▶️ Listening started.")
 
     def stop(self):
@@ -44,9 +96,22 @@ class ListenerController:
         self.main.queue_tab.set_listening(False)
         self.main.queue_tab.set_paused_status()
         self.timer.stop()
-        self.pulse_timer.stop()
+        self.ready_timer.stop()
+        self.main.timers.stop("pulse")
         self.main.countdown.stop()
         logger.user("⏹ Listening stopped.")
+        logger.dev(arena_logic.session_summary_string())
+        logger.dev(delivery_summary_string())
+        logger.dev(latency_summary_string())
+        logger.dev(get_deleter().summary_string())
+        history = get_history() if self.main.cfg.get("history_enabled", True) else None
+        if history:
+            history.flush(timeout=1.0)
+        logger.dev(self.scheduler.summary_string())
+        logger.dev(self.main.timers.summary_string())
+        if self.trace:
+            self.trace.close()
+            self.trace = None
 
     def animate_status(self):
         if not self.is_running:
@@ -58,50 +123,137 @@ class ListenerController:
         lbl.setText(txt + '.' if not self.pulse_state else txt)
         self.pulse_state = not self.pulse_state
 
+    @profiled("check_screenshots")
     def check_screenshots(self):
         if not self.is_running or not self.main.game_folder:
             return
 
-        now = time.time()
-        if now < self._cooldown_until:
-            return
+        self.scheduler.record_wakeup()
+        try:
+            self._check_screenshots()
+        finally:
+            # adapt the next wakeup (burst after POP, back off when idle)
+            interval = self.scheduler.interval_ms()
+            if self.is_running and self.timer.interval() != interval:
+                self.timer.setInterval(interval)
 
-        path, ts = get_latest_screenshot_info(self.main.game_folder)
-        if not path or not ts:
-            return
-        if ts < self.app_start_time or ts <= self.high_watermark:
+    def _check_combat_log(self):
+        if not self.combat_log:
             return
+        for event, line in self.combat_log.poll():
+            self._on_log_event(event, line, str(self.combat_log.screenshots_root or ""))
+
+    def _on_log_event(self, event: str, line: str, client_id: str):
+        self.scheduler.on_change()
+        if self.trace:
+            self.trace.log_event(time.time(), self._client_name(client_id), event)
+        result = arena_logic.process_log_event(event, self.main.cfg, line, client_id=client_id)
+        self._apply_result(result, client_id)
 
+    def _client_name(self, client_id: str) -> str:
+        """Client folder relative to the game folder (traces must not depend on the install path)."""
         try:
-            size = path.stat().st_size
-            prev = self._recent.get(str(path))
-            if prev and prev[0] == size and abs(now - prev[2]) < 3:
-                return
-            self._recent[str(path)] = (size, ts, now)
-        except:
-            pass
+            return os.path.relpath(client_id, self.main.game_folder) if client_id else ""
+        except ValueError:
+            return os.path.basename(client_id)
 
-        self._cooldown_until = now + 1
-        self.high_watermark = ts
-        self.last_screenshot_time = ts
+    def _check_screenshots(self):
+        self._check_combat_log()
+        now = time.time()
+
+        # every file newer than the watermark, oldest first
+        batch = []
+        looked_at = self.looked_at
+        complete = True
+        for path, ts in list_new_screenshots(self.main.game_folder, self.high_watermark):
+            if ts < self.app_start_time or is_pending_delete(path):
+                continue
+            if not self._is_ready(path, now):
+                complete = False
+                break  # keep mtime order, retry shortly
+            batch.append((path, ts))
+        if complete:
+            self.looked_at = now
+
+        if not batch:
+            return
+
+        fresh = []
+        sizes = {}
+        for path, ts in batch:
+            self.high_watermark = ts
+            self.last_screenshot_time = ts
+            try:
+                size = sizes[path] = path.stat().st_size
+                flight.record(flight.WATCH, path.name, int((now - ts) * 1000), size >> 10)
+                prev = self._recent.get(str(path), now=now)
+                if prev and prev[0] == size and abs(now - prev[2]) < 3:
+                    flight.record(flight.DROP, path.name, flight.DROP_RECENT)
+                    continue
+                self._recent.put(str(path), (size, ts, now), now=now)
+            except:
+                pass
+            fresh.append(path)
+
+        self.scheduler.on_change()
+        if not fresh:
+            return
 
-        # manual-screenshot check removed permanently
-        result = arena_logic.process_screenshot_event(
-            path, self.main.cfg, app_start_time=self.app_start_time
+        # decode concurrently, apply in mtime order per client (clients run side by side)
+        tags = arena_logic.classify_screenshots(fresh, now=now, looked_at=looked_at)
+        items = [(path, tag, code) for path, (tag, code) in zip(fresh, tags)]
+        if self.trace:
+            mtimes = dict(batch)
+            for path, tag, code in items:
+                self.trace.arrival(now, self._client_name(str(path.parent)), path.name,
+                                   sizes.get(path, 0), mtimes[path], tag, code.seq if code else None)
+        results = arena_logic.process_screenshot_batch(
+            items, self.main.cfg, app_start_time=self.app_start_time, looked_at=looked_at
         )
+        for client_id, result in results:
+            self._apply_result(result, client_id)
+
+    def _apply_result(self, result: str, client_id: str | None = None):
+        if result:
+            self.scheduler.on_event(result, countdown_s=self.main.cfg.get("countdown_time", 40))
+            if self.trace:
+                self.trace.result(time.time(), self._client_name(client_id or ""), result)
 
         if result == "arena_pop":
             self.main.queue_tab.set_status("⚔️ Arena queue popped!", "#ffaa00", big=False)
             adjusted = max(int(self.main.cfg.get("countdown_time", 40))
                            - int(self.main.cfg.get("delay_offset", 2))
                            - 1, 1)
-            self.main.countdown.start(adjusted)
+            self.main.countdown.start(adjusted, deadline=arena_logic.get_pop_deadline(client_id))
 
         elif result == "arena_stop":
+            # another multiboxed client still queued → keep counting for it
+            pending = arena_logic.get_pop_deadline()
+            if pending is not None:
+                self.main.countdown.start(max(int(pending - time.monotonic()), 1), deadline=pending)
+                return
             self.main.countdown.stop()
             self.main.queue_tab.set_status("⚔️ FIGHT!", "#ff4444", big=True)
             QTimer.singleShot(2000, self.restore_status)
 
+    def _is_ready(self, path, now) -> bool:
+        """Wait (without blocking) until the game finished writing the file."""
+        key = str(path)
+        since, last_size = self._pending.get(key, (now, None), now=now)
+        ready, size = probe_screenshot_ready(path, last_size)
+
+        if ready or (now - since) >= READY_MAX_WAIT_S:
+            self._pending.pop(key)
+            if not ready:
+                logger.dev(f"Screenshot still incomplete after {READY_MAX_WAIT_S}s: {path.name}")
+            return True
+
+        self._pending.put(key, (since, size), now=now)
+        flight.record(flight.NOT_READY, path.name, int((now - since) * 1000))
+        if not self.ready_timer.isActive():
+            self.ready_timer.start()
+        return False
+
     def restore_status(self):
         if not hasattr(self.main, "queue_tab"):
             return
@@ -0,0 +1,91 @@
+# file: desktop_app/controllers/poll_scheduler.py
+# -*- coding: utf-8 -*-
+"""
+Adaptive poll interval for the screenshot listener:
+ • burst  → right after POP/STOP, while the addon's screenshotDelay window is open
+ • active → countdown running, waiting for the STOP screenshot
+ • normal → something changed recently
+ • idle   → nothing changed for a while (multi-second backoff)
+ • deep_idle → long queue, longest backoff (arena_logic's stale check counts
+   a file's age from the previous poll, so a POP found late is still a POP)
+"""
+
+import time
+
+MODES = ("burst", "active", "normal", "idle", "deep_idle")
+
+INTERVAL_MS = {
+    "burst": 100,
+    "active": 250,
+    "normal": 1000,
+    "idle": 3000,
+    "deep_idle": 5000,
+}
+
+BURST_GRACE_S = 1.5        # addon shoots at screenshotDelay (+0.25 s), keep some slack
+IDLE_AFTER_S = 120         # 2 min without new screenshots → idle
+DEEP_IDLE_AFTER_S = 900    # 15 min → deep idle
+
+
+class PollScheduler:
+    """Pure-python scheduler; the controller feeds it and applies interval_ms()."""
+
+    def __init__(self, screenshot_delay: float = 2.0):
+        self.screenshot_delay = max(float(screenshot_delay), 0.0)
+        self.reset()
+
+    def reset(self, now: float | None = None):
+        now = time.monotonic() if now is None else now
+        self._started = now
+        self._last_change = now
+        self._burst_until = 0.0
+        self._active_until = 0.0
+        self.mode = "normal"
+        self.wakeups = {m: 0 for m in MODES}
+
+    # ------------------------------------------------------------------
+    def on_change(self, now: float | None = None):
+        """A new screenshot appeared (tagged or not)."""
+        now = time.monotonic() if now is None else now
+        self._last_change = now
+
+    def on_event(self, event: str, countdown_s: float = 0, now: float | None = None):
+        """POP opens a burst window followed by an active window until the countdown ends."""
+        now = time.monotonic() if now is None else now
+        self._last_change = now
+        self._burst_until = now + self.screenshot_delay + BURST_GRACE_S
+
+        if event == "arena_pop":
+            self._active_until = now + max(float(countdown_s), 0) + self.screenshot_delay + BURST_GRACE_S
+        elif event == "arena_stop":
+            self._active_until = 0.0
+
+    # ------------------------------------------------------------------
+    def current_mode(self, now: float | None = None) -> str:
+        now = time.monotonic() if now is None else now
+        if now < self._burst_until:
+            return "burst"
+        if now < self._active_until:
+            return "active"
+
+        quiet = now - self._last_change
+        if quiet >= DEEP_IDLE_AFTER_S:
+            return "deep_idle"
+        if quiet >= IDLE_AFTER_S:
+            return "idle"
+        return "normal"
+
+    def record_wakeup(self, now: float | None = None):
+        self.wakeups[self.current_mode(now)] += 1
+
+    def interval_ms(self, now: float | None = None) -> int:
+        self.mode = self.current_mode(now)
+        return INTERVAL_MS[self.mode]
+
+    # ------------------------------------------------------------------
+    def summary_string(self, now: float | None = None) -> str:
+        now = time.monotonic() if now is None else now
+        total = sum(self.wakeups.values())
+        fixed = int((now - self._started) * 1000 / INTERVAL_MS["normal"])
+        parts = ", ".join(f"{m}={self.wakeups[m]}" for m in MODES)
+        return f"poll wakeups: {parts}, total={total} (fixed 1 Hz ≈ {fixed})"
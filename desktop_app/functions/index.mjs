@@ -15,6 +15,8 @@ import { defineSecret } from "firebase-functions/params";
 const WOW_SECRET = defineSecret("WOW_SECRET");
 
 // --- Global settings ---
+// body endsAt further than this from now + duration is ignored (bad clock sync)
+const ENDS_AT_TOLERANCE_MS = 10000;
 setGlobalOptions({ region: "us-central1" });
 console.log("🚀 Starting WoW Arena Notify backend...");
 
@@ -148,9 +150,17 @@ app.post("/", async (req, res) => {
     try {
       console.log(`🧠 Writing to RTDB: /devices/${pairing_id}/arena`);
       const ref = getRTDB().ref(`/arena_events/${pairing_id}/current`);
+      // desktop endsAt (server clock) is exact; duration-based only as fallback
+      const now = Date.now();
+      const fromDuration = now + parseInt(duration || 0) * 1000;
+      const bodyEndsAt = parseInt(bodyObj.endsAt, 10);
+      const endsAt =
+        Number.isFinite(bodyEndsAt) && Math.abs(bodyEndsAt - fromDuration) < ENDS_AT_TOLERANCE_MS
+          ? bodyEndsAt
+          : fromDuration;
       await ref.set({
         type: event, // Android expects "type"
-        endsAt: Date.now() + parseInt(duration || 0) * 1000,
+        endsAt,
         duration,
         desktopOffset: bodyObj.desktopOffset || "0",
         server_ts: Date.now(),
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Combat log tailing (second ingestion channel, no image decode):
+- Locate WoWCombatLog*.txt in the Logs folder next to Screenshots
+- Follow it by byte offset (seek-based, handles truncation / new files)
+- Emit arena events from ARENA_MATCH_START lines
+
+WoW only writes the log while /combatlog is enabled and flushes it in
+chunks, so screenshots stay the primary path and this one is a shortcut.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from infrastructure.logger import logger
+from infrastructure.watcher import resolve_screenshot_roots
+
+# combat log event → arena_logic event
+ARENA_LINE_EVENTS = {
+    "ARENA_MATCH_START": "arena_stop",   # we are inside the arena → fight
+}
+
+_READ_CHUNK = 64 * 1024
+_MAX_PARTIAL = 16 * 1024   # a single log line is never this long
+_RESCAN_S = 10             # look for a newer dated log file at most this often
+
+
+def resolve_combat_log(base_wow_folder: str) -> Optional[Path]:
+    """Newest WoWCombatLog*.txt in any <flavor>/Logs (None if logging never ran)."""
+    logs = []
+    for shots in resolve_screenshot_roots(base_wow_folder):
+        try:
+            logs.extend(p for p in (shots.parent / "Logs").glob("WoWCombatLog*.txt") if p.is_file())
+        except Exception:
+            continue
+    if not logs:
+        return None
+    return max(logs, key=lambda p: p.stat().st_mtime)
+
+
+def parse_arena_line(line: str) -> Optional[str]:
+    """
+    '10/19 13:20:59.123  ARENA_MATCH_START,1505,0,2v2,1' → 'arena_stop'.
+    Cheap prefix scan: only the event name is split out.
+    """
+    _, sep, rest = line.partition("  ")
+    if not sep:
+        return None
+    name = rest.split(",", 1)[0].strip()
+    return ARENA_LINE_EVENTS.get(name)
+
+
+class CombatLogTailer:
+    """
+    Follows the combat log by byte offset. poll() is cheap when nothing
+    changed (one stat call) and returns [(event, line), ...].
+    """
+
+    def __init__(self, base_wow_folder: str):
+        self.base = base_wow_folder
+        self.path: Optional[Path] = None
+        self.offset = 0
+        self._partial = b""
+        self._last_rescan = 0.0
+
+    def start(self):
+        """Attach at the end of the current log: history is never replayed."""
+        self.path = resolve_combat_log(self.base)
+        self._partial = b""
+        self._last_rescan = time.monotonic()
+        try:
+            self.offset = self.path.stat().st_size if self.path else 0
+        except OSError:
+            self.offset = 0
+        if self.path:
+            logger.dev(f"Combat log tail: {self.path} @ {self.offset}")
+
+    @property
+    def screenshots_root(self) -> Optional[Path]:
+        """Screenshots folder of the client writing this log (its client id)."""
+        return self.path.parent.parent / "Screenshots" if self.path else None
+
+    def _maybe_switch_file(self):
+        """WoW opens a new dated log per session; follow the newest one."""
+        now = time.monotonic()
+        if now - self._last_rescan < _RESCAN_S:
+            return
+        self._last_rescan = now
+
+        newest = resolve_combat_log(self.base)
+        if newest and newest != self.path:
+            logger.dev(f"Combat log switched → {newest}")
+            self.path = newest
+            self.offset = 0
+            self._partial = b""
+
+    def poll(self) -> List[Tuple[str, str]]:
+        if not self.path:
+            self._maybe_switch_file()
+            if not self.path:
+                return []
+
+        try:
+            size = os.stat(self.path).st_size
+        except OSError:
+            self.path = None
+            return []
+
+        if size < self.offset:          # truncated / rewritten
+            self.offset = 0
+            self._partial = b""
+        if size == self.offset:
+            self._maybe_switch_file()
+            return []
+
+        events = []
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                while True:
+                    chunk = f.read(_READ_CHUNK)
+                    if not chunk:
+                        break
+                    self.offset += len(chunk)
+                    events.extend(self._feed(chunk))
+        except OSError as e:
+            logger.dev(f"Combat log read failed: {e}")
+        return events
+
+    def _feed(self, chunk: bytes) -> List[Tuple[str, str]]:
+        data = self._partial + chunk
+        lines = data.split(b"\n")
+        self._partial = lines.pop()[-_MAX_PARTIAL:]
+
+        events = []
+        for raw in lines:
+            # fast reject before decoding: arena lines are rare
+            if b"ARENA_MATCH" not in raw:
+                continue
+            line = raw.decode("utf-8", errors="replace").rstrip("\r")
+            event = parse_arena_line(line)
+            if event:
+                events.append((event, line))
+        return events
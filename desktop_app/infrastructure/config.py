@@ -36,12 +36,18 @@ DEFAULT_CFG: Dict[str, object] = {
     "pairing_id": "",
     "device_id": "",
     "device_secret": "",
+    "paired_devices": [],    # extra devices: [{"pairing_id", "device_id", "device_secret"}, ...]
     "desktop_id": "",
     "delay_offset": 2,
     "first_run": True,
+    "combat_log_enabled": True,
+    "relay_url": "",         # optional LAN relay (services/push/relay_server.py)
+    "trace_sessions": False, # record screenshot arrivals for scripts/replay_trace.py
+    "history_enabled": True, # every POP/STOP → history.db (Logs tab stats)
+    "clock_sync_probe": False, # ".sv" timestamp writes for clock sync (needs RTDB rules)
 }
 
-_PROTECTED_KEYS = ("pairing_id", "device_id", "device_secret", "game_folder")
+_PROTECTED_KEYS = ("pairing_id", "device_id", "device_secret", "paired_devices", "game_folder")
 
 
 def _atomic_write(path: Path, text: str):
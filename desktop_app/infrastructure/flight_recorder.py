@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Flight recorder: the last FLIGHT_CAPACITY pop-pipeline events, always on
+- fixed-size binary records packed into one preallocated bytearray
+  (no allocation, no formatting, no lock on the hot path)
+- slot index from itertools.count (atomic under the GIL)
+- strings (file names, clients, short pairing ids) are interned into a
+  small ring and referenced by id; evicted ones decode as "?"
+- dumped as text to logs/flight_*.txt: shortly after any logger.error,
+  on Ctrl+Shift+F in the main window, or from the Tester tab
+"""
+
+import itertools
+import logging
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from infrastructure.logger import logger, get_logs_dir, enforce_logs_budget
+
+FLIGHT_CAPACITY = 1 << 16        # records (~1.6 MB)
+FLIGHT_STRINGS = 4096
+FLIGHT_KEEP = 10                 # dump files kept (and all of them count in the logs budget)
+ERROR_DUMP_DELAY_S = 2.0         # let the failing pop finish (fallback, retries) first
+ERROR_DUMP_MIN_GAP_S = 60.0
+
+# seq, kind, string id, t (monotonic ns), a, b
+_RECORD = struct.Struct("<IBIqii")
+_I32 = (1 << 31) - 1
+
+# --- event kinds: (name, meaning of a, meaning of b)
+WATCH = 1         # new screenshot seen by the listener
+NOT_READY = 2     # still being written, re-probed later
+TAG = 3           # detector result
+DROP = 4          # file / event ignored (a = drop reason)
+APPLY = 5         # POP/STOP accepted by a client's state machine
+SEND = 6          # POST attempt to one device
+SEND_DONE = 7     # POST finished
+DELIVER = 8       # fan-out finished for one event
+LOG_LINE = 9      # combat log event
+ERROR = 10
+
+KINDS = {
+    WATCH: ("watch", "age_ms", "size_kb"),
+    NOT_READY: ("not_ready", "waited_ms", ""),
+    TAG: ("tag", "event", "detect_us"),
+    DROP: ("drop", "reason", ""),
+    APPLY: ("apply", "event", ""),
+    SEND: ("send", "attempt", ""),
+    SEND_DONE: ("send_done", "status", "ms"),
+    DELIVER: ("deliver", "delivered", "ms"),
+    LOG_LINE: ("log_line", "event", ""),
+    ERROR: ("error", "", ""),
+}
+
+EVENT_CODES = {None: 0, "": 0, "arena_pop": 1, "arena_stop": 2}
+_EVENT_NAMES = {0: "none", 1: "arena_pop", 2: "arena_stop"}
+
+DROP_DUPLICATE = 1
+DROP_PENDING_DELETE = 2
+DROP_OLD = 3
+DROP_STALE = 4
+DROP_NO_TAG = 5
+DROP_RECENT = 6
+_DROP_NAMES = {1: "duplicate", 2: "pending_delete", 3: "old", 4: "stale", 5: "no_tag", 6: "recent"}
+
+
+class FlightRecorder:
+    def __init__(self, capacity: int = FLIGHT_CAPACITY, strings: int = FLIGHT_STRINGS):
+        assert capacity & (capacity - 1) == 0, "capacity must be a power of two"
+        self.enabled = True
+        self._mask = capacity - 1
+        self._buf = bytearray(capacity * _RECORD.size)
+        self._seq = itertools.count(1)
+        self._pack = _RECORD.pack_into
+        self._now = time.monotonic_ns
+
+        self._strings: list[Optional[tuple[int, str]]] = [None] * strings
+        self._sids: dict[str, int] = {}
+        self._next_sid = 1
+        self._str_lock = threading.Lock()
+        self._dump_lock = threading.Lock()
+
+    # ------------------------------------------------------------------ hot path
+    def record(self, kind: int, s: Optional[str] = None, a: int = 0, b: int = 0):
+        if not self.enabled:
+            return
+        sid = (self._sids.get(s) or self._intern(s)) if s else 0
+        i = next(self._seq)
+        try:
+            self._pack(self._buf, (i & self._mask) * _RECORD.size, i & 0xFFFFFFFF,
+                       kind, sid, self._now(), a, b)
+        except struct.error:        # out of int32 range / not an int: clip, never raise
+            self._pack(self._buf, (i & self._mask) * _RECORD.size, i & 0xFFFFFFFF,
+                       kind, sid, self._now(), _clip(a), _clip(b))
+
+    def _intern(self, s: str) -> int:
+        with self._str_lock:
+            sid = self._sids.get(s)
+            if sid is None:
+                sid = self._next_sid
+                self._next_sid = (sid + 1) & 0xFFFFFFFF or 1
+                slot = sid % len(self._strings)
+                old = self._strings[slot]
+                if old is not None:
+                    self._sids.pop(old[1], None)
+                self._strings[slot] = (sid, s)
+                self._sids[s] = sid
+            return sid
+
+    # ------------------------------------------------------------------ reading
+    def snapshot(self) -> list[tuple[int, int, str, int, int, int]]:
+        """[(seq, kind, string, t_ns, a, b)] oldest first."""
+        buf = bytes(self._buf)
+        with self._str_lock:
+            strings = {e[0]: e[1] for e in self._strings if e is not None}
+        records = [r for r in _RECORD.iter_unpack(buf) if r[0]]
+        records.sort(key=lambda r: r[0])
+        return [(seq, kind, strings.get(sid, "?") if sid else "", t, a, b)
+                for seq, kind, sid, t, a, b in records]
+
+    def dump(self, reason: str = "manual") -> Optional[Path]:
+        """Write the ring as text to the logs directory; returns the file (None if empty)."""
+        with self._dump_lock:
+            records = self.snapshot()
+            if not records:
+                return None
+            wall_minus_mono = time.time() - time.monotonic_ns() / 1e9
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            path = get_logs_dir() / f"flight_{stamp}_{reason}.txt"
+
+            lines = [f"# flight recorder dump ({reason}), {len(records)} records"]
+            prev = records[0][3]
+            for seq, kind, s, t, a, b in records:
+                wall = wall_minus_mono + t / 1e9
+                lines.append(f"{time.strftime('%H:%M:%S', time.localtime(wall))}.{int(wall * 1000) % 1000:03d} "
+                             f"+{(t - prev) / 1e6:8.2f}ms  {_describe(kind, s, a, b)}")
+                prev = t
+            path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            _prune_dumps(path.parent)
+            enforce_logs_budget()
+            return path
+
+
+def _clip(v) -> int:
+    try:
+        return max(-_I32 - 1, min(int(v), _I32))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _describe(kind: int, s: str, a: int, b: int) -> str:
+    name, a_name, b_name = KINDS.get(kind, (f"kind{kind}", "a", "b"))
+    if kind in (TAG, APPLY, LOG_LINE):
+        a_txt = _EVENT_NAMES.get(a, str(a))
+    elif kind == DROP:
+        a_txt = _DROP_NAMES.get(a, str(a))
+    else:
+        a_txt = str(a)
+    parts = [f"{name:<9}", s]
+    if a_name:
+        parts.append(f"{a_name}={a_txt}")
+    if b_name:
+        parts.append(f"{b_name}={b}")
+    return " ".join(p for p in parts if p)
+
+
+def _prune_dumps(folder: Path):
+    dumps = sorted(folder.glob("flight_*.txt"), key=lambda p: p.stat().st_mtime)
+    for p in dumps[:-FLIGHT_KEEP]:
+        p.unlink(missing_ok=True)
+
+
+class _ErrorDumpHandler(logging.Handler):
+    """logger.error → record it and dump the ring a moment later (rate limited)."""
+
+    def __init__(self, recorder: FlightRecorder):
+        super().__init__(level=logging.ERROR)
+        self.recorder = recorder
+        self._last = -ERROR_DUMP_MIN_GAP_S
+
+    def emit(self, record):
+        self.recorder.record(ERROR, str(record.msg)[:80])
+        now = time.monotonic()
+        if now - self._last < ERROR_DUMP_MIN_GAP_S:
+            return
+        self._last = now
+        timer = threading.Timer(ERROR_DUMP_DELAY_S, self._dump)
+        timer.daemon = True
+        timer.start()
+
+    def _dump(self):
+        try:
+            self.recorder.dump("error")
+        except OSError:
+            pass
+
+
+recorder = FlightRecorder()
+record = recorder.record
+logger.addHandler(_ErrorDumpHandler(recorder))
+
+
+def dump_flight_recorder(reason: str = "manual") -> Optional[Path]:
+    path = recorder.dump(reason)
+    if path:
+        logger.user(f"🛩 Flight recorder dumped → {path}")
+    return path
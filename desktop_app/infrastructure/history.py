@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Event history (AppData/.../history.db):
+- One row per POP/STOP: client, source, event id, per-stage latencies, delivery outcome
+- SQLite in WAL mode, indexed on time and (event, time) → analytics stay instant
+- Writes are queued and committed in batches by a background writer thread
+
+Stages (ms):
+  pickup   screenshot written → picked up by the listener (None for the combat log)
+  detect   decode + border scan
+  deliver  fan-out call (pushArena, plus the RTDB fallback when used)
+  total    screenshot written → delivered
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from infrastructure.config import APP_DIR
+from infrastructure.logger import logger
+
+HISTORY_VERSION = 1
+BATCH_MAX = 256
+BATCH_INTERVAL_S = 0.5
+SESSION_GAP_S = 2 * 3600     # longer gaps between pops = not playing, not queueing
+
+COLUMNS = (
+    "ts", "client", "event", "event_id", "source",
+    "pickup_ms", "detect_ms", "deliver_ms", "total_ms",
+    "devices", "delivered", "fallback", "prepared", "pop_to_stop_s",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id            INTEGER PRIMARY KEY,
+    ts            REAL NOT NULL,
+    client        TEXT,
+    event         TEXT NOT NULL,
+    event_id      TEXT,
+    source        TEXT,
+    pickup_ms     REAL,
+    detect_ms     REAL,
+    deliver_ms    REAL,
+    total_ms      REAL,
+    devices       INTEGER,
+    delivered     INTEGER,
+    fallback      INTEGER,
+    prepared      INTEGER,
+    pop_to_stop_s REAL
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts);
+CREATE INDEX IF NOT EXISTS idx_events_event_ts ON events(event, ts);
+"""
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), timeout=5, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class HistoryStore:
+    def __init__(self, path: Path):
+        self.path = path
+        self._queue: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self.written = 0
+        self.dropped = 0
+
+        conn = _connect(path)
+        with conn:
+            conn.executescript(_SCHEMA)
+            conn.execute(f"PRAGMA user_version={HISTORY_VERSION}")
+        conn.close()
+
+        # readers (UI) and the writer each get their own connection: WAL lets
+        # them run side by side without blocking
+        self._read = _connect(path)
+        self._read_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._run, daemon=True, name="history")
+        self._writer.start()
+
+    # ------------------------------------------------------------------ writes
+    def record(self, event: str, **fields):
+        """Queue one row (never blocks, never raises)."""
+        if self._stop.is_set():
+            self.dropped += 1
+            return
+        fields.setdefault("ts", time.time())
+        fields["event"] = event
+        self._queue.put(tuple(fields.get(c) for c in COLUMNS))
+
+    def _run(self):
+        conn = _connect(self.path)
+        sql = f"INSERT INTO events ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        while True:
+            try:
+                rows = [self._queue.get(timeout=BATCH_INTERVAL_S)]
+            except queue.Empty:
+                if self._stop.is_set():
+                    break
+                continue
+            # everything that arrived meanwhile goes into the same transaction
+            deadline = time.monotonic() + BATCH_INTERVAL_S
+            while len(rows) < BATCH_MAX and time.monotonic() < deadline and not self._stop.is_set():
+                try:
+                    rows.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    conn.executemany(sql, rows)
+                self.written += len(rows)
+            except sqlite3.Error as e:
+                self.dropped += len(rows)
+                logger.dev(f"history write failed ({len(rows)} rows): {e}")
+            for _ in rows:
+                self._queue.task_done()
+        conn.close()
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        end = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > end:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self):
+        self.flush()
+        self._stop.set()
+        self._writer.join(timeout=2)
+        with self._read_lock:
+            self._read.close()
+
+    # ------------------------------------------------------------------ reads
+    def _one(self, sql: str, args=()) -> tuple:
+        with self._read_lock:
+            return self._read.execute(sql, args).fetchone()
+
+    def summary(self, since: Optional[float] = None, until: Optional[float] = None) -> dict:
+        """Aggregates over [since, until) — index range scans only."""
+        since = since or 0.0
+        until = until or time.time() + 1
+        pops, active_hours, deliver_ms, total_ms = self._one(
+            "SELECT COUNT(*), COUNT(DISTINCT CAST(ts / 3600 AS INTEGER)), AVG(deliver_ms), AVG(total_ms) "
+            "FROM events WHERE event='arena_pop' AND ts>=? AND ts<?", (since, until))
+        # gaps between consecutive pops of one client, within a play session
+        between, = self._one(
+            "SELECT AVG(gap) FROM (SELECT ts - LAG(ts) OVER (PARTITION BY client ORDER BY ts) AS gap "
+            "FROM events WHERE event='arena_pop' AND ts>=? AND ts<?) WHERE gap < ?",
+            (since, until, SESSION_GAP_S))
+        stops, pop_to_stop = self._one(
+            "SELECT COUNT(*), AVG(pop_to_stop_s) FROM events "
+            "WHERE event='arena_stop' AND ts>=? AND ts<?", (since, until))
+        devices, delivered, fallback, prepared = self._one(
+            "SELECT SUM(devices), SUM(delivered), SUM(fallback), SUM(prepared) "
+            "FROM events WHERE ts>=? AND ts<?", (since, until))
+
+        return {
+            "pops": pops,
+            "stops": stops,
+            "pops_per_hour": pops / active_hours if active_hours else 0.0,
+            "avg_between_pops_s": between,
+            "avg_pop_to_stop_s": pop_to_stop,
+            "avg_deliver_ms": deliver_ms,
+            "avg_total_ms": total_ms,
+            "delivery_rate": (delivered or 0) / devices if devices else None,
+            "fallbacks": fallback or 0,
+            "prepared_stops": prepared or 0,
+        }
+
+    def pops_by_hour(self, since: float) -> list[tuple[int, int]]:
+        """[(hour start epoch, pops)] — for charts / the last-24 h view."""
+        with self._read_lock:
+            return self._read.execute(
+                "SELECT CAST(ts / 3600 AS INTEGER) * 3600 AS h, COUNT(*) FROM events "
+                "WHERE event='arena_pop' AND ts>=? GROUP BY h ORDER BY h", (since,)).fetchall()
+
+    def count(self) -> int:
+        return self._one("SELECT COUNT(*) FROM events")[0]
+
+
+def summary_string(s: dict) -> str:
+    def fmt(v, unit="", spec=".0f"):
+        return f"{v:{spec}}{unit}" if v is not None else "–"
+    rate = fmt(s["delivery_rate"] * 100 if s["delivery_rate"] is not None else None, "%")
+    return (f"pops {s['pops']} ({fmt(s['pops_per_hour'], '/h', '.1f')}), "
+            f"between pops {fmt(s['avg_between_pops_s'] and s['avg_between_pops_s'] / 60, ' min', '.1f')}, "
+            f"pop→arena {fmt(s['avg_pop_to_stop_s'], ' s', '.1f')}, "
+            f"delivered {rate} in {fmt(s['avg_deliver_ms'], ' ms')}")
+
+
+_store: Optional[HistoryStore] = None
+_store_failed = False
+_store_lock = threading.Lock()
+
+
+def get_history() -> Optional[HistoryStore]:
+    """Process-wide store; None when the database can't be opened (history is best effort)."""
+    global _store, _store_failed
+    with _store_lock:
+        if _store is None and not _store_failed:
+            try:
+                _store = HistoryStore(APP_DIR / "history.db")
+            except (sqlite3.Error, OSError) as e:
+                _store_failed = True
+                logger.dev(f"history disabled: {e}")
+        return _store
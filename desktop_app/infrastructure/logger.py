@@ -1,18 +1,35 @@
 # -*- coding: utf-8 -*-
 """
 Minimal logger with:
- - File rotation
+ - File rotation: at midnight or at LOG_MAX_BYTES, whichever comes first;
+   rotated files are compressed off the logging thread and the logs
+   directory is kept under LOGS_BUDGET_BYTES (oldest files go first,
+   diagnostics dumped next to the logs count too: LOGS_BUDGET_PATTERNS)
  - Console output
  - Qt handler to Logs tab
  - .user() and .dev() helpers for compatibility
 """
 
+import gzip
 import logging
+import queue
+import shutil
+import threading
+import time
 from logging.handlers import TimedRotatingFileHandler
 from pathlib import Path
 import os
 from PySide6.QtCore import QObject, Signal
 
+try:                        # Python 3.14+
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+LOG_MAX_BYTES = int(float(os.getenv("WOWAN_LOG_MAX_MB", "10")) * 2 ** 20)
+LOGS_BUDGET_BYTES = int(float(os.getenv("WOWAN_LOGS_BUDGET_MB", "50")) * 2 ** 20)
+LOGS_BUDGET_PATTERNS = ("flight_*.txt", "profile_*.collapsed", "profile_*_callbacks.txt")     # other files in the logs directory under the budget
+
 class LogEmitter(QObject):
     new_log = Signal(str)
 
@@ -30,6 +47,147 @@ class QtLogHandler(logging.Handler):
             pass
 
 
+class _LogCompressor:
+    """
+    Background worker behind the rotating handler: compresses rotated files
+    (zstd when available, gzip otherwise) and prunes the oldest ones until the
+    directory fits the budget. Never logs — it runs behind the logger itself.
+    """
+    def __init__(self, base: Path, budget_bytes: int):
+        self.base = base
+        self.budget = budget_bytes
+        self.ext = ".zst" if zstd else ".gz"
+        self.stats = {"compressed": 0, "pruned": 0, "errors": 0}
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="log-compress")
+        self._thread.start()
+
+    def submit(self, path: Path):
+        self._queue.put(path)
+
+    def rotated(self) -> list[Path]:
+        return [p for p in self.base.parent.glob(self.base.name + ".*") if p.is_file()]
+
+    def recover(self):
+        """Startup: leftovers of a previous run (partial archives, uncompressed backups)."""
+        for p in self.rotated():
+            if p.name.endswith(".part"):
+                p.unlink(missing_ok=True)
+            elif not p.name.endswith((".gz", ".zst")):
+                self.submit(p)
+        self.submit(None)       # prune only
+
+    def _compress(self, src: Path):
+        dst = src.with_name(src.name + self.ext)
+        part = dst.with_name(dst.name + ".part")
+        opener = zstd.open if zstd else gzip.open
+        with open(src, "rb") as fin, opener(part, "wb") as fout:
+            shutil.copyfileobj(fin, fout, 1024 * 1024)
+        os.utime(part, (src.stat().st_atime, src.stat().st_mtime))    # pruning goes by mtime
+        os.replace(part, dst)
+        src.unlink()
+        self.stats["compressed"] += 1
+
+    def _prune(self):
+        files = self.rotated()
+        kept = []      # newest file of each pattern: counted, never pruned (the dump just written)
+        for pattern in LOGS_BUDGET_PATTERNS:
+            extra = sorted((p for p in self.base.parent.glob(pattern) if p.is_file()),
+                           key=lambda p: p.stat().st_mtime)
+            files += extra[:-1]
+            kept += extra[-1:]
+        files.sort(key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files + kept)
+        if self.base.exists():
+            total += self.base.stat().st_size
+        for p in files:
+            if total <= self.budget:
+                break
+            if p.name.endswith(".part"):
+                continue
+            total -= p.stat().st_size
+            p.unlink(missing_ok=True)
+            self.stats["pruned"] += 1
+
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            try:
+                if path is not None and path.exists():
+                    self._compress(path)
+                self._prune()
+            except OSError:
+                self.stats["errors"] += 1
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        end = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > end:
+                return False
+            time.sleep(0.01)
+        return True
+
+
+class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """
+    Rotates at midnight or once the file reaches max_bytes. The logging thread
+    only renames the file (wow_arena.log.YYYYmmdd-HHMMSS) and reopens it;
+    compression and the directory budget are handled by _LogCompressor.
+    """
+    def __init__(self, filename, max_bytes: int = LOG_MAX_BYTES,
+                 budget_bytes: int = LOGS_BUDGET_BYTES, encoding="utf-8"):
+        super().__init__(filename, when="midnight", interval=1, encoding=encoding)
+        self.max_bytes = max_bytes
+        self._size_hold_until = 0.0
+        self.compressor = _LogCompressor(Path(self.baseFilename), budget_bytes)
+        self.compressor.recover()
+
+    def shouldRollover(self, record) -> bool:
+        now = time.time()
+        if now >= self.rolloverAt:
+            return True
+        if self.max_bytes > 0 and now >= self._size_hold_until:
+            if self.stream is None:
+                self.stream = self._open()
+            # checked before the write: a file may overshoot by one record
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        now = time.time()
+        stem = self.baseFilename + "." + time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+        dest, n = stem, 1
+        while os.path.exists(dest) or os.path.exists(dest + self.compressor.ext):
+            dest = f"{stem}-{n}"
+            n += 1
+        try:
+            os.replace(self.baseFilename, dest)
+        except OSError:
+            # locked (viewer open on Windows) → keep appending, retry in a minute
+            self._size_hold_until = now + 60
+        else:
+            self.compressor.submit(Path(dest))
+
+        self.stream = self._open()
+        rollover = self.computeRollover(int(now))
+        while rollover <= now:
+            rollover += self.interval
+        self.rolloverAt = rollover
+
+
+def enforce_logs_budget():
+    """Something was written next to the logs → prune to the budget (background)."""
+    handler = getattr(logger, "file_handler", None)
+    if isinstance(handler, SizedTimedRotatingFileHandler):
+        handler.compressor.submit(None)
+
+
 def get_logs_dir() -> Path:
     local_appdata = Path(os.getenv("LOCALAPPDATA", Path.home() / "AppData/Local"))
     logs_dir = local_appdata / "WoWArenaNotify" / "logs"
@@ -51,9 +209,7 @@ def setup_logger() -> logging.Logger:
     log_dir = get_logs_dir()
     log_file = log_dir / "wow_arena.log"
 
-    file_handler = TimedRotatingFileHandler(
-        log_file, when="midnight", interval=1, backupCount=7, encoding="utf-8"
-    )
+    file_handler = SizedTimedRotatingFileHandler(log_file)
     formatter = logging.Formatter(
         fmt="%(asctime)s [%(levelname)s] %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S"
@@ -76,6 +232,7 @@ def setup_logger() -> logging.Logger:
     qt_handler.setFormatter(formatter)
     logger.addHandler(qt_handler)
     logger.qt_handler = qt_handler
+    logger.file_handler = file_handler
 
     logger.propagate = False
 
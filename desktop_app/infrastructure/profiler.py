@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Built-in profiler (Tester tab, or WOWAN_PROFILE=<seconds> at startup):
+- sampling: a background thread snapshots every thread's stack
+  (sys._current_frames) every PROFILE_INTERVAL_S → collapsed stacks,
+  one "thread;frame;frame count" line each (flamegraph.pl / speedscope)
+- cProfile: QTimer callbacks decorated with @profiled get exact
+  per-call stats while a session runs; a single global check when idle
+- output: logs/profile_<stamp>.collapsed and profile_<stamp>_callbacks.txt,
+  last PROFILE_KEEP sessions kept, all of them within the logs budget
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from pathlib import Path
+from typing import Optional
+
+from infrastructure.logger import logger, get_logs_dir, enforce_logs_budget
+
+PROFILE_INTERVAL_S = 0.005
+PROFILE_MAX_S = 600
+CALLBACK_STATS_TOP = 25
+PROFILE_KEEP = 10            # sessions kept in the logs directory
+
+_session: Optional["ProfileSession"] = None
+_session_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ProfileSession:
+    def __init__(self, seconds: float, interval_s: float = PROFILE_INTERVAL_S):
+        self.seconds = min(max(seconds, 1.0), PROFILE_MAX_S)
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.callbacks: dict[str, cProfile.Profile] = {}
+        self.calls: Counter = Counter()
+        self.paths: list[Path] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="profiler")
+
+    # ------------------------------------------------------------------ sampler
+    def _sample(self, own_id: int, names: dict[int, str]):
+        for tid, frame in sys._current_frames().items():
+            if tid == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(tid, f"thread-{tid}"))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        own_id = threading.get_ident()
+        end = time.perf_counter() + self.seconds
+        names: dict[int, str] = {}
+        next_names = 0.0
+        overhead = 0.0
+        while not self._stop.is_set() and time.perf_counter() < end:
+            t0 = time.perf_counter()
+            if t0 >= next_names:        # thread names change rarely
+                names = {t.ident: t.name for t in threading.enumerate()}
+                next_names = t0 + 1.0
+            self._sample(own_id, names)
+            spent = time.perf_counter() - t0
+            overhead += spent
+            self._stop.wait(max(self.interval_s - spent, 0.0))
+        self._finish(overhead)
+
+    # ------------------------------------------------------------------ cProfile
+    def profile_call(self, name: str, fn, *args, **kwargs):
+        prof = self.callbacks.get(name)
+        if prof is None:
+            prof = self.callbacks.setdefault(name, cProfile.Profile())
+        self.calls[name] += 1
+        try:
+            prof.enable()
+        except ValueError:      # another profiler active (nested event loop) → run unprofiled
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            prof.disable()
+
+    # ------------------------------------------------------------------ output
+    def _finish(self, overhead: float):
+        global _session
+        with _session_lock:
+            if _session is self:
+                _session = None
+        try:
+            self.paths = self._write()
+            logger.user(f"🔬 Profile written ({self.samples} samples, "
+                        f"sampler {overhead * 1000 / max(self.samples, 1):.2f} ms/sample) → {self.paths[0]}")
+        except OSError as e:
+            logger.error(f"❌ Profile write failed: {e}")
+
+    def _write(self) -> list[Path]:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        folder = get_logs_dir()
+        collapsed = folder / f"profile_{stamp}.collapsed"
+        collapsed.write_text(
+            "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common()),
+            encoding="utf-8",
+        )
+        paths = [collapsed]
+        if self.callbacks:
+            out = io.StringIO()
+            for name, prof in sorted(self.callbacks.items()):
+                out.write(f"===== {name}: {self.calls[name]} calls =====\n")
+                pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(CALLBACK_STATS_TOP)
+            callbacks = folder / f"profile_{stamp}_callbacks.txt"
+            callbacks.write_text(out.getvalue(), encoding="utf-8")
+            paths.append(callbacks)
+        _prune_profiles(folder)
+        enforce_logs_budget()
+        return paths
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout: float | None = None):
+        self._thread.join(timeout)
+
+
+def _prune_profiles(folder: Path):
+    """Keep the newest PROFILE_KEEP sessions (a session = its .collapsed + _callbacks.txt)."""
+    sessions = sorted(folder.glob("profile_*.collapsed"), key=lambda p: p.stat().st_mtime)
+    for old in sessions[:-PROFILE_KEEP]:
+        old.unlink(missing_ok=True)
+        old.with_name(f"{old.stem}_callbacks.txt").unlink(missing_ok=True)
+
+
+def start_profiling(seconds: float, interval_s: float = PROFILE_INTERVAL_S) -> Optional[ProfileSession]:
+    """Start a session unless one is running (returns None then)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            return None
+        _session = ProfileSession(seconds, interval_s)
+        session = _session
+    session._thread.start()
+    logger.user(f"🔬 Profiling all threads for {session.seconds:.0f}s…")
+    return session
+
+
+def stop_profiling():
+    with _session_lock:
+        session = _session
+    if session:
+        session.stop()
+
+
+def is_profiling() -> bool:
+    return _session is not None
+
+
+def start_from_env():
+    """WOWAN_PROFILE=<seconds>: profile the first seconds after startup."""
+    value = os.getenv("WOWAN_PROFILE", "").strip()
+    if not value:
+        return
+    try:
+        seconds = float(value)
+    except ValueError:
+        logger.dev(f"WOWAN_PROFILE ignored: {value!r}")
+        return
+    start_profiling(seconds)
+
+
+def profiled(name: str):
+    """cProfile a QTimer callback while a session runs; plain call otherwise."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            session = _session
+            if session is None:
+                return fn(*args, **kwargs)
+            return session.profile_call(name, fn, *args, **kwargs)
+        return wrapper
+    return decorate
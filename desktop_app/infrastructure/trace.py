@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Session traces (record side of scripts/replay_trace.py):
+- Every screenshot arrival: client folder, name, size, mtime, detected tag/seq
+- Every combat log event and every applied result (POP/STOP)
+- gzip'd JSON lines, one short list per record, times relative to the start
+
+Record layout:
+  header  {"v": 1, "start": epoch, "cfg": {...}}
+  ["s", t, client, name, size, mtime, tag, seq]   screenshot arrival
+  ["l", t, client, event]                         combat log event
+  ["r", t, client, result]                        result applied to the UI
+"""
+
+import gzip
+import json
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from infrastructure.config import APP_DIR
+from infrastructure.logger import logger
+
+TRACE_VERSION = 1
+TRACE_CFG_KEYS = ("countdown_time", "delay_offset")
+
+
+def get_trace_dir() -> Path:
+    d = APP_DIR / "traces"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+class TraceRecorder:
+    def __init__(self, path: Path, cfg: dict, start: Optional[float] = None):
+        self.path = path
+        self.start = time.time() if start is None else start
+        self.records = 0
+        self._f = gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+        header = {"v": TRACE_VERSION, "start": self.start,
+                  "cfg": {k: cfg.get(k) for k in TRACE_CFG_KEYS}}
+        self._f.write(json.dumps(header) + "\n")
+        logger.dev(f"Trace recording → {path}")
+
+    @classmethod
+    def for_session(cls, cfg: dict) -> "TraceRecorder":
+        name = time.strftime("session-%Y%m%d-%H%M%S.trace.gz")
+        return cls(get_trace_dir() / name, cfg)
+
+    def _write(self, rec: list):
+        if self._f:
+            self._f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+            self.records += 1
+
+    def _t(self, now: float) -> float:
+        return round(now - self.start, 4)
+
+    def arrival(self, now: float, client: str, name: str, size: int, mtime: float, tag, seq):
+        self._write(["s", self._t(now), client, name, size, self._t(mtime), tag, seq])
+
+    def log_event(self, now: float, client: str, event: str):
+        self._write(["l", self._t(now), client, event])
+
+    def result(self, now: float, client: str, result: str):
+        self._write(["r", self._t(now), client, result])
+
+    def close(self):
+        if self._f:
+            self._f.close()
+            self._f = None
+            logger.dev(f"Trace saved: {self.path.name} ({self.records} records)")
+
+
+def read_trace(path: Path) -> tuple[dict, Iterator[list]]:
+    """(header, records) — records are streamed, so hour-long traces stay cheap."""
+    f = gzip.open(path, "rt", encoding="utf-8")
+    header = json.loads(f.readline())
+    if header.get("v") != TRACE_VERSION:
+        f.close()
+        raise ValueError(f"unsupported trace version: {header.get('v')}")
+
+    def records():
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    return header, records()
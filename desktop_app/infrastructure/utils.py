@@ -2,9 +2,14 @@
 """
 Utility helpers:
  - safe_delete() → robust file deletion with retry
+ - deferred_delete() → same, on a background thread with backoff (never blocks the caller)
+ - ExpiringCache → bounded map with TTL (oldest evicted first)
 """
 
+import heapq
+import threading
 import time
+from collections import OrderedDict
 from pathlib import Path
 from infrastructure.logger import logger
 
@@ -30,6 +35,172 @@ def safe_delete(p: Path) -> bool:
             return False
 
 
+# ---------------------------------------------------------------------------
+DELETE_BACKOFF_S = 0.1       # first retry; doubles per attempt
+DELETE_BACKOFF_MAX_S = 2.0
+DELETE_MAX_ATTEMPTS = 10     # ~10 s of retries before giving up on a locked file
+
+
+class DeferredDeleter:
+    """
+    Background deleter for processed screenshots. The game may still hold
+    the file right after a POP/STOP; retries back off without blocking anyone.
+    Everything due at the same moment is unlinked in one pass. A path stays
+    "pending" (see is_pending) until it is gone or given up on, so the
+    listener never processes it twice.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap: list[tuple[float, int, str]] = []    # (due, attempt, path)
+        self._pending: set[str] = set()
+        self._thread: threading.Thread | None = None
+        self.stats = {"queued": 0, "deleted": 0, "retries": 0, "failed": 0, "batches": 0}
+
+    def submit(self, p: Path):
+        key = str(p)
+        with self._cond:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+            self.stats["queued"] += 1
+            heapq.heappush(self._heap, (time.monotonic(), 0, key))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="deleter")
+                self._thread.start()
+            self._cond.notify()
+
+    def is_pending(self, p: Path) -> bool:
+        with self._cond:
+            return str(p) in self._pending
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """Wait until nothing is pending (or timeout); True when drained."""
+        end = time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                left = end - time.monotonic()
+                if left <= 0:
+                    return False
+                self._cond.wait(left)
+            return True
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return dict(self.stats, pending=len(self._pending))
+
+    def summary_string(self) -> str:
+        s = self.get_stats()
+        return (f"deletes: done={s['deleted']} pending={s['pending']} failed={s['failed']} "
+                f"retries={s['retries']} batches={s['batches']}")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                now = time.monotonic()
+                batch = []
+                while self._heap and self._heap[0][0] <= now:
+                    batch.append(heapq.heappop(self._heap))
+                self.stats["batches"] += 1
+
+            done, retry, failed = [], [], []
+            for _, attempt, key in batch:
+                try:
+                    Path(key).unlink()
+                    done.append(key)
+                except FileNotFoundError:
+                    done.append(key)
+                except Exception as e:
+                    if attempt + 1 >= DELETE_MAX_ATTEMPTS:
+                        logger.dev(f"deferred delete gave up on {key}: {e}")
+                        failed.append(key)
+                    else:
+                        delay = min(DELETE_BACKOFF_S * (2 ** attempt), DELETE_BACKOFF_MAX_S)
+                        retry.append((time.monotonic() + delay, attempt + 1, key))
+
+            with self._cond:
+                for item in retry:
+                    heapq.heappush(self._heap, item)
+                self._pending.difference_update(done)
+                self._pending.difference_update(failed)
+                self.stats["deleted"] += len(done)
+                self.stats["failed"] += len(failed)
+                self.stats["retries"] += len(retry)
+                self._cond.notify_all()
+
+
+_deleter: DeferredDeleter | None = None
+_deleter_lock = threading.Lock()
+
+
+def get_deleter() -> DeferredDeleter:
+    global _deleter
+    with _deleter_lock:
+        if _deleter is None:
+            _deleter = DeferredDeleter()
+        return _deleter
+
+
+def deferred_delete(p: Path):
+    """Queue `p` for deletion and return immediately."""
+    get_deleter().submit(p)
+
+
+def is_pending_delete(p: Path) -> bool:
+    return _deleter is not None and _deleter.is_pending(p)
+
+
+# ---------------------------------------------------------------------------
+class ExpiringCache:
+    """
+    Insertion-ordered map bounded by TTL and max size.
+    Re-putting a key moves it to the end; expired/overflowing entries are
+    dropped from the front, so every operation is amortized O(1).
+    """
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = float(ttl)
+        self.max_size = max(int(max_size), 1)
+        self._data = OrderedDict()
+
+    def get(self, key, default=None, now: float | None = None):
+        self._prune(time.monotonic() if now is None else now)
+        item = self._data.get(key)
+        return item[1] if item else default
+
+    def put(self, key, value, now: float | None = None):
+        now = time.monotonic() if now is None else now
+        self._data.pop(key, None)
+        self._data[key] = (now, value)
+        self._prune(now)
+
+    def pop(self, key, default=None):
+        item = self._data.pop(key, None)
+        return item[1] if item else default
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _prune(self, now: float):
+        cutoff = now - self.ttl
+        while self._data:
+            stamp, _ = next(iter(self._data.values()))
+            if stamp >= cutoff and len(self._data) <= self.max_size:
+                break
+            self._data.popitem(last=False)
+
+
 # ---------------------------------------------------------------------------
 # Compatibility stub (always return False)
 # ---------------------------------------------------------------------------
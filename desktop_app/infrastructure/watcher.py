@@ -1,8 +1,9 @@
 # -*- coding: utf-8 -*-
 """
 Filesystem helpers:
-- Resolve WoW Screenshots folder (cached)
+- Resolve every flavor's Screenshots folder (cached, self-invalidating)
 - Enumerate screenshots
+- Detect partially written screenshots (format trailer / size stability)
 - Backup new screenshots to AppData on app start
 """
 
@@ -10,7 +11,6 @@ import os
 import shutil
 import time
 from pathlib import Path
-from functools import lru_cache
 from typing import Optional, Tuple, List
 
 from infrastructure.logger import logger
@@ -22,35 +22,89 @@ def get_backup_dir() -> Path:
     d.mkdir(parents=True, exist_ok=True)
     return d
 
-@lru_cache(maxsize=1)
+FLAVOR_DIRS = ("_classic_", "_classic_era_", "_classic_ptr_", "_retail_")
+ROOTS_TTL_S = 10   # re-check for new flavor folders at most this often
+
+
+def _scan_roots(base: Path) -> List[Path]:
+    candidates = [base / f / "Screenshots" for f in FLAVOR_DIRS] + [base / "Screenshots"]
+    return [c for c in candidates if c.is_dir()]
+
+
+class ScreenshotRoots:
+    """
+    Every existing flavor Screenshots folder under the WoW base folder.
+    Re-resolved when the base changes, when the base folder itself changes
+    (new flavor installed) or after ROOTS_TTL_S, so nothing needs a restart.
+    """
+
+    def __init__(self, ttl: float = ROOTS_TTL_S):
+        self.ttl = ttl
+        self.invalidate()
+
+    def invalidate(self):
+        self._base = None
+        self._base_mtime = None
+        self._checked = 0.0
+        self._roots: List[Path] = []
+
+    def get(self, base: str) -> List[Path]:
+        now = time.monotonic()
+        base_path = Path(base or "")
+        try:
+            base_mtime = base_path.stat().st_mtime if base else None
+        except OSError:
+            base_mtime = None
+
+        if (base == self._base and base_mtime == self._base_mtime
+                and now - self._checked < self.ttl):
+            return self._roots
+
+        changed_base = base != self._base
+        self._base, self._base_mtime, self._checked = base, base_mtime, now
+
+        if base_mtime is None:
+            if changed_base:
+                logger.user("📁❓ Screenshots folder not set yet.")
+            self._roots = []
+            return self._roots
+
+        roots = _scan_roots(base_path)
+        if roots != self._roots or changed_base:
+            if roots:
+                for r in roots:
+                    logger.user(f"📁 Screenshots folder: {r}")
+            else:
+                logger.user("No Screenshots folder found under the selected WoW path.")
+        self._roots = roots
+        return roots
+
+
+_roots = ScreenshotRoots()
+
+
+def resolve_screenshot_roots(base: str) -> List[Path]:
+    return _roots.get(base)
+
+
+def invalidate_screenshot_roots():
+    """Call after the game folder changes (settings / config)."""
+    _roots.invalidate()
+
+
 def resolve_screenshots_folder(base: str) -> Optional[Path]:
-    base = Path(base or "")
-    if not base.exists():
-        logger.user("📁❓ Screenshots folder not set yet.")
-        return None
-
-    candidates = [
-        base / "_classic_" / "Screenshots",
-        base / "_classic_era_" / "Screenshots",
-        base / "_classic_ptr_" / "Screenshots",
-        base / "_retail_" / "Screenshots",
-        base / "Screenshots",
-    ]
-    for c in candidates:
-        if c.exists():
-            # one-time informative log
-            logger.user(f"📁 Screenshots folder: {c}")
-            return c
-
-    logger.user("No Screenshots folder found under the selected WoW path.")
-    return None
+    """First (primary) Screenshots folder, kept for single-folder callers."""
+    roots = resolve_screenshot_roots(base)
+    return roots[0] if roots else None
 
 # ---------- Enumeration ----------
+SCREENSHOT_EXT = (".png", ".jpg", ".jpeg", ".tga", ".bmp")
+
 def _is_screenshot(p: Path) -> bool:
     if not p.is_file():
         return False
     ext = p.suffix.lower()
-    return ext in (".png", ".jpg", ".jpeg", ".tga", ".bmp")
+    return ext in SCREENSHOT_EXT
 
 def list_screenshots(dir_path: Path) -> List[Path]:
     try:
@@ -59,17 +113,98 @@ def list_screenshots(dir_path: Path) -> List[Path]:
         return []
 
 def get_latest_screenshot_info(base_wow_folder: str) -> Tuple[Optional[Path], Optional[float]]:
-    folder = resolve_screenshots_folder(base_wow_folder)
-    if not folder:
-        return None, None
-    shots = list_screenshots(folder)
+    shots = list_new_screenshots(base_wow_folder, 0)
     if not shots:
         return None, None
-    p = shots[-1]
+    return shots[-1]
+
+def _scan_new(folder: Path, since: float, found: List[Tuple[Path, float]]):
     try:
-        return p, p.stat().st_mtime
+        with os.scandir(folder) as it:
+            for entry in it:
+                if not entry.name.lower().endswith(SCREENSHOT_EXT):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue
+                if mtime > since:
+                    found.append((Path(entry.path), mtime))
     except Exception:
-        return None, None
+        pass
+
+def list_new_screenshots(base_wow_folder: str, since: float) -> List[Tuple[Path, float]]:
+    """
+    All screenshots with mtime > since across every flavor root, merged into
+    one stream ordered oldest first (one scandir pass per root).
+    """
+    found: List[Tuple[Path, float]] = []
+    for folder in resolve_screenshot_roots(base_wow_folder):
+        _scan_new(folder, since, found)
+    found.sort(key=lambda x: x[1])
+    return found
+
+# ---------- Readiness ----------
+_PNG_TRAILER = b"IEND\xaeB`\x82"
+_JPEG_EOI = b"\xff\xd9"
+_TGA_FOOTER = b"TRUEVISION-XFILE.\x00"
+_TGA_UNCOMPRESSED = (1, 2, 3)
+
+
+def _expected_size(ext: str, head: bytes) -> Optional[int]:
+    """Full file size announced by the BMP/TGA header (None if unknown)."""
+    if ext == ".bmp" and len(head) >= 6 and head[:2] == b"BM":
+        size = int.from_bytes(head[2:6], "little")
+        return size or None
+
+    if ext == ".tga" and len(head) >= 18:
+        id_len, _, img_type = head[0], head[1], head[2]
+        if img_type not in _TGA_UNCOMPRESSED:
+            return None  # RLE → size unknown until the end
+        cmap_len = int.from_bytes(head[5:7], "little")
+        cmap_bytes = (head[7] + 7) // 8
+        w = int.from_bytes(head[12:14], "little")
+        h = int.from_bytes(head[14:16], "little")
+        px_bytes = (head[16] + 7) // 8
+        return 18 + id_len + cmap_len * cmap_bytes + w * h * px_bytes
+
+    return None
+
+
+def probe_screenshot_ready(p: Path, last_size: Optional[int] = None) -> Tuple[bool, int]:
+    """
+    Check whether the game finished writing a screenshot.
+    Returns (ready, current_size). Uses the format trailer (PNG IEND, JPEG EOI,
+    TGA footer) or the header size (BMP/TGA); otherwise falls back to size
+    stability against `last_size` from a previous probe.
+    """
+    try:
+        size = p.stat().st_size
+        if size <= 0:
+            return False, 0
+
+        ext = p.suffix.lower()
+        with open(p, "rb") as f:
+            head = f.read(18)
+            f.seek(max(size - 32, 0))
+            tail = f.read(32)
+
+        if ext == ".png":
+            return tail.endswith(_PNG_TRAILER), size
+        if ext in (".jpg", ".jpeg"):
+            return tail.rstrip(b"\x00").endswith(_JPEG_EOI), size
+        if ext == ".tga" and tail.endswith(_TGA_FOOTER):
+            return True, size
+
+        expected = _expected_size(ext, head)
+        if expected:
+            return size >= expected, size
+
+        return last_size is not None and last_size == size, size
+    except Exception:
+        return False, last_size or 0
 
 # ---------- Backup on start ----------
 def safe_copy(src: Path, dst: Path) -> bool:
@@ -82,19 +217,17 @@ def safe_copy(src: Path, dst: Path) -> bool:
     return False
 
 def backup_all_screenshots(base_wow_folder: str) -> None:
-    folder = resolve_screenshots_folder(base_wow_folder)
-    if not folder:
-        return
-
     dst_root = get_backup_dir()
-    copied = 0
-    skipped = 0
 
-    for p in list_screenshots(folder):
-        dst = dst_root / p.name
-        if safe_copy(p, dst):
-            copied += 1
-        else:
-            skipped += 1
+    for folder in resolve_screenshot_roots(base_wow_folder):
+        copied = 0
+        skipped = 0
+
+        for p in list_screenshots(folder):
+            dst = dst_root / p.name
+            if safe_copy(p, dst):
+                copied += 1
+            else:
+                skipped += 1
 
-    logger.user(f"Backup complete. Copied:{copied}, Skipped:{skipped}, From:{folder}")
+        logger.user(f"Backup complete. Copied:{copied}, Skipped:{skipped}, From:{folder}")
@@ -0,0 +1,84 @@
+# file: desktop_app/scripts/bench_combat_log.py
+# End-to-end latency: combat log tailer vs screenshot path, on generated files.
+# Both channels are polled in a tight loop, so the numbers are pure
+# processing latency (the listener's poll interval comes on top).
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from infrastructure.combat_log import CombatLogTailer
+from infrastructure.watcher import list_new_screenshots, probe_screenshot_ready
+from services.tag_detector import detect_tag_ex, render_tagged_image
+
+TRIALS = 30
+NOISE_LINES = 200_000      # pre-existing log history the tailer must not re-read
+POLL_S = 0.001
+
+
+def _noise(i: int) -> str:
+    return f"10/19 12:{i // 60 % 60:02d}:{i % 60:02d}.000  SPELL_DAMAGE,Player-1-{i:08X},\"Foo\",0x511,{random.randint(1, 9999)}\n"
+
+
+def bench_log(root: Path) -> list[float]:
+    logs = root / "_retail_" / "Logs"
+    logs.mkdir(parents=True)
+    log = logs / "WoWCombatLog-101925_120000.txt"
+    with open(log, "w", encoding="utf-8") as f:
+        f.writelines(_noise(i) for i in range(NOISE_LINES))
+
+    tailer = CombatLogTailer(str(root))
+    tailer.start()
+
+    lat = []
+    for n in range(TRIALS):
+        with open(log, "a", encoding="utf-8") as f:
+            f.writelines(_noise(i) for i in range(500))
+            f.write(f"10/19 13:00:{n % 60:02d}.000  ARENA_MATCH_START,1505,0,3v3,1\n")
+            f.flush()
+            t0 = time.perf_counter()
+        while not tailer.poll():
+            time.sleep(POLL_S)
+        lat.append((time.perf_counter() - t0) * 1000)
+    return lat
+
+
+def bench_screenshot(root: Path) -> list[float]:
+    shots = root / "_retail_" / "Screenshots"
+    img = render_tagged_image((1920, 1080), "arena_stop")
+
+    lat = []
+    watermark = 0.0
+    for n in range(TRIALS):
+        path = shots / f"WoWScrnShot_{n:04d}.jpg"
+        img.save(path, quality=90)
+        t0 = time.perf_counter()
+        while True:
+            batch = list_new_screenshots(str(root), watermark)
+            if batch and probe_screenshot_ready(batch[-1][0])[0]:
+                watermark = batch[-1][1]
+                event, _ = detect_tag_ex(str(batch[-1][0]))
+                assert event == "arena_stop"
+                break
+            time.sleep(POLL_S)
+        lat.append((time.perf_counter() - t0) * 1000)
+        time.sleep(0.02)   # distinct mtimes
+    return lat
+
+
+def _report(name: str, lat: list[float]):
+    lat = sorted(lat)
+    p95 = lat[int(len(lat) * 0.95) - 1]
+    print(f"{name:<11} median={statistics.median(lat):7.2f} ms  p95={p95:7.2f} ms  max={lat[-1]:7.2f} ms")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "_retail_" / "Screenshots").mkdir(parents=True)
+        _report("screenshot", bench_screenshot(root))
+        _report("combat log", bench_log(root))
@@ -0,0 +1,127 @@
+# file: desktop_app/scripts/bench_detector_corpus.py
+# Detector + watcher benchmark on the synthetic corpus (make_screenshot_corpus.py):
+#  • per format × resolution: detect_tag_ex latency (decode included),
+#    throughput, accuracy vs the manifest, peak RSS growth (child process)
+#  • list_screenshots / list_new_screenshots on folders of 1k / 10k / 100k files
+#
+#   python scripts/bench_detector_corpus.py [--res 1080p,4K,5K] [--rounds 3] [--files 1000,10000,100000]
+import argparse
+import multiprocessing as mp
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from make_screenshot_corpus import CASES, EXTENSIONS, generate_corpus
+
+try:
+    import resource
+except ImportError:          # Windows: no peak RSS, the rest still runs
+    resource = None
+
+
+def _rss_kib() -> int:
+    """Peak RSS of this process. VmHWM first: ru_maxrss survives fork/exec on Linux."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _bench_group(args) -> dict:
+    """Runs in a fresh process so the peak RSS belongs to this group only."""
+    corpus, names, manifest, rounds = args
+    from services.tag_detector import detect_tag_ex
+
+    base_rss = _rss_kib()
+    lat, wrong = [], []
+    for name in names:
+        for i in range(rounds):
+            t0 = time.perf_counter()
+            event, _ = detect_tag_ex(str(Path(corpus) / name))
+            lat.append((time.perf_counter() - t0) * 1000)
+        if event != manifest[name]:
+            wrong.append(f"{name}→{event}")
+    return {
+        "ms_p50": statistics.median(lat),
+        "ms_max": max(lat),
+        "per_s": len(lat) / (sum(lat) / 1000),
+        "wrong": wrong,
+        "rss_kib": _rss_kib() - base_rss,
+    }
+
+
+def bench_detector(corpus: Path, manifest: dict, resolutions, rounds: int):
+    print(f"{'res':<6} {'ext':<5} {'p50 ms':>8} {'max ms':>8} {'img/s':>7} {'+RSS MiB':>9}  accuracy")
+    ctx = mp.get_context("spawn")
+    for res in resolutions:
+        for ext in EXTENSIONS:
+            names = [f"{res}_{case}{ext}" for case in CASES]
+            with ctx.Pool(1) as pool:
+                r = pool.apply(_bench_group, ((str(corpus), names, manifest, rounds),))
+            ok = len(names) - len(r["wrong"])
+            rss = f"{r['rss_kib'] / 1024:.0f}" if r["rss_kib"] or resource else "n/a"
+            print(f"{res:<6} {ext:<5} {r['ms_p50']:>8.1f} {r['ms_max']:>8.1f} {r['per_s']:>7.1f} {rss:>9}  "
+                  f"{ok}/{len(names)} {' '.join(r['wrong'])}")
+
+
+def bench_listing(counts):
+    from infrastructure.watcher import list_screenshots, list_new_screenshots
+
+    print(f"\n{'files':>7} {'list_screenshots ms':>20} {'list_new (all) ms':>18} {'list_new (none) ms':>19}")
+    for n in counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = Path(tmp) / "_retail_" / "Screenshots"
+            folder.mkdir(parents=True)
+            for i in range(n):
+                # ~10% non-screenshot noise (WoW also keeps other files around)
+                suffix = ".txt" if i % 10 == 9 else EXTENSIONS[i % len(EXTENSIONS)]
+                (folder / f"WoWScrnShot_{i:06d}{suffix}").touch()
+            newest = max(os.stat(p).st_mtime for p in folder.iterdir())
+
+            def best(fn):
+                times = []
+                for _ in range(3):
+                    t0 = time.perf_counter()
+                    fn()
+                    times.append((time.perf_counter() - t0) * 1000)
+                return min(times)
+
+            t_list = best(lambda: list_screenshots(folder))
+            t_all = best(lambda: list_new_screenshots(tmp, 0))
+            t_none = best(lambda: list_new_screenshots(tmp, newest))
+            print(f"{n:>7} {t_list:>20.1f} {t_all:>18.1f} {t_none:>19.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--res", default="1080p,1440p,4K,5K")
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--files", default="1000,10000,100000")
+    ap.add_argument("--corpus", type=Path, help="write the corpus here and keep it")
+    args = ap.parse_args()
+    resolutions = args.res.split(",")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus or Path(tmp)
+        t0 = time.perf_counter()
+        manifest = generate_corpus(corpus, resolutions)
+        print(f"corpus: {len(manifest)} files in {time.perf_counter() - t0:.1f}s\n")
+        bench_detector(corpus, manifest, resolutions, args.rounds)
+
+    bench_listing([int(n) for n in args.files.split(",")])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# file: desktop_app/scripts/bench_flight_recorder.py
+# Flight recorder overhead: cost of one record() call, then the screenshot
+# pipeline (classify → state machine → delivery stub) with the recorder on
+# and off, interleaved so both see the same cache / turbo state. The pipeline
+# difference is mostly noise; the bound that matters is records/screenshot
+# times the per-record cost, printed next to it.
+#
+#   python scripts/bench_flight_recorder.py [--shots 200] [--rounds 5] [--res 1920x1080]
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from infrastructure import flight_recorder as flight
+from services import arena_logic
+from services.tag_detector import render_tagged_image
+
+
+def micro():
+    rec = flight.FlightRecorder()
+    n = 1_000_000
+    for label, stmt in (
+        ("record(kind, a, b)", lambda: rec.record(flight.SEND_DONE, None, 200, 42)),
+        ("record(kind, str, a, b)", lambda: rec.record(flight.TAG, "WoWScrnShot_101925_201500.jpg", 1, 18000)),
+        ("call on a disabled recorder", lambda: off.record(flight.TAG, "x", 1, 2)),
+        ("empty lambda (baseline)", lambda: None),
+    ):
+        off = flight.FlightRecorder(capacity=1)
+        off.enabled = False
+        best = min(timeit.repeat(stmt, number=n, repeat=5))
+        print(f"  {label:<28} {best / n * 1e9:6.0f} ns")
+
+
+def pipeline(shots: int, rounds: int, size: tuple[int, int]):
+    arena_logic._deliver = lambda *a, **k: {"devices": 1, "delivered": 1, "fallback": 0,
+                                            "prepared": 0, "deliver_ms": 0.0}
+    arena_logic._prepare_stop = lambda *a, **k: None
+    arena_logic.deferred_delete = lambda p: None
+    cfg = {"countdown_time": 36, "delay_offset": 2, "history_enabled": False}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for i in range(shots):
+            p = Path(tmp) / f"WoWScrnShot_{i:06d}.png"
+            event = ("arena_pop", "arena_stop", None)[i % 3]
+            render_tagged_image(size, event=event, seq=i % 64 if event else None).save(p)
+            files.append(p)
+
+        def run() -> float:
+            t0 = time.perf_counter()
+            now = time.time()
+            for p in files:
+                os.utime(p, (now, now))
+                (tag, code), = arena_logic.classify_screenshots([p], now=now)
+                arena_logic.process_screenshot_event(p, cfg, event=tag, code=code)
+            return (time.perf_counter() - t0) / len(files)
+
+        run()           # warm caches / detector
+        seq0 = flight.recorder.snapshot()[-1][0]
+        run()
+        per_shot = (flight.recorder.snapshot()[-1][0] - seq0) / len(files)
+        on, off = [], []
+        for _ in range(rounds):
+            flight.recorder.enabled = True
+            on.append(run())
+            flight.recorder.enabled = False
+            off.append(run())
+        flight.recorder.enabled = True
+
+    m_on, m_off = min(on), min(off)
+    print(f"  per screenshot (best of {rounds}): recorder on {m_on * 1e6:8.1f} µs, off {m_off * 1e6:8.1f} µs, "
+          f"spread {(statistics.pstdev(off) / m_off) * 100:.1f}%")
+    return per_shot, m_off
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--shots", type=int, default=200)
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--res", default="1920x1080")
+    args = ap.parse_args()
+
+    print("record() cost:")
+    micro()
+    print(f"pipeline ({args.shots} screenshots x {args.rounds} rounds, {args.res}):")
+    per_shot, shot_s = pipeline(args.shots, args.rounds, tuple(int(v) for v in args.res.split("x")))
+    rec = flight.FlightRecorder()
+    n = 200_000
+    cost = min(timeit.repeat(lambda: rec.record(flight.TAG, "WoWScrnShot_101925_201500.jpg", 1, 18000),
+                             number=n, repeat=5)) / n
+    print(f"  {per_shot:.1f} records per screenshot x {cost * 1e9:.0f} ns = {per_shot * cost * 1e6:.2f} µs "
+          f"= {per_shot * cost / shot_s * 100:.3f}% of the pipeline")
+
+
+if __name__ == "__main__":
+    main()
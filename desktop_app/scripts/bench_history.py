@@ -0,0 +1,66 @@
+# file: desktop_app/scripts/bench_history.py
+# Event history at scale: fills a throwaway history.db with months of
+# synthetic POP/STOP rows through the real batched writer, then times the
+# queries behind the Logs tab header (24 h / 7 days / all).
+#
+#   python scripts/bench_history.py [--months 6] [--pops-per-day 60]
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from infrastructure.history import HistoryStore, summary_string
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--months", type=float, default=6)
+    ap.add_argument("--pops-per-day", type=int, default=60)
+    args = ap.parse_args()
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(Path(tmp) / "history.db")
+        now = time.time()
+        t = now - args.months * 30 * 86400
+        rows = 0
+        t0 = time.perf_counter()
+        while t < now:
+            day_end = t + 86400
+            t += rng.uniform(16, 20) * 3600 % 86400          # evening session
+            for _ in range(rng.randint(args.pops_per_day // 2, args.pops_per_day)):
+                t += rng.uniform(60, 400)
+                store.record("arena_pop", ts=t, client="_retail_/Screenshots", source="shot.jpg",
+                             pickup_ms=rng.uniform(100, 900), detect_ms=rng.uniform(10, 40),
+                             deliver_ms=rng.uniform(60, 200), total_ms=rng.uniform(200, 1200),
+                             devices=2, delivered=2 if rng.random() > 0.01 else 1, fallback=0, prepared=0)
+                wait = rng.uniform(5, 30)
+                store.record("arena_stop", ts=t + wait, client="_retail_/Screenshots", source="shot.jpg",
+                             deliver_ms=rng.uniform(40, 150), total_ms=rng.uniform(150, 900),
+                             devices=2, delivered=2, fallback=0, prepared=1, pop_to_stop_s=wait)
+                t += wait + rng.uniform(120, 600)
+                rows += 2
+            t = max(t, day_end)
+        queued = time.perf_counter() - t0
+        store.flush(timeout=120)
+        written = time.perf_counter() - t0
+        size = (Path(tmp) / "history.db").stat().st_size + (Path(tmp) / "history.db-wal").stat().st_size
+
+        print(f"{rows} rows ({args.months:g} months): queued in {queued:.2f}s, on disk after {written:.2f}s, "
+              f"{size / 2 ** 20:.1f} MiB")
+        for name, since in (("24 h", now - 86400), ("7 days", now - 7 * 86400), ("all", None)):
+            times = []
+            for _ in range(5):
+                q0 = time.perf_counter()
+                s = store.summary(since)
+                times.append((time.perf_counter() - q0) * 1000)
+            print(f"  {name:<7} {min(times):7.2f} ms  {summary_string(s)}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
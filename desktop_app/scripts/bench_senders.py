@@ -0,0 +1,174 @@
+# file: desktop_app/scripts/bench_senders.py
+# End-to-end benchmark of every sender against the local Firebase emulator.
+#  • pop→ack: call start → the arena_events record reaches an SSE subscriber
+#    (what the phone sees), sequential sends
+#  • call latency and throughput with concurrent senders
+#  • failure injection: delivery rate with the per-device retry
+#
+#   python scripts/bench_senders.py [--n 200] [--latency-ms 20] [--jitter-ms 5] [--threads 8]
+import argparse
+import asyncio
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from firebase_emulator import FirebaseEmulator
+
+SECRET = "bench-secret"
+PID = "bench-pid-0"
+
+
+def _pct(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)] if values else 0.0
+
+
+def _fmt(name, values):
+    return (f"{name:<22} n={len(values):<4} p50={_pct(values, .5):6.1f}  p95={_pct(values, .95):6.1f}  "
+            f"p99={_pct(values, .99):6.1f}  max={max(values or [0]):6.1f} ms")
+
+
+class SseListener:
+    """Phone stand-in: follows arena_events/<pid>/current over SSE."""
+
+    def __init__(self, base_url: str, pid: str):
+        import requests
+        self.events: queue.Queue = queue.Queue()
+        self._resp = requests.get(
+            f"{base_url}/arena_events/{pid}/current.json",
+            headers={"Accept": "text/event-stream"}, stream=True, timeout=30,
+        )
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        try:
+            # chunk_size=1: hand over each event as soon as it arrives
+            for line in self._resp.iter_lines(chunk_size=1, decode_unicode=True):
+                if line and line.startswith("data: "):
+                    data = json.loads(line[6:])
+                    if isinstance(data, dict) and isinstance(data.get("data"), dict) and "type" in data["data"]:
+                        self.events.put((time.perf_counter(), data["data"]))
+        except Exception:
+            pass
+
+    def drain(self):
+        while not self.events.empty():
+            self.events.get_nowait()
+
+    def close(self):
+        self._resp.close()
+
+
+def _start_relay(upstream: str):
+    from services.push.relay_server import RelayServer
+    relay = RelayServer(upstream, secret=SECRET)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    port = []
+
+    def run():
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(relay.start("127.0.0.1", 0))
+        port.append(server.sockets[0].getsockname()[1])
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait(5)
+    return relay, f"http://127.0.0.1:{port[0]}"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200)
+    ap.add_argument("--latency-ms", type=float, default=20)
+    ap.add_argument("--jitter-ms", type=float, default=5)
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--fail-rate", type=float, default=0.2)
+    args = ap.parse_args()
+
+    emu = FirebaseEmulator(SECRET, args.latency_ms, args.jitter_ms).start()
+    os.environ.update(WOW_SECRET=SECRET, PUSH_ARENA_URL=f"{emu.url}/pushArena", RTDB_URL=emu.url)
+
+    # imported after the env points at the emulator
+    from services.firebase_notify import send_fcm_message, send_fcm_fanout
+    from services.push.arena_realtime import send_arena_event
+
+    relay, relay_url = _start_relay(f"{emu.url}/pushArena")
+    cfg = {"desktop_id": "bench"}
+    relay_cfg = dict(cfg, relay_url=relay_url)
+    fanout_pids = [PID] + [f"bench-pid-{i}" for i in range(1, 4)]
+
+    senders = {
+        "pushArena": lambda pid: send_fcm_message("arena_pop", 30, str(uuid.uuid4()), pairing_id=pid, cfg=cfg),
+        "pushArena via relay": lambda pid: send_fcm_message("arena_pop", 30, str(uuid.uuid4()), pairing_id=pid,
+                                                            cfg=relay_cfg),
+        "pushArena fan-out x4": lambda pid: all(send_fcm_fanout("arena_pop", 30, str(uuid.uuid4()),
+                                                                [pid] + fanout_pids[1:], cfg=cfg).values()),
+        "RTDB PUT": lambda pid: send_arena_event("arena_pop", 30, pid, str(uuid.uuid4()), cfg) is not None,
+    }
+
+    print(f"emulator latency={args.latency_ms}±{args.jitter_ms} ms, n={args.n}, threads={args.threads}\n")
+
+    # ---- pop → ack (sequential) -------------------------------------------
+    listener = SseListener(emu.url, PID)
+    time.sleep(0.2)
+    print("pop→ack (call → SSE subscriber):")
+    for name, send in senders.items():
+        send(PID)  # warm-up (connection pools, DNS)
+        time.sleep(0.05)
+        lat = []
+        for _ in range(args.n):
+            listener.drain()
+            t0 = time.perf_counter()
+            send(PID)
+            try:
+                t_ack, _ = listener.events.get(timeout=5)
+                lat.append((t_ack - t0) * 1000)
+            except queue.Empty:
+                pass
+        print("  " + _fmt(name, lat))
+    listener.close()
+
+    # ---- throughput (concurrent) ------------------------------------------
+    print(f"\nthroughput ({args.threads} threads, distinct pairing ids):")
+    for name, send in senders.items():
+        call_lat = []
+        lock = threading.Lock()
+
+        def one(i):
+            t0 = time.perf_counter()
+            ok = send(f"tp-{i}")
+            with lock:
+                call_lat.append((time.perf_counter() - t0) * 1000)
+            return ok
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(args.threads) as pool:
+            ok = sum(pool.map(one, range(args.n)))
+        wall = time.perf_counter() - t0
+        print(f"  {name:<22} {args.n / wall:7.1f} ev/s  ok={ok}/{args.n}  "
+              f"call p50={_pct(call_lat, .5):.1f} p95={_pct(call_lat, .95):.1f} ms")
+
+    # ---- failure injection -------------------------------------------------
+    emu.fail_rate = args.fail_rate
+    delivered = sum(senders["pushArena"](f"fail-{i}") for i in range(args.n))
+    emu.fail_rate = 0
+    print(f"\nfailure injection {args.fail_rate:.0%}: delivered {delivered}/{args.n} "
+          f"(expected ≈{1 - args.fail_rate ** 2:.0%} with one retry per device)")
+    print(f"emulator stats: {emu.stats}")
+
+    relay.close()
+    emu.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# file: desktop_app/scripts/bench_tag_detector.py
+# Border classifier benchmark: progressive vs legacy full pass (decoded images,
+# so only sampling cost is measured). Prints µs and pixels touched per decision.
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.tag_detector import render_tagged_image, _scan_border, _scan_border_full
+
+RESOLUTIONS = {"1080p": (1920, 1080), "1440p": (2560, 1440), "4K": (3840, 2160)}
+CASES = {
+    "untagged": dict(event=None),
+    "pop": dict(event="arena_pop"),
+    "stop": dict(event="arena_stop"),
+    "coded": dict(event="arena_pop", seq=42, meta=3),
+}
+ROUNDS = 200
+
+
+def bench(fn, img) -> tuple[float, int, str | None]:
+    event, _, touched = fn(img)
+    t0 = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn(img)
+    return (time.perf_counter() - t0) / ROUNDS * 1e6, touched, event
+
+
+if __name__ == "__main__":
+    print(f"{'res':<6} {'case':<9} {'legacy µs':>10} {'px':>6} {'progr. µs':>10} {'px':>6}  result")
+    for res, size in RESOLUTIONS.items():
+        for case, kw in CASES.items():
+            img = render_tagged_image(size, **kw)
+            full_us, full_px, full_ev = bench(_scan_border_full, img)
+            prog_us, prog_px, prog_ev = bench(_scan_border, img)
+            assert full_ev == prog_ev, (res, case, full_ev, prog_ev)
+            print(f"{res:<6} {case:<9} {full_us:>10.1f} {full_px:>6} {prog_us:>10.1f} {prog_px:>6}  {prog_ev}")
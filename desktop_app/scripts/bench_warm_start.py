@@ -0,0 +1,72 @@
+# file: desktop_app/scripts/bench_warm_start.py
+# First-event vs steady-state detect latency, cold vs warmed-up detector.
+# Each run is a fresh interpreter (spawn), so the first detect pays exactly
+# what the first arena pop of a session pays.
+#
+#   python scripts/bench_warm_start.py [--res 1080p,4K] [--runs 5] [--steady 10]
+import argparse
+import multiprocessing as mp
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from make_screenshot_corpus import EXTENSIONS, generate_corpus
+
+
+def _run(args) -> dict:
+    """Fresh process: optional warm-up, then first detect + steady-state detects."""
+    path, warm, steady = args
+    t0 = time.perf_counter()
+    from services import tag_detector
+    import_ms = (time.perf_counter() - t0) * 1000
+
+    warm_ms = tag_detector.warm_up() if warm else 0.0
+
+    t0 = time.perf_counter()
+    event, _ = tag_detector.detect_tag_ex(path)
+    first = (time.perf_counter() - t0) * 1000
+    rest = []
+    for _ in range(steady):
+        t0 = time.perf_counter()
+        tag_detector.detect_tag_ex(path)
+        rest.append((time.perf_counter() - t0) * 1000)
+    return {"import_ms": import_ms, "warm_ms": warm_ms, "first": first,
+            "steady": statistics.median(rest), "event": event}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--res", default="1080p,4K")
+    ap.add_argument("--runs", type=int, default=5, help="fresh processes per cell")
+    ap.add_argument("--steady", type=int, default=10)
+    args = ap.parse_args()
+
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = Path(tmp)
+        generate_corpus(corpus, args.res.split(","), cases=["coded_pop"])
+
+        print(f"{'res':<6} {'ext':<5} {'mode':<5} {'first ms':>9} {'steady ms':>10} {'first/steady':>13} {'warm-up ms':>11}")
+        for res in args.res.split(","):
+            for ext in EXTENSIONS:
+                path = str(corpus / f"{res}_coded_pop{ext}")
+                for warm in (False, True):
+                    runs = []
+                    for _ in range(args.runs):
+                        with ctx.Pool(1) as pool:
+                            runs.append(pool.apply(_run, ((path, warm, args.steady),)))
+                    first = statistics.median(r["first"] for r in runs)
+                    steady = statistics.median(r["steady"] for r in runs)
+                    warm_ms = statistics.median(r["warm_ms"] for r in runs)
+                    bad = sum(r["event"] != "arena_pop" for r in runs)
+                    print(f"{res:<6} {ext:<5} {'warm' if warm else 'cold':<5} {first:>9.1f} {steady:>10.1f} "
+                          f"{first / steady:>12.2f}x {warm_ms if warm else 0:>11.1f}"
+                          + (f"  ({bad} misread)" if bad else ""))
+
+
+if __name__ == "__main__":
+    main()
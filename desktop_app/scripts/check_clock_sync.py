@@ -0,0 +1,129 @@
+# file: desktop_app/scripts/check_clock_sync.py
+# Proves the clock estimator's error bound under simulated latency:
+#  • emulator: true offset known, all latency on the uplink (worst case for a
+#    midpoint estimate), jitter on top → |estimate - truth| must stay ≤ bound,
+#    for the default read-only sampler (pushArena /ping) and the ".sv" probe
+#  • simulated clock: server running ±ppm fast, syncs every 300 s on a virtual
+#    clock → drift is measured and the extrapolated bound still holds
+#  • baseline: one sample, no RTT compensation (what a single fetch gives)
+#
+#   python scripts/check_clock_sync.py [--offset-ms 1234] [--latency-ms 40] [--jitter-ms 30] [--rounds 50]
+import argparse
+import os
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from firebase_emulator import FirebaseEmulator
+
+
+def check_emulator(args) -> bool:
+    emu = FirebaseEmulator(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, offset_ms=args.offset_ms).start()
+    os.environ["RTDB_URL"] = emu.url
+    from services import time_sync
+
+    print(f"emulator: offset={args.offset_ms} ms, uplink {args.latency_ms}±{args.jitter_ms} ms, {args.rounds} syncs")
+    ok = True
+    for name, sampler in (
+        ("pushArena /ping (default)", time_sync._ping_sampler(f"{emu.url}/pushArena")),
+        ('RTDB ".sv" probe', time_sync._rtdb_sampler(emu.url, "clock-check")),
+    ):
+        estimator = time_sync.ClockEstimator(sampler)
+        worst_ratio, errors, naive = 0.0, [], []
+        for _ in range(args.rounds):
+            est = estimator.sync()
+            err = abs(est.offset_ms - args.offset_ms)
+            errors.append(err)
+            worst_ratio = max(worst_ratio, err / est.uncertainty_ms)
+            if err > est.uncertainty_ms:
+                ok = False
+                print(f"  ✗ bound violated: err={err:.1f} > ±{est.uncertainty_ms:.1f} ({est.summary_string()})")
+            server, sent, _, rtt, _ = sampler()
+            naive.append(abs(server - sent - args.offset_ms))     # single sample, offset = server - send time
+
+        errors.sort()
+        naive.sort()
+        print(f"  {name}: estimator err p50={errors[len(errors) // 2]:.1f}  max={errors[-1]:.1f} ms  "
+              f"(max err/bound = {worst_ratio:.2f}); one sample err p50={naive[len(naive) // 2]:.1f}  "
+              f"max={naive[-1]:.1f} ms")
+    emu.stop()
+    return ok
+
+
+class SimClock:
+    """Virtual local clock + a server clock running `ppm` fast with a fixed offset."""
+
+    def __init__(self, offset_ms: float, ppm: float):
+        self.mono = 1000.0
+        self.wall0 = 1.7e9
+        self.offset_ms = offset_ms
+        self.ppm = ppm
+
+    def monotonic(self) -> float:
+        return self.mono
+
+    def time(self) -> float:
+        return self.wall0 + self.mono
+
+    def server_ms(self) -> float:
+        return self.time() * 1000 + self.offset_ms + self.mono * 1000 * self.ppm * 1e-6
+
+
+def check_drift(args) -> bool:
+    from services import time_sync
+
+    ok = True
+    for ppm in (-80.0, 0.0, 45.0):
+        clock = SimClock(args.offset_ms, ppm)
+        rng = random.Random(int(ppm))
+
+        def sampler():
+            sent, mono = clock.time() * 1000, clock.monotonic()
+            up = rng.uniform(5, 5 + args.latency_ms + args.jitter_ms)
+            down = rng.uniform(5, 15)
+            clock.mono += up / 1000
+            server = clock.server_ms()
+            clock.mono += down / 1000
+            return int(server), sent, mono, up + down, "sim"
+
+        real_time = time_sync.time
+        time_sync.time = clock
+        try:
+            estimator = time_sync.ClockEstimator(sampler)
+            worst = 0.0
+            for _ in range(12):                       # one hour of syncs
+                est = estimator.sync()
+                synced = clock.mono
+                for dt in (0, 60, 150, 299):            # extrapolate until the next sync
+                    clock.mono = synced + dt
+                    err = abs(est.server_time_ms() - clock.server_ms())
+                    bound = est.error_bound_ms()
+                    worst = max(worst, err / bound)
+                    if err > bound:
+                        ok = False
+                        print(f"  ✗ ppm={ppm}: err={err:.1f} > ±{bound:.1f} at +{dt}s")
+                clock.mono += 1
+        finally:
+            time_sync.time = real_time
+        print(f"drift {ppm:+.0f} ppm: measured {est.drift_ppm:+.1f} ppm, max err/bound = {worst:.2f}")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--offset-ms", type=int, default=1234)
+    ap.add_argument("--latency-ms", type=float, default=40)
+    ap.add_argument("--jitter-ms", type=float, default=30)
+    ap.add_argument("--rounds", type=int, default=50)
+    args = ap.parse_args()
+
+    ok = check_emulator(args)
+    ok = check_drift(args) and ok
+    print("✅ error bound holds" if ok else "❌ error bound violated")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
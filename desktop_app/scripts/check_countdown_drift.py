@@ -0,0 +1,64 @@
+# file: desktop_app/scripts/check_countdown_drift.py
+# Injects timer jitter and GUI stalls into a simulated countdown and compares
+# the final error of the old 1 s decrement vs the deadline-anchored clock.
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from controllers.countdown_controller import CountdownClock
+
+SECONDS = 33
+RUNS = 500
+JITTER_MS = 15          # normal QTimer lateness
+STALL_P = 0.15          # chance a wakeup lands behind a blocking call
+STALL_MS = (100, 900)   # e.g. a synchronous HTTPS request on the GUI thread
+
+
+def _delay(rng: random.Random) -> float:
+    late = rng.uniform(0, JITTER_MS)
+    if rng.random() < STALL_P:
+        late += rng.uniform(*STALL_MS)
+    return late / 1000
+
+
+def legacy_error(rng: random.Random) -> float:
+    """remaining -= 1 per timeout: every late timeout adds up."""
+    now, remaining = 0.0, SECONDS
+    while remaining > 0:
+        now += 1.0 + _delay(rng)
+        remaining -= 1
+    return now - SECONDS
+
+
+def deadline_error(rng: random.Random, visible: bool) -> tuple[float, float]:
+    """Returns (final error, lateness of the final wakeup) — earlier stalls must not count."""
+    t = [0.0]
+    clock = CountdownClock.start_in(SECONDS, clock=lambda: t[0])
+    late = 0.0
+    while clock.remaining_whole() > 0:
+        late = _delay(rng)
+        t[0] += clock.next_wakeup_ms(visible) / 1000 + late
+        # what the UI shows always matches the true remaining time
+        assert clock.remaining_whole() == max(0, -int(-(SECONDS - t[0]) // 1))
+    return t[0] - SECONDS, late
+
+
+if __name__ == "__main__":
+    rng = random.Random(1234)
+    legacy = [legacy_error(rng) for _ in range(RUNS)]
+    print(f"legacy   final error: mean={sum(legacy) / RUNS * 1000:8.1f} ms  max={max(legacy) * 1000:8.1f} ms")
+
+    for visible in (True, False):
+        errs, drift = [], []
+        for _ in range(RUNS):
+            err, last_late = deadline_error(rng, visible)
+            # only the very last wakeup's own lateness remains, nothing accumulates
+            assert 0 <= err <= last_late + 0.006, (err, last_late)
+            errs.append(err)
+            drift.append(max(err - last_late, 0.0))
+        mode = "visible" if visible else "hidden "
+        print(f"deadline ({mode}) final error: mean={sum(errs) / RUNS * 1000:6.1f} ms  max={max(errs) * 1000:6.1f} ms"
+              f"  accumulated drift max={max(drift) * 1000:4.1f} ms")
+    print("OK")
@@ -0,0 +1,133 @@
+# file: desktop_app/scripts/check_detector_memory.py
+# Allocation profile of the detector over many detections:
+#  • tracemalloc: Python-side allocations after warm-up must stay flat
+#    (growth below --max-growth-kib) and the per-detection peak bounded
+#  • RSS (VmRSS, Linux) must not creep either — Pillow's pixel memory is C
+#    malloc and invisible to tracemalloc
+#  • open file descriptors before/after: every handle released
+#  • the shared decode budget must be back to zero
+#
+#   python scripts/check_detector_memory.py [--n 10000] [--size 320x180] [--max-growth-kib 64]
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from make_screenshot_corpus import EXTENSIONS, save
+from services import tag_detector
+from services.tag_detector import detect_tag_ex, render_tagged_image
+
+CASES = {"pop": dict(event="arena_pop"), "coded": dict(event="arena_pop", seq=9), "stop": dict(event="arena_stop"),
+         "none": dict(event=None)}
+
+
+def _rss_kib() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _open_fds() -> int:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return -1
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=10_000)
+    ap.add_argument("--size", default="320x180")
+    ap.add_argument("--warmup", type=int, default=500)
+    ap.add_argument("--max-growth-kib", type=float, default=64)
+    ap.add_argument("--max-peak-kib", type=float, help="default: two RGBX frames (file buffer + slack)")
+    ap.add_argument("--max-rss-growth-mib", type=float, default=8)
+    args = ap.parse_args()
+    size = tuple(int(v) for v in args.size.split("x"))
+    max_peak_kib = args.max_peak_kib or 2 * size[0] * size[1] * 4 / 1024
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for name, kw in CASES.items():
+            img = render_tagged_image(size, **kw)
+            for ext in EXTENSIONS:
+                path = Path(tmp) / f"{name}{ext}"
+                save(img, path)
+                files.append(str(path))
+
+        for i in range(args.warmup):
+            detect_tag_ex(files[i % len(files)])
+        gc.collect()
+
+        fds0, rss0 = _open_fds(), _rss_kib()
+        tracemalloc.start()
+        snap0 = tracemalloc.take_snapshot()
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        t0 = time.perf_counter()
+        for i in range(args.n):
+            detect_tag_ex(files[i % len(files)])
+        wall = time.perf_counter() - t0
+
+        gc.collect()
+        cur, peak = tracemalloc.get_traced_memory()
+        snap1 = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        fds1, rss1 = _open_fds(), _rss_kib()
+
+        # the files must be deletable right away (no handle kept by the detector)
+        undeletable = []
+        for f in files:
+            try:
+                os.remove(f)
+            except OSError:
+                undeletable.append(f)
+
+    growth = (cur - base) / 1024
+    peak_kib = (peak - base) / 1024
+    rss_growth = (rss1 - rss0) / 1024
+    print(f"{args.n} detections of {len(files)} files ({args.size}) in {wall:.1f}s "
+          f"({wall / args.n * 1000:.2f} ms each)")
+    print(f"tracemalloc: growth {growth:+.1f} KiB, peak over baseline {peak_kib:.1f} KiB")
+    print(f"RSS: {rss0 / 1024:.1f} → {rss1 / 1024:.1f} MiB ({rss_growth:+.1f}), "
+          f"fds {fds0} → {fds1}, budget in use {tag_detector._budget.used} B "
+          f"(peak {tag_detector._budget.peak / 2 ** 20:.1f} MiB)")
+    for stat in snap1.compare_to(snap0, "lineno")[:5]:
+        if stat.size_diff:
+            print(f"  {stat}")
+
+    failures = []
+    if growth > args.max_growth_kib:
+        failures.append(f"allocation growth {growth:.1f} KiB > {args.max_growth_kib}")
+    if peak_kib > max_peak_kib:
+        failures.append(f"per-detection peak {peak_kib:.1f} KiB > {max_peak_kib:.0f}")
+    if rss0 and rss_growth > args.max_rss_growth_mib:
+        failures.append(f"RSS growth {rss_growth:.1f} MiB > {args.max_rss_growth_mib}")
+    if fds0 >= 0 and fds1 > fds0:
+        failures.append(f"{fds1 - fds0} file descriptors leaked")
+    if tag_detector._budget.used:
+        failures.append(f"budget not released ({tag_detector._budget.used} B)")
+    if undeletable:
+        failures.append(f"files still locked: {undeletable}")
+
+    for f in failures:
+        print(f"❌ {f}")
+    if not failures:
+        print("✅ flat allocation profile")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
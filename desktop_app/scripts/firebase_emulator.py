@@ -0,0 +1,307 @@
+# file: desktop_app/scripts/firebase_emulator.py
+# Local stand-in for the cloud side, so the senders can be exercised offline:
+#  • POST /pushArena             → HMAC check, then write /arena_events/<pid>/current
+#                                  (same record as functions/index.mjs)
+#  • RTDB REST  GET/PUT/PATCH/DELETE <path>.json
+#      arena_events/<pid>/current.json, devices/<pid>.json, broadcast.json, ...
+#  • GET .info/serverTimeOffset.json, {".sv": "timestamp"} server values on writes
+#  • SSE streaming (Accept: text/event-stream), Firebase "put"/"keep-alive" events
+#  • latency / jitter / failure injection for every request
+#
+#   python scripts/firebase_emulator.py [--port 9199] [--latency-ms 0] [--jitter-ms 0] [--fail-rate 0]
+#   PUSH_ARENA_URL=http://127.0.0.1:9199/pushArena RTDB_URL=http://127.0.0.1:9199 WOW_SECRET=... python main.py
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import queue
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 9199
+KEEPALIVE_S = 15
+ENDS_AT_TOLERANCE_MS = 10_000         # same as functions/index.mjs
+DEFAULT_SECRET = "local-dev-secret"   # same fallback as functions/index.mjs
+
+
+def _split(path: str) -> list[str]:
+    path = path.split("?", 1)[0]
+    if path.endswith(".json"):
+        path = path[:-5]
+    return [p for p in path.split("/") if p]
+
+
+class RtdbStore:
+    """Nested-dict RTDB with path subscriptions (for SSE)."""
+
+    def __init__(self):
+        self.root: dict = {}
+        self._lock = threading.Lock()
+        self._subs: list[tuple[list[str], queue.Queue]] = []
+
+    def get(self, parts: list[str]):
+        with self._lock:
+            return self._get(parts)
+
+    def _get(self, parts):
+        node = self.root
+        for p in parts:
+            if not isinstance(node, dict) or p not in node:
+                return None
+            node = node[p]
+        return node
+
+    def put(self, parts: list[str], value):
+        with self._lock:
+            if not parts:
+                self.root = value if isinstance(value, dict) else {}
+            else:
+                node = self.root
+                for p in parts[:-1]:
+                    nxt = node.get(p)
+                    if not isinstance(nxt, dict):
+                        nxt = node[p] = {}
+                    node = nxt
+                if value is None:
+                    node.pop(parts[-1], None)
+                else:
+                    node[parts[-1]] = value
+            self._notify(parts, value)
+
+    def patch(self, parts: list[str], value: dict):
+        for k, v in (value or {}).items():
+            self.put(parts + _split(k), v)
+
+    def subscribe(self, parts: list[str]) -> queue.Queue:
+        q = queue.Queue()
+        with self._lock:
+            self._subs.append((parts, q))
+        return q
+
+    def unsubscribe(self, q: queue.Queue):
+        with self._lock:
+            self._subs = [(p, s) for p, s in self._subs if s is not q]
+
+    def _notify(self, parts, value):
+        for sub_parts, q in self._subs:
+            n = len(sub_parts)
+            if parts[:n] == sub_parts:                      # write at/below the subscription
+                q.put({"path": "/" + "/".join(parts[n:]), "data": value})
+            elif sub_parts[:len(parts)] == parts:           # write above it → resend the subtree
+                q.put({"path": "/", "data": self._get(sub_parts)})
+
+
+class FirebaseEmulator:
+    def __init__(self, secret: str = DEFAULT_SECRET, latency_ms: float = 0, jitter_ms: float = 0,
+                 fail_rate: float = 0.0, offset_ms: int = 0):
+        self.secret = secret
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self.offset_ms = offset_ms
+        self.store = RtdbStore()
+        self.stats = {"push": 0, "push_bad_sig": 0, "rtdb": 0, "ping": 0, "streams": 0, "injected_failures": 0}
+        self._stats_lock = threading.Lock()
+        self._httpd: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> "FirebaseEmulator":
+        handler = type("Handler", (_Handler,), {"emu": self})
+        self._httpd = ThreadingHTTPServer((host, port), handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True, name="firebase-emu").start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def delay_or_fail(self) -> bool:
+        """Apply injected latency; True → answer with an injected 503."""
+        delay = self.latency_ms + (random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if self.fail_rate and random.random() < self.fail_rate:
+            self.count("injected_failures")
+            return True
+        return False
+
+    def server_time_ms(self) -> int:
+        return int(time.time() * 1000) + self.offset_ms
+
+    def resolve_server_values(self, value):
+        if isinstance(value, dict):
+            if value == {".sv": "timestamp"}:
+                return self.server_time_ms()
+            return {k: self.resolve_server_values(v) for k, v in value.items()}
+        return value
+
+    def push_arena(self, body: bytes, signature: str) -> tuple[int, dict]:
+        expected = hmac.new(self.secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, signature or ""):
+            self.count("push_bad_sig")
+            return 401, {"ok": False, "error": "Invalid signature"}
+        try:
+            obj = json.loads(body)
+        except ValueError:
+            return 400, {"ok": False, "error": "Invalid JSON"}
+
+        pid, event = obj.get("pairing_id"), obj.get("event")
+        if not pid or not event:
+            return 400, {"ok": False, "error": "Missing parameters in request"}
+
+        now_ms = self.server_time_ms()
+        from_duration = now_ms + int(obj.get("duration") or 0) * 1000
+        try:
+            ends_at = int(obj.get("endsAt"))
+        except (TypeError, ValueError):
+            ends_at = None
+        # same rule as pushArena: the desktop's endsAt unless missing / implausible
+        if ends_at is None or abs(ends_at - from_duration) >= ENDS_AT_TOLERANCE_MS:
+            ends_at = from_duration
+        self.store.put(["arena_events", pid, "current"], {
+            "type": event,
+            "endsAt": ends_at,
+            "duration": obj.get("duration"),
+            "desktopOffset": obj.get("desktopOffset", "0"),
+            "server_ts": now_ms,
+        })
+        self.count("push")
+        return 200, {"ok": True}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    emu: FirebaseEmulator = None
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status: int, data):
+        raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _handle(self, method: str):
+        body = self._body() if method in ("POST", "PUT", "PATCH") else b""
+        if self.emu.delay_or_fail():
+            return self._send(503, {"error": "injected failure"})
+
+        parts = _split(self.path)
+        if method == "POST" and (not parts or parts[-1] == "pushArena"):
+            return self._send(*self.emu.push_arena(body, self.headers.get("X-Signature", "")))
+
+        if method == "GET" and parts[-2:] == ["pushArena", "ping"]:
+            self.emu.count("ping")
+            return self._send(200, {"ok": True, "ts": self.emu.server_time_ms()})
+
+        if parts == [".info", "serverTimeOffset"]:
+            return self._send(200, self.emu.offset_ms)
+
+        self.emu.count("rtdb")
+        if method == "GET":
+            if "text/event-stream" in (self.headers.get("Accept") or ""):
+                return self._stream(parts)
+            return self._send(200, self.emu.store.get(parts))
+        try:
+            value = json.loads(body) if body else None
+        except ValueError:
+            return self._send(400, {"error": "Invalid data; couldn't parse JSON object."})
+        value = self.emu.resolve_server_values(value)
+        if method == "PUT":
+            self.emu.store.put(parts, value)
+            return self._send(200, value)
+        if method == "PATCH":
+            self.emu.store.patch(parts, value)
+            return self._send(200, value)
+        if method == "DELETE":
+            self.emu.store.put(parts, None)
+            return self._send(200, None)
+        return self._send(405, {"error": "method not allowed"})
+
+    def _stream(self, parts):
+        self.emu.count("streams")
+        q = self.emu.store.subscribe(parts)
+        self.close_connection = True
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self._event("put", {"path": "/", "data": self.emu.store.get(parts)})
+            while True:
+                try:
+                    item = q.get(timeout=KEEPALIVE_S)
+                except queue.Empty:
+                    self._event("keep-alive", None)
+                    continue
+                self._event("put", item)
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            self.emu.store.unsubscribe(q)
+
+    def _event(self, name: str, data):
+        self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local pushArena + RTDB emulator")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--secret", default=os.getenv("WOW_SECRET") or DEFAULT_SECRET)
+    ap.add_argument("--latency-ms", type=float, default=0)
+    ap.add_argument("--jitter-ms", type=float, default=0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--offset-ms", type=int, default=0, help="server clock - local clock (/ping ts, .sv timestamps, .info/serverTimeOffset)")
+    args = ap.parse_args()
+
+    emu = FirebaseEmulator(args.secret, args.latency_ms, args.jitter_ms, args.fail_rate, args.offset_ms)
+    emu.start(args.host, args.port)
+    print(f"Firebase emulator on {emu.url}")
+    print(f"  PUSH_ARENA_URL={emu.url}/pushArena  RTDB_URL={emu.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(json.dumps(emu.stats))
+        emu.stop()
+
+
+if __name__ == "__main__":
+    main()
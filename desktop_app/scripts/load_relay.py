@@ -0,0 +1,267 @@
+# file: desktop_app/scripts/load_relay.py
+# Load generator for the LAN relay: hundreds of simulated desktops, each on
+# one keep-alive connection, against a local stand-in pushArena upstream.
+# Like real desktops, every client has its own pairing id and a fresh eventId
+# per event; --retry-pct of the events are sent twice (the desktop's retry
+# after a lost response), which is the only traffic the relay can coalesce.
+#
+# The upstream speaks HTTPS (throwaway self-signed cert from the openssl CLI)
+# behind a proxy that adds --rtt-ms of network round trip, so the baselines
+# are what a desktop without the relay really pays: "cold direct" opens a new
+# TCP + TLS connection per event, "warm direct" reuses one.
+#
+#   python scripts/load_relay.py [--clients 300] [--events 5] [--retry-pct 5] [--upstream-ms 80]
+#                                [--rtt-ms 40] [--connections 256]
+import argparse
+import asyncio
+import random
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.firebase_notify import build_payload, sign_payload, verify_signature
+from services.push.relay_server import RelayServer, UPSTREAM_CONNECTIONS
+
+SECRET = "load-test-secret"
+
+
+class StandInUpstream:
+    """pushArena stand-in: checks the HMAC, waits `delay_s`, answers 200 (GET …/ping at once)."""
+
+    def __init__(self, delay_s: float):
+        self.delay_s = delay_s
+        self.hits = 0
+        self.pings = 0
+        self.bad = 0
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b""):
+                        break
+                    k, _, v = h.decode().partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+                if line.startswith(b"GET"):
+                    self.pings += 1
+                else:
+                    self.hits += 1
+                    if not verify_signature(SECRET, body, headers.get("x-signature", "")):
+                        self.bad += 1
+                    await asyncio.sleep(self.delay_s)
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+class LatencyProxy:
+    """TCP proxy adding a network round trip: one RTT to connect, RTT/2 each way per chunk."""
+
+    def __init__(self, target_port: int, rtt_s: float):
+        self.target_port = target_port
+        self.rtt_s = rtt_s
+
+    async def handle(self, c_reader, c_writer):
+        try:
+            await asyncio.sleep(self.rtt_s)                 # TCP handshake
+            u_reader, u_writer = await asyncio.open_connection("127.0.0.1", self.target_port)
+            await asyncio.gather(self._pipe(c_reader, u_writer), self._pipe(u_reader, c_writer))
+        except (OSError, asyncio.CancelledError):
+            c_writer.close()
+
+    async def _pipe(self, reader, writer):
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def deliver():
+            while True:
+                due, data = await queue.get()
+                await asyncio.sleep(max(due - time.monotonic(), 0))
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+
+        sender = asyncio.ensure_future(deliver())
+        try:
+            while True:
+                data = await reader.read(65536)
+                queue.put_nowait((time.monotonic() + self.rtt_s / 2, data))
+                if not data:
+                    break
+            await sender
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            sender.cancel()
+            writer.close()
+
+
+def _tls_contexts(folder: Path) -> tuple[ssl.SSLContext, ssl.SSLContext]:
+    """Throwaway self-signed cert for 127.0.0.1 → (server context, client context trusting it)."""
+    cert, key = folder / "cert.pem", folder / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1",
+         "-nodes", "-days", "1", "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+         "-keyout", str(key), "-out", str(cert)],
+        check=True, capture_output=True,
+    )
+    server = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server.load_cert_chain(cert, key)
+    client = ssl.create_default_context(cafile=str(cert))
+    return server, client
+
+
+async def _request(reader, writer, body: bytes, signature: str, client_id: str) -> int:
+    writer.write(
+        (f"POST /pushArena HTTP/1.1\r\nHost: relay\r\nContent-Type: application/json\r\n"
+         f"X-Signature: {signature}\r\nX-Client-Id: {client_id}\r\n"
+         f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b""):
+            break
+        if h.lower().startswith(b"content-length:"):
+            length = int(h.split(b":")[1])
+    await reader.readexactly(length)
+    return status
+
+
+def _event(pairing_id: str) -> tuple[bytes, str]:
+    now_ms = int(time.time() * 1000)
+    payload = build_payload("arena_pop", pairing_id, str(uuid.uuid4()),
+                            now_ms, now_ms + 30_000, 30, 0)
+    msg, sig = sign_payload(SECRET, payload)
+    return msg.encode("utf-8"), sig
+
+
+async def _client(idx, port, events, retry_p, latencies, failures, retries, gap_s):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    rng = random.Random(idx)
+    try:
+        for k in range(events):
+            body, sig = _event(f"pair-{idx}")
+            sends = 2 if rng.random() < retry_p else 1
+            retries.append(sends - 1)
+            for _ in range(sends):
+                t0 = time.perf_counter()
+                status = await _request(reader, writer, body, sig, f"desk-{idx}")
+                latencies.append((k, (time.perf_counter() - t0) * 1000))
+                if status != 200:
+                    failures.append(status)
+            await asyncio.sleep(gap_s)
+    finally:
+        writer.close()
+
+
+async def _direct(port, n: int, client_ssl: ssl.SSLContext, warm: bool) -> list[float]:
+    """Baseline without the relay: HTTPS straight to the upstream, new connection per event unless warm."""
+    out = []
+    conn = None
+    for _ in range(n):
+        body, sig = _event("pair-direct")
+        t0 = time.perf_counter()
+        if conn is None:
+            conn = await asyncio.open_connection("127.0.0.1", port, ssl=client_ssl)
+        await _request(*conn, body, sig, "direct")
+        out.append((time.perf_counter() - t0) * 1000)
+        if not warm:
+            conn[1].close()
+            conn = None
+    if conn:
+        conn[1].close()
+    return out[1:] if warm else out     # the first warm one paid the handshake
+
+
+def _pct(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+async def run(args):
+    tmp = tempfile.TemporaryDirectory(prefix="load-relay-")
+    server_ssl, client_ssl = _tls_contexts(Path(tmp.name))
+
+    upstream = StandInUpstream(args.upstream_ms / 1000)
+    up_server = await asyncio.start_server(upstream.handle, "127.0.0.1", 0, ssl=server_ssl)
+    proxy = LatencyProxy(up_server.sockets[0].getsockname()[1], args.rtt_ms / 1000)
+    proxy_server = await asyncio.start_server(proxy.handle, "127.0.0.1", 0)
+    up_port = proxy_server.sockets[0].getsockname()[1]
+
+    relay = RelayServer(f"https://127.0.0.1:{up_port}/pushArena", secret=SECRET,
+                        connections=args.connections, ssl_context=client_ssl)
+    relay_server = await relay.start("127.0.0.1", 0)
+    relay_port = relay_server.sockets[0].getsockname()[1]
+    await asyncio.sleep(4 * args.rtt_ms / 1000 + 0.2)      # let the relay open its warm connections
+
+    latencies, failures, retries = [], [], []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        _client(i, relay_port, args.events, args.retry_pct / 100, latencies, failures, retries,
+                args.gap_ms / 1000)
+        for i in range(args.clients)
+    ))
+    wall = time.perf_counter() - t0
+
+    cold = await _direct(up_port, 30, client_ssl, warm=False)
+    warm = await _direct(up_port, 31, client_ssl, warm=True)
+
+    sent = len(latencies)
+    snap = relay.snapshot()
+    conns = snap["upstream_connections"]
+    print(f"clients={args.clients} events/client={args.events} retry={args.retry_pct:g}% "
+          f"upstream={args.upstream_ms:g}ms rtt={args.rtt_ms:g}ms (TLS) connections<={args.connections}")
+    print(f"sent={sent} failed={len(failures)} wall={wall:.2f}s throughput={sent / wall:.0f} ev/s")
+    every = [ms for _, ms in latencies]
+    later = [ms for k, ms in latencies if k > 0]
+    print(f"relay latency ms: p50={_pct(every, .5):.1f} p95={_pct(every, .95):.1f} "
+          f"p99={_pct(every, .99):.1f} max={max(every):.1f}")
+    if later:
+        print(f"  after the first burst (pool filled): p50={_pct(later, .5):.1f} p95={_pct(later, .95):.1f} "
+              f"p99={_pct(later, .99):.1f}")
+    print(f"cold direct ms (new TCP+TLS per event): p50={statistics.median(cold):.1f} p95={_pct(cold, .95):.1f}")
+    print(f"warm direct ms (reused connection):    p50={statistics.median(warm):.1f} p95={_pct(warm, .95):.1f}")
+    print(f"upstream hits={upstream.hits}, coalesced={snap['coalesced']} of {sum(retries)} retries, "
+          f"bad signatures={upstream.bad}")
+    print(f"upstream connections opened={conns['opened']} peak in flight={conns['peak_in_flight']}, "
+          f"tracked clients={len(snap['clients'])}")
+
+    relay.close()
+    proxy_server.close()
+    up_server.close()
+    tmp.cleanup()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=300)
+    ap.add_argument("--events", type=int, default=5)
+    ap.add_argument("--retry-pct", type=float, default=5, help="events the desktop sends twice")
+    ap.add_argument("--upstream-ms", type=float, default=80)
+    ap.add_argument("--rtt-ms", type=float, default=40, help="network round trip to the upstream")
+    ap.add_argument("--gap-ms", type=float, default=20)
+    ap.add_argument("--connections", type=int, default=UPSTREAM_CONNECTIONS, help="upstream POSTs in flight")
+    asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
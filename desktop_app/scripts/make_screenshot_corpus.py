@@ -0,0 +1,114 @@
+# file: desktop_app/scripts/make_screenshot_corpus.py
+# Reproducible synthetic screenshot corpus for the detector benchmarks.
+# Every resolution × extension × case, plus manifest.json with the expected tag.
+# Cases cover solid rims, the coded top edge, 1 px rims and near-miss colours
+# that must NOT be detected (orange-ish red, olive green, ...).
+#
+#   python scripts/make_screenshot_corpus.py OUT_DIR [--res 1080p,4K] [--ext .png,.jpg] [--seed 1]
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image, ImageDraw
+
+from services.tag_detector import render_tagged_image
+
+RESOLUTIONS = {
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4K": (3840, 2160),
+    "5K": (5120, 2880),
+}
+EXTENSIONS = (".png", ".jpg", ".tga", ".bmp")
+JPEG_QUALITY = 90
+
+# name → (render kwargs, expected tag)
+CASES = {
+    "untagged": (dict(event=None), None),
+    "pop": (dict(event="arena_pop"), "arena_pop"),
+    "stop": (dict(event="arena_stop"), "arena_stop"),
+    "coded_pop": (dict(event="arena_pop", seq=17, meta=2), "arena_pop"),
+    "thin_pop": (dict(event="arena_pop", rim=1), "arena_pop"),
+    "thin_stop": (dict(event="arena_stop", rim=1), "arena_stop"),
+    "near_green": (dict(rim_color=(90, 190, 60)), None),
+    "near_red": (dict(rim_color=(210, 80, 40)), None),
+}
+
+
+def _background(size, rng: random.Random) -> Image.Image:
+    """Game-like content: gradient + random blocks, so encoders do real work."""
+    w, h = size
+    img = Image.linear_gradient("L").resize(size).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    for _ in range(60):
+        # keep the blocks off the outer rim so only the case decides the tag
+        x0, y0 = rng.randrange(8, w - 28), rng.randrange(8, h - 28)
+        x1 = min(x0 + rng.randrange(20, w // 4), w - 9)
+        y1 = min(y0 + rng.randrange(20, h // 4), h - 9)
+        draw.rectangle((x0, y0, x1, y1),
+                       fill=(rng.randrange(40, 200), rng.randrange(40, 200), rng.randrange(40, 200)))
+    return img
+
+
+def render_case(size, case: str, rng: random.Random) -> Image.Image:
+    kw, _ = CASES[case]
+    kw = dict(kw)
+    rim_color = kw.pop("rim_color", None)
+    rim = kw.get("rim", 2)
+
+    base = _background(size, rng)
+    if rim_color is None and not kw.get("event"):
+        return base
+
+    if rim_color is not None:
+        tagged = Image.new("RGB", size, rim_color)
+    else:
+        tagged = render_tagged_image(size, **kw)
+
+    # rim from the tagged render, content from the background
+    w, h = size
+    tagged.paste(base.crop((rim, rim, w - rim, h - rim)), (rim, rim))
+    return tagged
+
+
+def save(img: Image.Image, path: Path):
+    if path.suffix == ".jpg":
+        img.save(path, quality=JPEG_QUALITY)
+    else:
+        img.save(path)
+
+
+def generate_corpus(out: Path, resolutions=None, extensions=EXTENSIONS, cases=None, seed: int = 1) -> dict:
+    """Write the corpus to `out` and return the manifest {file name: expected tag}."""
+    out.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    for res in resolutions or RESOLUTIONS:
+        size = RESOLUTIONS[res]
+        for case in cases or CASES:
+            img = render_case(size, case, random.Random(f"{seed}-{res}-{case}"))
+            for ext in extensions:
+                name = f"{res}_{case}{ext}"
+                save(img, out / name)
+                manifest[name] = CASES[case][1]
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("out", type=Path)
+    ap.add_argument("--res", default=",".join(RESOLUTIONS))
+    ap.add_argument("--ext", default=",".join(EXTENSIONS))
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    manifest = generate_corpus(args.out, args.res.split(","), tuple(args.ext.split(",")), seed=args.seed)
+    print(f"{len(manifest)} screenshots → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# file: desktop_app/scripts/replay_trace.py
+# Replays a recorded session (config "trace_sessions": true → AppData/.../traces)
+# through the real ListenerController + arena_logic on a virtual clock.
+# Screenshots are re-created (tiny tagged images, original names and mtimes)
+# and the listener polls at whatever interval its scheduler picks, so dedupe,
+# stale checks and the poll backoff run exactly as live — just faster.
+# Nothing is pushed: arena_logic delivery is replaced by a counter.
+#
+# The app's data folder (LOCALAPPDATA: logs, flight dumps, history.db) is a
+# throwaway temp dir for the whole run, and the file log is detached while
+# the clock is virtual: an accelerated replay crosses midnight and must never
+# rotate or prune the user's real logs.
+#
+#   python scripts/replay_trace.py TRACE [--speed 1000 | --speed 0 (max)] [--check]
+#   python scripts/replay_trace.py --make-demo demo.trace.gz [--hours 3] [--long-queue-pct 20]
+import argparse
+import atexit
+import io
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# before any app import: APP_DIR and the log folder are resolved from it
+_APPDATA = tempfile.mkdtemp(prefix="replay-appdata-")
+os.environ["LOCALAPPDATA"] = _APPDATA
+
+
+@atexit.register
+def _remove_appdata():
+    logging.shutdown()      # the log file must be closed before it can go (Windows)
+    shutil.rmtree(_APPDATA, ignore_errors=True)
+
+
+from infrastructure.logger import logger
+from infrastructure.trace import TraceRecorder, read_trace
+
+_real_time, _real_monotonic, _real_sleep = time.time, time.monotonic, time.sleep
+
+
+class VirtualClock:
+    def __init__(self, start: float, speed: float):
+        self.now = start
+        self.speed = speed
+        self._mono_offset = _real_monotonic() - start
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now + self._mono_offset
+
+    def advance_to(self, t: float):
+        if t <= self.now:
+            return
+        if self.speed > 0:
+            _real_sleep((t - self.now) / self.speed)
+        self.now = t
+
+
+class _Null:
+    def __getattr__(self, name):
+        return lambda *a, **k: None
+
+
+class _Countdown:
+    def __init__(self):
+        self.running = False
+
+    def start(self, seconds, deadline=None):
+        self.running = True
+
+    def stop(self, *a, **k):
+        self.running = False
+
+
+class ReplayMain:
+    """Headless stand-in for MainWindow: just what ListenerController touches."""
+
+    def __init__(self, game_folder: Path, cfg: dict):
+        from ui.visibility_scheduler import VisibilityScheduler
+        self.cfg = dict(cfg, combat_log_enabled=False, trace_sessions=False, history_enabled=False)
+        self.game_folder = str(game_folder)
+        self.queue_tab = _Null()
+        self.countdown = _Countdown()
+        self.timers = VisibilityScheduler()
+
+
+def _image_bytes(ext: str, tag, seq, cache: dict) -> bytes:
+    key = (ext, tag, seq)
+    if key not in cache:
+        from services.tag_detector import render_tagged_image
+        img = render_tagged_image((64, 36), event=tag, seq=seq)
+        buf = io.BytesIO()
+        fmt = {".jpg": "JPEG", ".jpeg": "JPEG", ".tga": "TGA", ".bmp": "BMP"}.get(ext, "PNG")
+        img.save(buf, fmt, **({"quality": 95} if fmt == "JPEG" else {}))
+        cache[key] = buf.getvalue()
+    return cache[key]
+
+
+def replay(trace_path: Path, speed: float = 1000, tail_s: float = 10.0) -> dict:
+    from PySide6.QtCore import QCoreApplication
+    app = QCoreApplication.instance() or QCoreApplication([])
+
+    header, records = read_trace(trace_path)
+    arrivals, expected = [], []
+    for rec in records:
+        if rec[0] == "s":
+            arrivals.append((rec[5], rec))          # the file appears at its mtime
+        elif rec[0] == "l":
+            arrivals.append((rec[1], rec))
+        elif rec[0] == "r":
+            expected.append((rec[2], rec[3]))
+    arrivals.sort(key=lambda a: a[0])
+
+    base = Path(tempfile.mkdtemp(prefix="replay-"))
+    clock = VirtualClock(_real_time(), speed)
+    v0 = clock.now
+    # no size/midnight rollover on virtual time (console output stays)
+    file_handler = getattr(logger, "file_handler", None)
+    if file_handler:
+        logger.removeHandler(file_handler)
+    time.time, time.monotonic = clock.time, clock.monotonic
+
+    from services import arena_logic
+    delivered = []
+    arena_logic._deliver = lambda event, *a, **k: delivered.append(event)
+    arena_logic._prepare_stop = lambda *a, **k: None
+
+    from controllers import listener_controller
+    from controllers.listener_controller import ListenerController
+    listener_controller.warm_clock_sync = lambda cfg: None
+
+    results = []
+    cache: dict = {}
+    wall0 = _real_monotonic()
+    try:
+        main = ReplayMain(base, header.get("cfg") or {})
+        lc = ListenerController(main)
+        original_apply = lc._apply_result
+
+        def apply(result, client_id=None):
+            if result:
+                results.append((lc._client_name(client_id or ""), result, clock.now - v0))
+            original_apply(result, client_id)
+
+        lc._apply_result = apply
+        lc.start()
+
+        next_poll = clock.now + lc.timer.interval() / 1000
+        end = v0 + (arrivals[-1][0] if arrivals else 0) + tail_s
+        i = 0
+        while clock.now < end:
+            if i < len(arrivals) and v0 + arrivals[i][0] <= next_poll:
+                t, rec = arrivals[i]
+                i += 1
+                clock.advance_to(v0 + t)
+                if rec[0] == "s":
+                    _, _, client, name, _, mtime, tag, seq = rec
+                    folder = base / client
+                    folder.mkdir(parents=True, exist_ok=True)
+                    path = folder / name
+                    path.write_bytes(_image_bytes(path.suffix.lower(), tag, seq, cache))
+                    os.utime(path, (v0 + mtime, v0 + mtime))
+                else:
+                    client_id = str(base / rec[2]) if rec[2] else ""
+                    lc._on_log_event(rec[3], "replayed", client_id)
+                continue
+
+            clock.advance_to(next_poll)
+            lc.check_screenshots()
+            app.processEvents()
+            next_poll = clock.now + lc.timer.interval() / 1000
+
+        wakeups = sum(lc.scheduler.wakeups.values())
+        lc.stop()
+    finally:
+        time.time, time.monotonic = _real_time, _real_monotonic
+        if file_handler:
+            logger.addHandler(file_handler)
+        shutil.rmtree(base, ignore_errors=True)
+
+    got = [(c, r) for c, r, _ in results]
+    return {
+        "virtual_s": clock.now - v0,
+        "wall_s": _real_monotonic() - wall0,
+        "screenshots": sum(1 for _, r in arrivals if r[0] == "s"),
+        "results": results,
+        "expected": expected,
+        "match": got == expected,
+        "delivered": len(delivered),
+        "wakeups": wakeups,
+        "stats": arena_logic.session_summary_string(),
+    }
+
+
+def make_demo_trace(path: Path, hours: float = 3.0, seed: int = 1, clients=("_retail_/Screenshots",),
+                    long_queue_pct: float = 20):
+    """Synthetic session: queue pops every few minutes, STOP after the countdown,
+    manual screenshots in between and occasional double shots (dedupe window).
+    long_queue_pct of the queues last 16-30 min, long enough for the listener's
+    deep idle backoff."""
+    from controllers.poll_scheduler import DEEP_IDLE_AFTER_S
+    rng = random.Random(seed)
+    cfg = {"countdown_time": 36, "delay_offset": 2}
+    rec = TraceRecorder(path, cfg, start=0.0)
+    n = 0
+    for client in clients:
+        t = rng.uniform(5, 30)
+        seq = 0
+        while t < hours * 3600:
+            # a few untagged manual screenshots
+            for _ in range(rng.randrange(0, 3)):
+                t += rng.uniform(5, 60)
+                n += 1
+                rec.arrival(t + 0.3, client, f"WoWScrnShot_{n:06d}.jpg", 50_000, t, None, None)
+
+            if rng.random() * 100 < long_queue_pct:      # long queue → listener in deep idle
+                t += rng.uniform(DEEP_IDLE_AFTER_S + 60, 1800)
+            else:                                        # waiting in queue
+                t += rng.uniform(60, 600)
+            n += 1
+            seq = (seq + 1) % 64
+            rec.arrival(t + 0.2, client, f"WoWScrnShot_{n:06d}.jpg", 60_000, t, "arena_pop", seq)
+            rec.result(t + 0.2, client, "arena_pop")
+            if rng.random() < 0.2:                       # second shot of the same rim
+                n += 1
+                rec.arrival(t + 0.5, client, f"WoWScrnShot_{n:06d}.jpg", 60_000, t + 0.3, "arena_pop", seq)
+
+            t += rng.uniform(5, 30)                      # accept → loading screen
+            n += 1
+            seq = (seq + 1) % 64
+            rec.arrival(t + 0.2, client, f"WoWScrnShot_{n:06d}.jpg", 60_000, t, "arena_stop", seq)
+            rec.result(t + 0.2, client, "arena_stop")
+            t += rng.uniform(120, 600)                   # the match itself
+    rec.close()
+    return n
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("trace", nargs="?", type=Path)
+    ap.add_argument("--speed", type=float, default=1000, help="1 = real time, 0 = as fast as possible")
+    ap.add_argument("--check", action="store_true", help="exit 1 when results differ from the trace")
+    ap.add_argument("--make-demo", type=Path, metavar="OUT")
+    ap.add_argument("--hours", type=float, default=3.0)
+    ap.add_argument("--long-queue-pct", type=float, default=20, help="share of 16-30 min queues (demo)")
+    args = ap.parse_args()
+
+    if args.make_demo:
+        n = make_demo_trace(args.make_demo, args.hours, long_queue_pct=args.long_queue_pct)
+        print(f"demo trace: {n} screenshots, {args.hours}h → {args.make_demo}")
+        return
+    if not args.trace:
+        ap.error("TRACE or --make-demo is required")
+
+    r = replay(args.trace, args.speed)
+    print(f"replayed {r['screenshots']} screenshots, {r['virtual_s'] / 3600:.2f}h virtual "
+          f"in {r['wall_s']:.1f}s ({r['virtual_s'] / max(r['wall_s'], 1e-9):.0f}x)")
+    print(f"results: {len(r['results'])} (expected {len(r['expected'])}), delivered={r['delivered']}, "
+          f"poll wakeups={r['wakeups']}")
+    print(r["stats"])
+    if not r["match"]:
+        got = [(c, res) for c, res, _ in r["results"]]
+        for k, (g, e) in enumerate(zip(got + [None] * len(r["expected"]), r["expected"] + [None] * len(got))):
+            if g != e:
+                print(f"first mismatch at #{k}: got {g}, expected {e}")
+                break
+        if args.check:
+            sys.exit(1)
+    else:
+        print("results match the recorded session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# file: desktop_app/scripts/soak_recent_cache.py
+# Memory soak for ListenerController._recent: 100k simulated screenshots
+# must leave the dedupe cache (and traced memory) bounded.
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from infrastructure.utils import ExpiringCache
+from controllers.listener_controller import RECENT_TTL_S, RECENT_MAX
+
+N = 100_000
+
+
+def soak(step_s: float) -> tuple[int, int, int]:
+    cache = ExpiringCache(RECENT_TTL_S, RECENT_MAX)
+    now = 0.0
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+
+    for i in range(N):
+        key = f"C:/WoW/_classic_/Screenshots/WoWScrnShot_{i:06d}.jpg"
+        if cache.get(key, now=now) is None:
+            cache.put(key, (250_000 + i, now, now), now=now)
+        now += step_s
+
+    cur, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(cache), cur - base, peak - base
+
+
+if __name__ == "__main__":
+    # 0.5 s apart → TTL-bound, 0 s apart (one burst) → size-bound
+    for step in (0.5, 0.0):
+        size, cur, peak = soak(step)
+        print(f"step={step}s entries={size} mem={cur / 1024:.1f} KiB peak={peak / 1024:.1f} KiB")
+        assert size <= RECENT_MAX, "cache exceeded RECENT_MAX"
+        assert peak < 1024 * 1024, "cache memory not bounded"
+    print("OK")
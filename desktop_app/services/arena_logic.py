@@ -1,30 +1,49 @@
 # -*- coding: utf-8 -*-
 """
 Full-border tag detection | removes processed screenshots
-• POP → start countdown + delete screenshot
+• POP → start countdown + delete screenshot (+ arm the STOP dispatch)
 • STOP → stop countdown + delete screenshot
+• Deletion runs on the background deleter, never on the caller's thread
+• Every POP/STOP goes to the event history with its stage latencies
+• Every decision (tag, drop reason, apply, delivery) goes to the flight recorder
 • No Tag → keep file
+• Tagged screenshot of an event already handled (second shot, or the STOP
+  the combat log delivered first) → counted as duplicate, still deleted
+• Combat log ARENA_MATCH_START → same STOP path, no file involved
+• One ArenaStateMachine per game client (Screenshots root) for multiboxing
 """
 
 import os
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from services.firebase_notify import send_fcm_message
+from services.firebase_notify import send_fcm_fanout, prepare_dispatch, PreparedDispatch
+from services.pairing import get_pairing_ids
 from services.push.arena_realtime import send_arena_event
 from infrastructure.logger import logger
-from services.tag_detector import detect_tag
-from infrastructure.utils import safe_delete, PrintScreenListener
+from services.tag_detector import detect_tag_ex, BorderCode, get_stats as get_detector_stats, warm_up
+from infrastructure.utils import deferred_delete, is_pending_delete, PrintScreenListener, ExpiringCache
+from infrastructure.history import get_history
+from infrastructure import flight_recorder as flight
 
 # stub always returns False
 printscreen = PrintScreenListener()
 
-_last_event_type: str | None = None
-_last_event_id: str | None = None
-_last_processed_timestamp = 0.0
-_countdown_active = False
+STALE_AFTER_S = 4
+DETECT_WORKERS = 4
+STOP_PREPARED_GRACE_S = 30   # a prepared STOP outlives the countdown by this much
+HANDLED_WINDOW_S = 15        # late screenshots of a handled event are still cleaned up
 
+# sentinel: tag not detected yet (None already means "no tag")
+_DETECT = object()
+_detect_pool: ThreadPoolExecutor | None = None
+
+DEFAULT_CLIENT = "default"
+
+_stats_lock = threading.Lock()
 _stats = {
     "arena_pop": 0,
     "arena_stop": 0,
@@ -33,37 +52,192 @@ _stats = {
     "ignored_old": 0,
     "ignored_stale": 0,
     "errors": 0,
+    "from_log": 0,
+    "stop_prepared": 0,
 }
 
-def process_screenshot_event(file_path: Path, cfg: dict, app_start_time: float = 0.0) -> str:
-    global _last_event_type, _last_event_id, _countdown_active, _last_processed_timestamp
+def _get_pool() -> ThreadPoolExecutor:
+    global _detect_pool
+    if _detect_pool is None:
+        _detect_pool = ThreadPoolExecutor(max_workers=DETECT_WORKERS, thread_name_prefix="detect")
+    return _detect_pool
+
+
+def warm_up_detector():
+    """Warm the decode path on a detect worker (spawns it too) — never blocks the caller."""
+    _get_pool().submit(warm_up)
+
+
+# detect time per file, handed from classify_screenshots to the history row
+_detect_ms = ExpiringCache(60, 512)
+_detect_ms_lock = threading.Lock()
+
+
+def _take_detect_ms(path: Path) -> float | None:
+    with _detect_ms_lock:
+        return _detect_ms.pop(str(path))
+
+
+def _stale_cutoff(now: float, looked_at: float | None) -> float:
+    """
+    Files modified before this are stale. `looked_at`: when the caller last
+    finished looking at the folder — a file written after that is new however
+    long the caller slept (poll backoff, readiness wait), so age counts from there.
+    """
+    return min(now, looked_at if looked_at is not None else now) - STALE_AFTER_S
+
+
+def classify_screenshots(
+    paths: list[Path], now: float | None = None, looked_at: float | None = None
+) -> list[tuple[str | None, BorderCode | None]]:
+    """
+    Detect tags for a batch concurrently (Pillow decodes outside the GIL).
+    Stale files are skipped here and counted later by process_screenshot_event.
+    """
+    now = now or time.time()
+    cutoff = _stale_cutoff(now, looked_at)
+
+    def _classify(p: Path):
+        try:
+            if os.path.getmtime(p) < cutoff:
+                return None, None
+        except OSError:
+            return None, None
+        t0 = time.perf_counter()
+        result = detect_tag_ex(str(p))
+        elapsed = time.perf_counter() - t0
+        with _detect_ms_lock:
+            _detect_ms.put(str(p), elapsed * 1000)
+        flight.record(flight.TAG, p.name, flight.EVENT_CODES.get(result[0], 0), int(elapsed * 1e6))
+        return result
+
+    if len(paths) <= 1:
+        return [_classify(p) for p in paths]
+
+    return list(_get_pool().map(_classify, paths))
+
+
+def _deliver(
+    event: str,
+    seconds: int,
+    event_id: str,
+    cfg: dict,
+    deadline: float | None = None,
+    prepared: PreparedDispatch | None = None,
+) -> dict:
+    """
+    pushArena to every paired device at once; RTDB fallback only for the ones that failed.
+    Returns the outcome for the history (devices, delivered, fallback, prepared, deliver_ms).
+    """
+    t0 = time.perf_counter()
+    targets = get_pairing_ids(cfg) or ["test_desktop"]
+    used_prepared = bool(prepared and prepared.valid_for(event, event_id, targets))
+    if used_prepared:
+        _bump("stop_prepared")
+        results = prepared.send()
+    else:
+        results = send_fcm_fanout(event, seconds, event_id, targets, cfg=cfg, deadline=deadline)
+    delivered = fallback = 0
+    for pairing_id, ok in results.items():
+        if not ok:
+            fallback += 1
+            ok = send_arena_event(event, seconds, pairing_id, event_id, cfg, deadline=deadline) is not None
+        delivered += ok
+    flight.record(flight.DELIVER, event, delivered, int((time.perf_counter() - t0) * 1000))
+    return {
+        "devices": len(results),
+        "delivered": delivered,
+        "fallback": fallback,
+        "prepared": int(used_prepared),
+        "deliver_ms": (time.perf_counter() - t0) * 1000,
+    }
 
+
+def _prepare_stop(event_id: str, cfg: dict, countdown_s: float,
+                  deadline: float | None = None) -> PreparedDispatch | None:
+    """At POP: the STOP that follows goes to the same devices over the same channel."""
     try:
-        now = time.time()
-        modified = os.path.getmtime(file_path)
+        targets = get_pairing_ids(cfg) or ["test_desktop"]
+        return prepare_dispatch("arena_stop", event_id, targets, cfg,
+                                ttl_s=countdown_s + STOP_PREPARED_GRACE_S, deadline=deadline)
+    except Exception as e:
+        logger.dev(f"STOP preparation failed: {e}")
+        return None
 
-        if app_start_time and modified < app_start_time:
-            _stats["ignored_old"] += 1
-            return ""
 
-        if (now - modified) > 4:
-            _stats["ignored_stale"] += 1
-            return ""
+def _bump(key: str):
+    with _stats_lock:
+        _stats[key] += 1
 
-        event = detect_tag(str(file_path))
 
-        if not event:
-            _stats["ignored_no_tag"] += 1
-            return ""
+class ArenaStateMachine:
+    """
+    POP/STOP state of one game client. Dedupe windows, event ids and the
+    countdown deadline are per client, so multiboxed clients never
+    swallow each other's events.
+    """
 
-        if event == _last_event_type and (now - _last_processed_timestamp) < 1.2:
-            _stats["ignored_duplicates"] += 1
-            return ""
+    def __init__(self, client_id: str = DEFAULT_CLIENT):
+        self.client_id = client_id
+        self.last_event_type: str | None = None
+        self.last_event_id: str | None = None
+        self.last_seq: int | None = None
+        self.pop_deadline: float | None = None   # time.monotonic() when the countdown ends
+        self.last_processed_timestamp = 0.0
+        self.countdown_active = False
+        self.prepared_stop: PreparedDispatch | None = None
+        self.pop_time: float | None = None
+        self.handled_at: dict[str, float] = {}   # event → when this client last applied it
+        self._lock = threading.Lock()
+
+    def is_duplicate(self, event: str, code: BorderCode | None, now: float) -> bool:
+        # coded rims carry a sequence number → exact dedupe, no time heuristic
+        if code is not None and self.last_seq is not None:
+            return code.seq == self.last_seq and event == self.last_event_type
+        return event == self.last_event_type and (now - self.last_processed_timestamp) < 1.2
+
+    def apply(
+        self,
+        event: str,
+        code: BorderCode | None,
+        cfg: dict,
+        now: float,
+        file_path: Path | None = None,
+        stages: dict | None = None,
+    ) -> str:
+        """
+        Shared state machine for every ingestion channel (screenshot / combat log).
+        `stages`: what the caller measured (file_time, pickup_ms, detect_ms) for the history.
+        """
+        with self._lock:
+            return self._apply(event, code, cfg, now, file_path, stages or {})
+
+    def _record(self, event: str, cfg: dict, source: str, now: float, stages: dict,
+                outcome: dict | None, pop_to_stop_s: float | None = None):
+        if not cfg.get("history_enabled", True):
+            return
+        history = get_history()
+        if history is None:
+            return
+        started = stages.get("file_time") or now
+        history.record(
+            event, ts=now, client=self.client_id, event_id=self.last_event_id, source=source,
+            pickup_ms=stages.get("pickup_ms"), detect_ms=stages.get("detect_ms"),
+            total_ms=(time.time() - started) * 1000, pop_to_stop_s=pop_to_stop_s,
+            **(outcome or {}),
+        )
 
-        _last_event_type = event
-        _last_processed_timestamp = now
+    def _apply(self, event, code, cfg, now, file_path, stages) -> str:
+        source = file_path.name if file_path else "combat_log"
 
-        pairing_id = cfg.get("pairing_id") or "test_desktop"
+        if self.is_duplicate(event, code, now):
+            return self._drop_handled(event, now, source, file_path)
+
+        self.last_event_type = event
+        self.last_processed_timestamp = now
+        self.last_seq = code.seq if code else None
+        if code:
+            logger.dev(f"border code: {code.event} seq={code.seq} meta={code.meta}")
 
         # POP
         if event == "arena_pop":
@@ -71,49 +245,219 @@ def process_screenshot_event(file_path: Path, cfg: dict, app_start_time: float =
             user_offset = int(cfg.get("delay_offset", 2))
             real_offset = user_offset + 1
             adjusted = max(base - real_offset, 1)
+            flight.record(flight.APPLY, self.client_id, 1)
 
-            _last_event_id = str(uuid.uuid4())
-            _countdown_active = True
+            self.last_event_id = str(uuid.uuid4())
+            self.countdown_active = True
+            # the countdown runs from when the screenshot was written, not when we saw it
+            lag = min((stages.get("pickup_ms") or 0) / 1000, adjusted - 1)
+            self.pop_deadline = time.monotonic() + adjusted - max(lag, 0)
 
             logger.user(f"🏁 Arena found!")
-            logger.dev(f"POP file={file_path.name}, base={base}, offset={user_offset}+1 → {adjusted}")
+            logger.dev(f"POP client={self.client_id}, src={source}, base={base}, "
+                       f"offset={user_offset}+1 → {adjusted}")
 
-            if not send_fcm_message("arena_pop", adjusted, _last_event_id, pairing_id=pairing_id, cfg=cfg):
-                send_arena_event("arena_pop", adjusted, pairing_id, _last_event_id, cfg)
+            outcome = _deliver("arena_pop", adjusted, self.last_event_id, cfg, deadline=self.pop_deadline)
+            self._record("arena_pop", cfg, source, now, stages, outcome)
+            self.pop_time = now
+            self.handled_at[event] = now
+            if self.prepared_stop:
+                self.prepared_stop.cancel()
+            self.prepared_stop = _prepare_stop(self.last_event_id, cfg, adjusted, self.pop_deadline)
 
-            _stats["arena_pop"] += 1
-            safe_delete(file_path)
+            _bump("arena_pop")
+            if file_path:
+                deferred_delete(file_path)
             return "arena_pop"
 
         # STOP
-        if event == "arena_stop" and _countdown_active:
+        if event == "arena_stop" and self.countdown_active:
             logger.user("⚔️ Entered arena — fight!")
+            logger.dev(f"STOP client={self.client_id}, src={source}")
+            flight.record(flight.APPLY, self.client_id, 2)
 
-            if not _last_event_id:
-                _last_event_id = str(uuid.uuid4())
+            if not self.last_event_id:
+                self.last_event_id = str(uuid.uuid4())
 
-            if not send_fcm_message("arena_stop", 0, _last_event_id, pairing_id=pairing_id, cfg=cfg):
-                send_arena_event("arena_stop", 0, pairing_id, _last_event_id, cfg)
+            outcome = _deliver("arena_stop", 0, self.last_event_id, cfg, prepared=self.prepared_stop)
+            self._record("arena_stop", cfg, source, now, stages, outcome,
+                         pop_to_stop_s=now - self.pop_time if self.pop_time else None)
 
-            _stats["arena_stop"] += 1
-            _last_event_id = None
-            _countdown_active = False
+            _bump("arena_stop")
+            self.handled_at[event] = now
+            self.pop_time = None
+            if self.prepared_stop:
+                self.prepared_stop.cancel()
+            self.prepared_stop = None
+            self.last_event_id = None
+            self.countdown_active = False
+            self.pop_deadline = None
 
-            safe_delete(file_path)
+            if file_path:
+                deferred_delete(file_path)
             return "arena_stop"
 
-        _stats["ignored_duplicates"] += 1
+        return self._drop_handled(event, now, source, file_path)
+
+    def _drop_handled(self, event: str, now: float, source: str, file_path: Path | None) -> str:
+        """Duplicate / already handled: the tagged screenshot still goes if its event just ran."""
+        _bump("ignored_duplicates")
+        flight.record(flight.DROP, source, flight.DROP_DUPLICATE)
+        if file_path and now - self.handled_at.get(event, float("-inf")) < HANDLED_WINDOW_S:
+            deferred_delete(file_path)
         return ""
 
+
+_clients: dict[str, ArenaStateMachine] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(client_id: str | None = None) -> ArenaStateMachine:
+    client_id = client_id or DEFAULT_CLIENT
+    with _clients_lock:
+        machine = _clients.get(client_id)
+        if machine is None:
+            machine = _clients[client_id] = ArenaStateMachine(client_id)
+        return machine
+
+
+def client_for_path(file_path: Path) -> str:
+    """Screenshots land directly in their client's root → the folder is the client id."""
+    return str(Path(file_path).parent)
+
+
+def get_pop_deadline(client_id: str | None = None) -> float | None:
+    """
+    Monotonic deadline shared with endsAt. Without a client: the soonest
+    deadline among clients still counting down (None if none is). A client
+    that popped but never entered (queue declined) keeps its deadline, so
+    expired ones are skipped.
+    """
+    if client_id:
+        return get_client(client_id).pop_deadline
+    now = time.monotonic()
+    with _clients_lock:
+        deadlines = [m.pop_deadline for m in _clients.values()
+                     if m.pop_deadline is not None and m.pop_deadline > now]
+    return min(deadlines) if deadlines else None
+
+
+def process_screenshot_event(
+    file_path: Path,
+    cfg: dict,
+    app_start_time: float = 0.0,
+    event=_DETECT,
+    code: BorderCode | None = None,
+    client_id: str | None = None,
+    looked_at: float | None = None,
+) -> str:
+    """
+    Apply one screenshot to its client's state machine (default: the client
+    owning the file's folder); `event`/`code` may be pre-detected.
+    `looked_at`: when the listener last looked at the folder (stale check).
+    """
+    try:
+        now = time.time()
+        modified = os.path.getmtime(file_path)
+
+        # already handled, deletion still in flight (file locked by the game)
+        if is_pending_delete(file_path):
+            _bump("ignored_duplicates")
+            flight.record(flight.DROP, file_path.name, flight.DROP_PENDING_DELETE)
+            return ""
+
+        if app_start_time and modified < app_start_time:
+            _bump("ignored_old")
+            flight.record(flight.DROP, file_path.name, flight.DROP_OLD)
+            return ""
+
+        if modified < _stale_cutoff(now, looked_at):
+            _bump("ignored_stale")
+            flight.record(flight.DROP, file_path.name, flight.DROP_STALE)
+            return ""
+
+        detect_ms = _take_detect_ms(file_path)
+        if event is _DETECT:
+            t0 = time.perf_counter()
+            event, code = detect_tag_ex(str(file_path))
+            detect_ms = (time.perf_counter() - t0) * 1000
+            flight.record(flight.TAG, file_path.name, flight.EVENT_CODES.get(event, 0), int(detect_ms * 1000))
+
+        if not event:
+            _bump("ignored_no_tag")
+            flight.record(flight.DROP, file_path.name, flight.DROP_NO_TAG)
+            return ""
+
+        stages = {
+            "file_time": modified,
+            "pickup_ms": max(now - modified, 0.0) * 1000,
+            "detect_ms": detect_ms,
+        }
+        machine = get_client(client_id or client_for_path(file_path))
+        return machine.apply(event, code, cfg, now, file_path=file_path, stages=stages)
+
     except Exception as e:
-        _stats["errors"] += 1
+        _bump("errors")
         logger.dev(f"process_screenshot_event error: {e}")
         return ""
 
+
+def process_screenshot_batch(
+    items: list[tuple[Path, str | None, BorderCode | None]],
+    cfg: dict,
+    app_start_time: float = 0.0,
+    looked_at: float | None = None,
+) -> list[tuple[str, str]]:
+    """
+    Route pre-classified screenshots to their clients. Each client's files
+    are applied in order; different clients run concurrently so one slow
+    delivery never delays another client's POP.
+    Returns [(client_id, result), ...] aligned with `items`.
+    """
+    groups: dict[str, list[int]] = {}
+    for i, (path, _, _) in enumerate(items):
+        groups.setdefault(client_for_path(path), []).append(i)
+
+    results: list[tuple[str, str]] = [("", "")] * len(items)
+
+    def _run(client_id: str):
+        for i in groups[client_id]:
+            path, tag, code = items[i]
+            results[i] = (client_id, process_screenshot_event(
+                path, cfg, app_start_time=app_start_time, event=tag, code=code, client_id=client_id,
+                looked_at=looked_at,
+            ))
+
+    if len(groups) <= 1:
+        for client_id in groups:
+            _run(client_id)
+        return results
+
+    list(_get_pool().map(_run, groups))
+    return results
+
+
+def process_log_event(event: str, cfg: dict, line: str = "", client_id: str | None = None) -> str:
+    """Combat log channel: no file, no decode, same dedupe and delivery."""
+    try:
+        _bump("from_log")
+        flight.record(flight.LOG_LINE, client_id, flight.EVENT_CODES.get(event, 0))
+        logger.dev(f"combat log: {line.strip()[:120]}")
+        return get_client(client_id).apply(event, None, cfg, time.time())
+    except Exception as e:
+        _bump("errors")
+        logger.dev(f"process_log_event error: {e}")
+        return ""
+
 def session_summary_string() -> str:
-    s = _stats
+    with _stats_lock:
+        s = dict(_stats)
+    d = get_detector_stats()
+    px_per_tag = d["pixels"] / d["decisions"] if d["decisions"] else 0
     return (
         f"stats: pop={s['arena_pop']}, stop={s['arena_stop']}, "
         f"dup={s['ignored_duplicates']}, no_tag={s['ignored_no_tag']}, "
-        f"old={s['ignored_old']}, stale={s['ignored_stale']}, errors={s['errors']}"
+        f"old={s['ignored_old']}, stale={s['ignored_stale']}, errors={s['errors']}, "
+        f"log={s['from_log']}, prepared={s['stop_prepared']}, clients={len(_clients)}, "
+        f"px/tag={px_per_tag:.0f}"
     )
@@ -1,20 +1,29 @@
 # -*- coding: utf-8 -*-
 """
 Clean pushArena sender with:
+ - fan-out to every paired device (concurrent, pooled keep-alive connections)
+ - per-device retry and success/latency stats
+ - prepared dispatch: the STOP is built, keyed and routed at POP time
  - minimal user logs
  - optional developer diagnostics
  - full payload only on error
+ - every attempt (status, latency) in the flight recorder
 """
 
 import uuid
 import hmac
 import hashlib
 import json
+import threading
+import time
 import requests
-from typing import Optional
+import requests.adapters
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
 from infrastructure.logger import logger
-from services.time_sync import get_firebase_server_time, get_server_offset
+from infrastructure import flight_recorder as flight
+from services.time_sync import get_firebase_server_time, get_server_offset, remaining_ms
 from infrastructure.credentials_provider import CredentialsProvider
 
 
@@ -30,6 +39,362 @@ def _generate_signature(secret: str, message: str) -> str:
     ).hexdigest()
 
 
+def canonical_json(payload: dict) -> str:
+    """The exact bytes pushArena verifies the HMAC over."""
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, sort_keys=True)
+
+
+def sign_payload(secret: str, payload: dict) -> tuple[str, str]:
+    """Canonical JSON (what pushArena verifies) and its signature."""
+    msg = canonical_json(payload)
+    return msg, _generate_signature(secret, msg)
+
+
+def verify_signature(secret: str, body: bytes, signature: str) -> bool:
+    expected = _generate_signature(secret, body.decode("utf-8", errors="replace"))
+    return hmac.compare_digest(expected, signature or "")
+
+
+def build_payload(
+    event_type: str,
+    pairing_id: str,
+    event_id: str,
+    server_time_ms: int,
+    ends_at_ms: int,
+    adjusted_seconds: int,
+    desktop_offset_ms: int,
+) -> dict:
+    return {
+        "schema": "1",
+        "type": str(event_type),
+        "event": str(event_type),
+        "pairing_id": str(pairing_id),
+        "eventId": str(event_id),
+        "start_time": str(server_time_ms),
+        "endsAt": str(ends_at_ms),
+        "duration": str(adjusted_seconds),
+        "sentAtMs": str(server_time_ms),
+        "desktopOffset": str(desktop_offset_ms),
+    }
+
+
+# -------------------------------------------------------------------------
+# CONNECTION POOL / PER-DEVICE STATS
+# -------------------------------------------------------------------------
+FANOUT_WORKERS = 8
+DELIVERY_RETRIES = 1        # one more attempt per device on network error / 5xx
+RETRY_BACKOFF_S = 0.2
+
+_session: Optional[requests.Session] = None
+_fanout_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# LAN relay: a POST slower than RELAY_SLOW_MS (or a timeout / error) → direct for RELAY_BYPASS_S
+RELAY_TIMEOUT_S = (1.0, 2.0)   # connect, read (direct pushArena keeps the 10 s)
+RELAY_SLOW_MS = 1000
+RELAY_BYPASS_S = 60
+
+_stats_lock = threading.Lock()
+_device_stats: dict[str, dict] = {}
+_winning_url: dict[str, str] = {}      # pairing id → URL its last successful POST used
+_last_used: dict[str, float] = {}      # URL → time.monotonic() of the last success
+_relay_bypass_until: dict[str, float] = {}   # relay URL → time.monotonic()
+
+
+def _get_session() -> requests.Session:
+    """Keep-alive session shared by every delivery (no TLS handshake per pop)."""
+    global _session
+    with _pool_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=FANOUT_WORKERS)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _fanout_pool
+    with _pool_lock:
+        if _fanout_pool is None:
+            _fanout_pool = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="fanout")
+        return _fanout_pool
+
+
+def _record_delivery(pairing_id: str, ok: bool, latency_ms: float, retries: int, url: Optional[str] = None):
+    with _stats_lock:
+        if url:
+            _winning_url[pairing_id] = url
+            _last_used[url] = time.monotonic()
+        st = _device_stats.setdefault(
+            pairing_id, {"ok": 0, "failed": 0, "retries": 0, "last_ms": 0.0, "total_ms": 0.0}
+        )
+        st["ok" if ok else "failed"] += 1
+        st["retries"] += retries
+        st["last_ms"] = latency_ms
+        st["total_ms"] += latency_ms
+
+
+def _push_urls(cfg: dict, direct_url: str) -> tuple[str, str]:
+    """(URL to POST to, direct pushArena URL): the LAN relay when set and not bypassed."""
+    relay_url = (cfg.get("relay_url") or "").strip().rstrip("/")
+    if not relay_url:
+        return direct_url, direct_url
+    url = f"{relay_url}/pushArena"
+    with _stats_lock:
+        bypassed = time.monotonic() < _relay_bypass_until.get(url, 0.0)
+    return (direct_url if bypassed else url), direct_url
+
+
+def _bypass_relay(url: str, why: str):
+    with _stats_lock:
+        fresh = time.monotonic() >= _relay_bypass_until.get(url, 0.0)
+        _relay_bypass_until[url] = time.monotonic() + RELAY_BYPASS_S
+        for pid, winner in list(_winning_url.items()):
+            if winner == url:
+                del _winning_url[pid]
+    if fresh:
+        logger.dev(f"relay {why} → direct pushArena for {RELAY_BYPASS_S}s")
+
+
+def get_delivery_stats() -> dict[str, dict]:
+    with _stats_lock:
+        return {pid: dict(st) for pid, st in _device_stats.items()}
+
+
+def delivery_summary_string() -> str:
+    parts = []
+    for pid, st in get_delivery_stats().items():
+        sent = st["ok"] + st["failed"]
+        avg = st["total_ms"] / sent if sent else 0
+        parts.append(f"{pid[:8]}: ok={st['ok']} failed={st['failed']} "
+                     f"retries={st['retries']} avg={avg:.0f}ms")
+    return "delivery: " + ("; ".join(parts) if parts else "none")
+
+
+# -------------------------------------------------------------------------
+# SINGLE DEVICE POST
+# -------------------------------------------------------------------------
+def _post_signed(
+    push_url: str,
+    secret: str,
+    payload: dict,
+    fallback_url: Optional[str] = None,
+    client_id: str = "",
+) -> bool:
+    """Sign one payload and POST it (see _post_body)."""
+    msg, signature = sign_payload(secret, payload)
+    return _post_body(push_url, msg, signature, payload["pairing_id"], fallback_url, client_id)
+
+
+def _post_body(
+    push_url: str,
+    msg: str,
+    signature: str,
+    pairing_id: str,
+    fallback_url: Optional[str] = None,
+    client_id: str = "",
+) -> bool:
+    """
+    POST one signed body, retrying network errors / 5xx per device.
+    `push_url` is the LAN relay when it differs from `fallback_url` (direct):
+    a relay that is unreachable or slower than RELAY_TIMEOUT_S → the retry goes
+    straight to pushArena, and a slow or failing relay is bypassed for RELAY_BYPASS_S.
+    """
+    msg_bytes = msg.encode("utf-8")
+    headers = {
+        "Content-Type": "application/json; charset=utf-8",
+        "X-Signature": signature,
+    }
+    if client_id:
+        headers["X-Client-Id"] = client_id
+
+    t0 = time.perf_counter()
+    attempt = 0
+    ok = False
+    short_id = pairing_id[:8]
+    while True:
+        retry = switched = False
+        via_relay = bool(fallback_url) and push_url != fallback_url
+        flight.record(flight.SEND, short_id, attempt)
+        t_attempt = time.perf_counter()
+        try:
+            response = _get_session().post(push_url, data=msg_bytes, headers=headers,
+                                           timeout=RELAY_TIMEOUT_S if via_relay else 10)
+            elapsed_ms = (time.perf_counter() - t_attempt) * 1000
+            flight.record(flight.SEND_DONE, short_id, response.status_code, int(elapsed_ms))
+            if via_relay and (elapsed_ms > RELAY_SLOW_MS or response.status_code >= 500):
+                _bypass_relay(push_url, f"slow ({elapsed_ms:.0f} ms, {response.status_code})")
+            if response.status_code == 200:
+                logger.dev(f"POST OK (200) pid={pairing_id[:8]}")
+                ok = True
+                break
+
+            # ------------------ ERROR DETAIL ------------------
+            logger.error(f"❌ pushArena rejected ({response.status_code})")
+            logger.dev(f"resp: {response.text}")
+            retry = response.status_code >= 500
+            if retry and via_relay:
+                push_url = fallback_url
+                switched = True
+
+        except Exception as e:
+            flight.record(flight.SEND_DONE, short_id, 0, int((time.perf_counter() - t_attempt) * 1000))
+            retry = True
+            if via_relay:
+                _bypass_relay(push_url, f"unreachable or slow ({type(e).__name__})")
+                push_url = fallback_url
+                switched = True
+            else:
+                logger.error(f"❌ pushArena HTTPS error: {str(e)}")
+
+        if not retry or attempt >= DELIVERY_RETRIES:
+            # Full payload only when error:
+            logger.dev(f"payload: {msg}")
+            logger.dev(f"hmac: {signature}")
+            break
+        attempt += 1
+        if not switched:
+            time.sleep(RETRY_BACKOFF_S)
+
+    _record_delivery(pairing_id, ok, (time.perf_counter() - t0) * 1000, attempt,
+                     url=push_url if ok else None)
+    return ok
+
+
+# -------------------------------------------------------------------------
+# PREPARED DISPATCH (STOP armed at POP time)
+# -------------------------------------------------------------------------
+_STAMP = "@@stamp@@"
+WARM_IDLE_S = 30            # re-open the channel if nothing went over it for this long
+KEEPALIVE_LEAD_S = 5        # last keep-alive this long before the countdown ends
+
+
+class PreparedDispatch:
+    """
+    An event whose delivery is fully decided ahead of time: credentials,
+    winning URL per device, canonical JSON around the time stamp and an
+    HMAC already keyed with the secret. send() only stamps and POSTs.
+    """
+
+    def __init__(self, event_type: str, event_id: str, pairing_ids: List[str], cfg: dict,
+                 secret: str, urls: Dict[str, str], fallback_url: str, expires_at: float):
+        self.event_type = event_type
+        self.event_id = event_id
+        self.pairing_ids = list(pairing_ids)
+        self.expires_at = expires_at            # time.monotonic()
+        self._urls = urls
+        self._fallback_url = fallback_url
+        self._client_id = str(cfg.get("desktop_id", ""))
+        self._offset_ms = get_server_offset(cfg)
+        self._mac = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+        # server time is the only variable left (endsAt = start = sentAt for a 0 s event)
+        self._templates = {}
+        for pid in self.pairing_ids:
+            payload = build_payload(event_type, pid, event_id, 0, 0, 0, self._offset_ms)
+            payload.update(start_time=_STAMP, endsAt=_STAMP, sentAtMs=_STAMP)
+            self._templates[pid] = canonical_json(payload).split(_STAMP)
+        self._keepalive: Optional[threading.Timer] = None
+
+    def valid_for(self, event_type: str, event_id: str, pairing_ids: List[str]) -> bool:
+        return (event_type == self.event_type and event_id == self.event_id
+                and list(pairing_ids) == self.pairing_ids and time.monotonic() < self.expires_at)
+
+    def _sign(self, msg: str) -> str:
+        mac = self._mac.copy()
+        mac.update(msg.encode("utf-8"))
+        return mac.hexdigest()
+
+    def keep_warm(self, at: float):
+        """One keep-alive on every URL this dispatch uses at `at` (time.monotonic())."""
+        def run():
+            if time.monotonic() < self.expires_at:
+                for url in set(self._urls.values()):
+                    _warm(url)
+
+        self._keepalive = threading.Timer(max(at - time.monotonic(), 0.0), run)
+        self._keepalive.daemon = True
+        self._keepalive.start()
+
+    def cancel(self):
+        if self._keepalive:
+            self._keepalive.cancel()
+
+    def send(self) -> Dict[str, bool]:
+        self.cancel()
+        stamp = str(int(time.time() * 1000) + self._offset_ms)
+
+        def post(pid: str) -> bool:
+            msg = stamp.join(self._templates[pid])
+            return _post_body(self._urls[pid], msg, self._sign(msg), pid,
+                              fallback_url=self._fallback_url, client_id=self._client_id)
+
+        logger.dev(f"pushArena {self.event_type} (prepared) id={self.event_id} devices={len(self.pairing_ids)}")
+        if len(self.pairing_ids) == 1:
+            pid = self.pairing_ids[0]
+            return {pid: post(pid)}
+
+        results = {pid: False for pid in self.pairing_ids}
+        futures = {pid: _get_pool().submit(post, pid) for pid in self.pairing_ids}
+        for pid, fut in futures.items():
+            try:
+                results[pid] = fut.result()
+            except Exception as e:
+                logger.dev(f"fan-out to {pid[:8]} crashed: {e}")
+        return results
+
+
+def _warm(url: str):
+    """
+    Open (or refresh) the pooled connection to `url` with a GET on its /ping
+    health route (pushArena's Express app and the LAN relay both answer it),
+    so the push handler itself never runs.
+    """
+    try:
+        _get_session().get(f"{url}/ping", timeout=3)
+        with _stats_lock:
+            _last_used[url] = time.monotonic()
+    except Exception as e:
+        logger.dev(f"warm-up {url} failed: {e}")
+
+
+def prepare_dispatch(
+    event_type: str,
+    event_id: str,
+    pairing_ids: List[str],
+    cfg: dict,
+    ttl_s: float,
+    deadline: Optional[float] = None,
+) -> Optional[PreparedDispatch]:
+    """
+    Arm a follow-up event (the STOP after a POP) on the channel that just
+    delivered: each device keeps the URL its last POST succeeded on, and a
+    channel that has been idle gets its connection re-opened in the background.
+    With a countdown `deadline` (time.monotonic()) the connection is refreshed
+    once more KEEPALIVE_LEAD_S before it, so a late STOP doesn't hit a socket
+    the server already closed.
+    """
+    creds = CredentialsProvider()
+    secret = creds.get_secret()
+    default_url, direct_url = _push_urls(cfg, creds.get_push_arena_url())
+    if not secret or not default_url:
+        return None
+
+    with _stats_lock:
+        urls = {pid: _winning_url.get(pid, default_url) for pid in pairing_ids}
+        now = time.monotonic()
+        cold = {u for u in urls.values() if now - _last_used.get(u, 0.0) > WARM_IDLE_S}
+    for url in cold:
+        _get_pool().submit(_warm, url)
+
+    dispatch = PreparedDispatch(event_type, event_id, pairing_ids, cfg, secret, urls,
+                                direct_url, expires_at=time.monotonic() + ttl_s)
+    if deadline is not None and deadline - KEEPALIVE_LEAD_S > time.monotonic() + WARM_IDLE_S / 3:
+        dispatch.keep_warm(deadline - KEEPALIVE_LEAD_S)
+    return dispatch
+
+
 # -------------------------------------------------------------------------
 # MAIN FUNCTION
 # -------------------------------------------------------------------------
@@ -40,91 +405,83 @@ def send_fcm_message(
     user_token: Optional[str] = None,  # legacy param for GUI compatibility
     pairing_id: str = "test_desktop",
     cfg: Optional[dict] = None,
+    deadline: Optional[float] = None,
 ) -> bool:
     """
     Sends an event (arena_pop, arena_stop) to Cloud Function `pushArena`
     using HMAC authentication and consistent JSON serialization.
 
+    `deadline` (time.monotonic based) anchors endsAt to the same instant the
+    desktop countdown ends, and `duration` is the time left when each POST
+    goes out (pushArena derives its endsAt from it).
+
     Minimal logs for normal operation.
     Extra diagnostics only in debug_mode.
     """
+    results = send_fcm_fanout(event_type, seconds, event_id, [pairing_id], cfg=cfg, deadline=deadline)
+    return all(results.values())
+
+
+def send_fcm_fanout(
+    event_type: str,
+    seconds: int,
+    event_id: Optional[str],
+    pairing_ids: List[str],
+    cfg: Optional[dict] = None,
+    deadline: Optional[float] = None,
+) -> Dict[str, bool]:
+    """
+    Same event to every paired device, concurrently over pooled connections.
+    Time sync and endsAt are computed once, so every device counts down to
+    the same instant. Returns {pairing_id: delivered}.
+    """
+    results = {pid: False for pid in pairing_ids}
 
     if not cfg:
         logger.error("❌ send_fcm_message() missing config.")
-        return False
+        return results
 
-    # --- Load shared secret and push URL ---
+    # --- Load shared secret and push URL (LAN relay first, when configured) ---
     creds = CredentialsProvider()
     secret = creds.get_secret()
-    push_url = creds.get_push_arena_url()
+    push_url, direct_url = _push_urls(cfg, creds.get_push_arena_url())
 
     if not secret:
         logger.error("❌ Environment: WOW_SECRET missing.")
-        return False
+        return results
     if not push_url:
         logger.error("❌ PUSH_ARENA_URL missing.")
-        return False
+        return results
 
     # --- Metadata ---
     event_id = event_id or str(uuid.uuid4())
     server_time_ms = get_firebase_server_time(cfg=cfg)
     desktop_offset_ms = get_server_offset(cfg)
     adjusted_seconds = max(int(seconds), 0)
-    ends_at_ms = server_time_ms + adjusted_seconds * 1000
-
-    payload = {
-        "schema": "1",
-        "type": str(event_type),
-        "event": str(event_type),
-        "pairing_id": str(pairing_id),
-        "eventId": str(event_id),
-        "start_time": str(server_time_ms),
-        "endsAt": str(ends_at_ms),
-        "duration": str(adjusted_seconds),
-        "sentAtMs": str(server_time_ms),
-        "desktopOffset": str(desktop_offset_ms),
-    }
+    ends_at_ms = server_time_ms + remaining_ms(adjusted_seconds, deadline)
 
-    # Canonical JSON
-    msg = json.dumps(payload, separators=(",", ":"), ensure_ascii=False, sort_keys=True)
-    signature = _generate_signature(secret, msg)
-    msg_bytes = msg.encode("utf-8")
+    def post(pid: str) -> bool:
+        # pushArena rebuilds endsAt as arrival + duration → send what is left right now
+        duration_s = round(remaining_ms(adjusted_seconds, deadline) / 1000)
+        payload = build_payload(event_type, pid, event_id, server_time_ms, ends_at_ms,
+                                duration_s, desktop_offset_ms)
+        return _post_signed(push_url, secret, payload, fallback_url=direct_url,
+                            client_id=str(cfg.get("desktop_id", "")))
 
     secret_hash = hashlib.sha256(secret.encode("utf-8")).hexdigest()[:12]
 
-    logger.dev(f"pushArena event_type={event_type} adjusted_seconds={adjusted_seconds}s")
-    logger.dev(f"id={event_id} url={push_url} len={len(msg_bytes)} off={desktop_offset_ms} secret={secret_hash}")
-
-    headers = {
-        "Content-Type": "application/json; charset=utf-8",
-        "X-Signature": signature,
-    }
-
-    try:
-        response = requests.post(
-            push_url,
-            data=msg_bytes,
-            headers=headers,
-            timeout=10,
-        )
-        if response.status_code == 200:
-            logger.dev("POST OK (200)")
-            return True
-
-        # ------------------ ERROR DETAIL ------------------
-        logger.error(f"❌ pushArena rejected ({response.status_code})")
-        logger.dev(f"resp: {response.text}")
-
-        # Full payload only when error:
-        logger.dev(f"payload: {msg}")
-        logger.dev(f"hmac: {signature}")
-
-        return False
-
-    except Exception as e:
-        logger.error(f"❌ pushArena HTTPS error: {str(e)}")
+    logger.dev(f"pushArena event_type={event_type} adjusted_seconds={adjusted_seconds}s devices={len(pairing_ids)}")
+    logger.dev(f"id={event_id} url={push_url} off={desktop_offset_ms} secret={secret_hash}")
 
-        logger.dev(f"payload: {msg}")
-        logger.dev(f"hmac: {signature}")
+    if len(pairing_ids) == 1:
+        pid = pairing_ids[0]
+        results[pid] = post(pid)
+        return results
 
-        return False
+    futures = {pid: _get_pool().submit(post, pid) for pid in pairing_ids}
+    for pid, fut in futures.items():
+        try:
+            results[pid] = fut.result()
+        except Exception as e:
+            logger.dev(f"fan-out to {pid[:8]} crashed: {e}")
+    return results
@@ -43,14 +43,45 @@ def poll_for_device(device_url, stop_flag, timeout_s=60):
     return None, None
 
 
+def get_paired_devices(cfg=None):
+    """
+    Every paired device: the primary one (legacy top-level keys) first,
+    then `paired_devices`. Entries without a pairing_id are skipped.
+    """
+    cfg = cfg if cfg is not None else load_config()
+    devices = [{
+        "pairing_id": cfg.get("pairing_id", ""),
+        "device_id": cfg.get("device_id", ""),
+        "device_secret": cfg.get("device_secret", ""),
+    }] + list(cfg.get("paired_devices") or [])
+
+    seen = set()
+    result = []
+    for d in devices:
+        pid = (d or {}).get("pairing_id", "")
+        if pid and pid not in seen:
+            seen.add(pid)
+            result.append(d)
+    return result
+
+
+def get_pairing_ids(cfg=None):
+    return [d["pairing_id"] for d in get_paired_devices(cfg)]
+
+
 def finalize_pairing(pairing_id, device_id, device_secret):
     """Saves pairing result to config and updates RTDB with desktop_id."""
     cfg = load_config()
 
-    # store locally
-    cfg["pairing_id"] = pairing_id
-    cfg["device_id"] = device_id
-    cfg["device_secret"] = device_secret
+    # store locally: first device → primary keys, next ones → paired_devices
+    if not cfg.get("pairing_id"):
+        cfg["pairing_id"] = pairing_id
+        cfg["device_id"] = device_id
+        cfg["device_secret"] = device_secret
+    else:
+        extra = [d for d in cfg.get("paired_devices") or [] if d.get("pairing_id") != pairing_id]
+        extra.append({"pairing_id": pairing_id, "device_id": device_id, "device_secret": device_secret})
+        cfg["paired_devices"] = extra
     save_config(cfg)
 
     logger.user("🔐 Pairing data saved locally.")
@@ -71,15 +102,16 @@ def finalize_pairing(pairing_id, device_id, device_secret):
 
 
 def unpair_device():
-    """Removes pairing information from config."""
+    """Removes pairing information (every paired device) from config."""
     cfg = load_config()
 
-    had_pairing = bool(cfg.get("pairing_id"))
+    had_pairing = bool(get_paired_devices(cfg))
 
-    for key in ("pairing_id", "device_id", "device_secret"):
+    for key in ("pairing_id", "device_id", "device_secret", "paired_devices"):
         cfg.pop(key, None)
 
-    save_config(cfg)
+    # explicit wipe → bypass the "empty never overwrites" protection
+    save_config(cfg, protect=False)
 
     if had_pairing:
         logger.user("🔓 Device unpaired successfully.")
@@ -97,6 +129,7 @@ def get_pairing_status():
 
     return {
         "paired": paired,
+        "devices": len(get_paired_devices(cfg)),
         "pairing_id": pairing_id,
         "device_id": device_id,
         "device_secret": device_secret,
@@ -4,7 +4,7 @@ import time
 import requests
 from typing import Optional
 from infrastructure.logger import logger
-from services.time_sync import get_firebase_server_time
+from services.time_sync import get_firebase_server_time, remaining_ms
 from infrastructure.credentials_provider import CredentialsProvider
 
 def _safe_token_for_path(token: str) -> str:
@@ -16,6 +16,7 @@ def send_arena_event(
     pairing_id: str,
     event_id: str,
     cfg: Optional[dict] = None,
+    deadline: Optional[float] = None,
 ) -> dict | None:
     creds = CredentialsProvider()
     rtdb_url = creds.get_rtdb_url()
@@ -32,7 +33,7 @@ def send_arena_event(
 
         server_now_ms = get_firebase_server_time(cfg=cfg)
         adjusted_seconds = max(int(duration_sec), 0)
-        ends_at_ms = server_now_ms + adjusted_seconds * 1000
+        ends_at_ms = server_now_ms + remaining_ms(adjusted_seconds, deadline)
 
         payload = {
             "schema": "1",
@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""
+Optional LAN relay for pushArena (one per shop / LAN party):
+ • desktops POST their already signed payload over a keep-alive local connection
+   (set "relay_url": "http://<relay-host>:8787" in config.json)
+ • upstream POSTs run on the same event loop over a pool of keep-alive
+   HTTPS connections (opened on demand, UPSTREAM_WARM of them pinged while
+   idle), so no event pays a TCP + TLS handshake and none waits for a thread
+ • a repeated signed event (a desktop's retry after a lost response / timeout)
+   shares the upstream POST of the first copy instead of being sent twice
+ • per-client rate tracking, served as JSON at GET /stats
+ • events are forwarded one per POST: pushArena verifies one signed body per
+   request, so there is nothing to batch them into
+
+Run:  python -m services.push.relay_server [--port 8787] [--upstream URL]
+"""
+
+import argparse
+import asyncio
+import json
+import ssl
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from infrastructure.logger import logger
+from infrastructure.utils import ExpiringCache
+from infrastructure.credentials_provider import CredentialsProvider
+from services.firebase_notify import verify_signature
+
+RELAY_PORT = 8787
+UPSTREAM_CONNECTIONS = 256  # most upstream POSTs in flight at once
+UPSTREAM_WARM = 4           # idle connections kept open with a ping
+UPSTREAM_PING_S = 20        # ping a warm idle connection this often
+UPSTREAM_IDLE_S = 30        # close the other idle connections after this
+UPSTREAM_TIMEOUT_S = 10
+COALESCE_TTL_S = 5.0       # same (pairing_id, eventId, type) within this window → one POST
+COALESCE_MAX = 4096
+RATE_WINDOW_S = 60
+MAX_BODY = 64 * 1024
+
+_REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+            413: "Payload Too Large", 502: "Bad Gateway"}
+
+
+class _UpstreamPool:
+    """
+    Minimal asyncio HTTP/1.1 client for one upstream URL: keep-alive
+    connections reused most-recent-first, at most `size` requests in flight.
+    """
+
+    def __init__(self, url: str, size: int = UPSTREAM_CONNECTIONS,
+                 ssl_context: Optional[ssl.SSLContext] = None):
+        parts = urlsplit(url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if self.https else 80)
+        self.path = parts.path or "/"
+        self.host_header = parts.netloc
+        self.ssl = (ssl_context or ssl.create_default_context()) if self.https else None
+        self.size = size
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter, float]] = []
+        self.opened = 0
+        self.in_flight = 0
+        self.peak = 0
+
+    async def _open(self):
+        self.opened += 1
+        return await asyncio.open_connection(
+            self.host, self.port, ssl=self.ssl, server_hostname=self.host if self.https else None
+        )
+
+    async def request(self, method: str, path: str, body: bytes = b"", headers: Optional[dict] = None) -> int:
+        """→ HTTP status; raises on network errors / timeout."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            try:
+                return await asyncio.wait_for(self._request(method, path, body, headers or {}),
+                                              UPSTREAM_TIMEOUT_S)
+            finally:
+                self.in_flight -= 1
+
+    async def _request(self, method, path, body, headers) -> int:
+        while True:
+            reused = bool(self._idle)
+            reader, writer = self._idle.pop()[:2] if reused else await self._open()
+            try:
+                status, keep_alive = await self._exchange(reader, writer, method, path, body, headers)
+            except (ConnectionError, asyncio.IncompleteReadError, OSError, ValueError):
+                writer.close()
+                if reused:
+                    continue        # the server closed an idle keep-alive socket → next / new one
+                raise
+            except BaseException:   # timeout / cancel mid-response: the socket is unusable
+                writer.close()
+                raise
+            if keep_alive:
+                self._idle.append((reader, writer, time.monotonic()))
+            else:
+                writer.close()
+            return status
+
+    async def _exchange(self, reader, writer, method, path, body, headers) -> tuple[int, bool]:
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host_header}", f"Content-Length: {len(body)}"]
+        head += [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("upstream closed the connection")
+        status = int(status_line.split()[1])
+        resp_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            resp_headers[key.strip().lower()] = value.strip().lower()
+
+        keep_alive = resp_headers.get("connection") != "close"
+        if "chunked" in resp_headers.get("transfer-encoding", ""):
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif "content-length" in resp_headers:
+            await reader.readexactly(int(resp_headers["content-length"]))
+        else:
+            await reader.read()     # body runs until the server closes
+            keep_alive = False
+        return status, keep_alive
+
+    async def keep_warm(self):
+        """
+        Keep UPSTREAM_WARM idle connections open (ping the ones idle for
+        UPSTREAM_PING_S, open missing ones), close the other idle ones once stale.
+        """
+        now = time.monotonic()
+        for conn in self._idle[:-UPSTREAM_WARM]:
+            if now - conn[2] > UPSTREAM_IDLE_S:
+                self._idle.remove(conn)
+                conn[1].close()
+
+        ping = f"{self.path.rstrip('/')}/ping"
+        for conn in self._idle[-UPSTREAM_WARM:]:
+            if now - conn[2] < UPSTREAM_PING_S or conn not in self._idle:
+                continue
+            self._idle.remove(conn)
+            reader, writer, _ = conn
+            try:
+                _, keep_alive = await asyncio.wait_for(
+                    self._exchange(reader, writer, "GET", ping, b"", {}), UPSTREAM_TIMEOUT_S)
+            except Exception:
+                keep_alive = False
+            if keep_alive:
+                self._idle.append((reader, writer, time.monotonic()))
+            else:
+                writer.close()
+
+        missing = UPSTREAM_WARM - len(self._idle)
+        if missing > 0:
+            results = await asyncio.gather(*(self.request("GET", ping) for _ in range(missing)),
+                                           return_exceptions=True)
+            errors = [r for r in results if isinstance(r, BaseException)]
+            if errors:
+                logger.dev(f"relay upstream warm-up failed: {errors[0]!r}")
+
+    def close(self):
+        for _, writer, _ in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+class _ClientRate:
+    __slots__ = ("events", "coalesced", "window", "last_seen")
+
+    def __init__(self):
+        self.events = 0
+        self.coalesced = 0
+        self.window: deque = deque()
+        self.last_seen = 0.0
+
+    def hit(self, now: float):
+        self.events += 1
+        self.last_seen = now
+        self.window.append(now)
+        while self.window and self.window[0] < now - RATE_WINDOW_S:
+            self.window.popleft()
+
+
+class RelayServer:
+    """asyncio front end and upstream on one loop; upstream connections stay warm."""
+
+    def __init__(self, upstream_url: str, secret: Optional[str] = None,
+                 connections: int = UPSTREAM_CONNECTIONS, ssl_context: Optional[ssl.SSLContext] = None):
+        self.upstream_url = upstream_url
+        self.secret = secret
+        self._upstream = _UpstreamPool(upstream_url, connections, ssl_context)
+        self._warm_task: Optional[asyncio.Task] = None
+
+        self._inflight = ExpiringCache(COALESCE_TTL_S, COALESCE_MAX)
+        self.clients: dict[str, _ClientRate] = {}
+        self.stats = {"received": 0, "forwarded": 0, "coalesced": 0, "rejected": 0,
+                      "upstream_errors": 0, "upstream_ms": 0.0}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # ------------------------------------------------------------------
+    async def start(self, host: str = "0.0.0.0", port: int = RELAY_PORT) -> asyncio.AbstractServer:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self._warm_task = asyncio.get_running_loop().create_task(self._keep_warm())
+        bound = self._server.sockets[0].getsockname()
+        logger.user(f"📡 Relay listening on {bound[0]}:{bound[1]} → {self.upstream_url}")
+        return self._server
+
+    async def serve_forever(self, host: str = "0.0.0.0", port: int = RELAY_PORT):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def _keep_warm(self):
+        while True:
+            await self._upstream.keep_warm()
+            await asyncio.sleep(UPSTREAM_PING_S / 2)
+
+    def close(self):
+        if self._server:
+            self._server.close()
+        if self._warm_task:
+            self._warm_task.cancel()
+        self._upstream.close()
+
+    # ------------------------------------------------------------------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Minimal HTTP/1.1 with keep-alive: one connection serves many events."""
+        peer = (writer.get_extra_info("peername") or ("?",))[0]
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {"error": "too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, resp = await self._route(method, path, headers, body, peer)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, resp, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            logger.dev(f"relay connection error ({peer}): {e}")
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status: int, data: dict, keep_alive: bool = True):
+        body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _route(self, method: str, path: str, headers: dict, body: bytes, peer: str):
+        path = path.split("?", 1)[0].rstrip("/")
+        if method == "GET" and path in ("/health", "/pushArena/ping"):
+            return 200, {"ok": True}
+        if method == "GET" and path == "/stats":
+            return 200, self.snapshot()
+        if method == "POST" and path == "/pushArena":
+            return await self._push(headers, body, headers.get("x-client-id") or peer)
+        return 404, {"error": "not found"}
+
+    # ------------------------------------------------------------------
+    async def _push(self, headers: dict, body: bytes, client_id: str):
+        now = time.monotonic()
+        self.stats["received"] += 1
+        rate = self.clients.get(client_id)
+        if rate is None:
+            rate = self.clients[client_id] = _ClientRate()
+        rate.hit(now)
+
+        signature = headers.get("x-signature", "")
+        if self.secret and not verify_signature(self.secret, body, signature):
+            self.stats["rejected"] += 1
+            return 401, {"error": "bad signature"}
+
+        try:
+            payload = json.loads(body)
+            key = (payload["pairing_id"], payload["eventId"], payload["type"])
+        except (ValueError, KeyError, TypeError):
+            self.stats["rejected"] += 1
+            return 400, {"error": "bad payload"}
+
+        fut = self._inflight.get(key, now=now)
+        coalesced = fut is not None
+        if coalesced:
+            self.stats["coalesced"] += 1
+            rate.coalesced += 1
+        else:
+            fut = asyncio.ensure_future(self._forward(body, signature))
+            self._inflight.put(key, fut, now=now)
+
+        # a sender hanging up must not cancel the POST its retries share
+        status, upstream_ms = await asyncio.shield(fut)
+        if not coalesced:
+            # bookkeeping stays on the loop thread
+            self.stats["forwarded"] += 1
+            self.stats["upstream_ms"] += upstream_ms
+            if status != 200:
+                self.stats["upstream_errors"] += 1
+        if status != 200:
+            # never serve a cached failure to the sender's retry
+            self._inflight.pop(key)
+            return 502 if status >= 500 or status == 0 else status, {"ok": False, "upstream": status}
+        return 200, {"ok": True, "coalesced": coalesced}
+
+    async def _forward(self, body: bytes, signature: str) -> tuple[int, float]:
+        """→ (HTTP status or 0 on network error / timeout, ms)."""
+        t0 = time.perf_counter()
+        try:
+            status = await self._upstream.request(
+                "POST", self._upstream.path, body,
+                {"Content-Type": "application/json; charset=utf-8", "X-Signature": signature},
+            )
+        except Exception as e:
+            logger.dev(f"relay upstream error: {e!r}")
+            status = 0
+        return status, (time.perf_counter() - t0) * 1000
+
+    # ------------------------------------------------------------------
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        s = dict(self.stats)
+        s["upstream_avg_ms"] = round(s.pop("upstream_ms") / s["forwarded"], 1) if s["forwarded"] else 0
+        s["upstream_connections"] = {"opened": self._upstream.opened, "idle": len(self._upstream._idle),
+                                     "peak_in_flight": self._upstream.peak}
+        s["clients"] = {
+            cid: {
+                "events": r.events,
+                "coalesced": r.coalesced,
+                "per_min": sum(1 for t in r.window if t >= now - RATE_WINDOW_S),
+                "idle_s": round(now - r.last_seen, 1),
+            }
+            for cid, r in self.clients.items()
+        }
+        return s
+
+
+def main(argv=None):
+    creds = CredentialsProvider()
+    ap = argparse.ArgumentParser(description="LAN relay for pushArena")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=RELAY_PORT)
+    ap.add_argument("--upstream", default=creds.get_push_arena_url())
+    ap.add_argument("--no-verify", action="store_true", help="forward without checking the HMAC")
+    args = ap.parse_args(argv)
+
+    relay = RelayServer(args.upstream, secret=None if args.no_verify else creds.get_secret() or None)
+    try:
+        asyncio.run(relay.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.dev(f"relay stats: {json.dumps(relay.snapshot())}")
+        relay.close()
+
+
+if __name__ == "__main__":
+    main()
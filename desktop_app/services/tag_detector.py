@@ -1,37 +1,431 @@
 # -*- coding: utf-8 -*-
+"""
+Border tag detection:
+ • legacy rim  → mostly green (POP) / mostly red (STOP) on the border
+ • coded rim   → top edge split into segments: blue start marker + 15 bits
+                 (2 type | 6 seq | 3 meta | 4 checksum), white = 1, black = 0
+Both are read from the same border samples; sampling is progressive
+(coarse top row first, refine only when ambiguous).
+warm_up() preloads the codecs and primes the decode path before the first pop.
+TagDetector keeps per-thread sample buffers and a shared decode memory budget.
+"""
+
+import io
+import threading
+import time
+from array import array
+from typing import NamedTuple
 from PIL import Image
 from infrastructure.logger import logger
 
-def _detect_border_color(img):
-    w, h = img.size
-    sampling = 10
-
-    border_pixels = []
-    for x in range(0, w, sampling):
-        border_pixels.append(img.getpixel((x, 0)))
-        border_pixels.append(img.getpixel((x, h - 1)))
-    for y in range(0, h, sampling):
-        border_pixels.append(img.getpixel((0, y)))
-        border_pixels.append(img.getpixel((w - 1, y)))
-
-    green_hits = red_hits = 0
-    for px in border_pixels:
-        r, g, b = px
-        if g > 200 and r < 50 and b < 50:
-            green_hits += 1
-        if r > 200 and g < 50 and b < 50:
-            red_hits += 1
-
-    if green_hits > 3:
+CODE_SEGMENTS = 16          # 1 marker + 15 bits
+CODE_BITS = CODE_SEGMENTS - 1
+
+EDGE_SAMPLES = 64           # coarse pass: ~4 samples per code segment at any resolution
+FINE_STRIDE = 10            # legacy stride, used only to refine ambiguous results
+HIT_THRESHOLD = 3           # > 3 green/red hits decides
+
+DETECT_BUDGET_BYTES = 256 * 1024 * 1024   # decoded frames in flight (a 5K frame ≈ 56 MiB)
+BUDGET_WAIT_S = 5.0
+DIRECT_MODES = ("RGB", "RGBA")            # scanned without conversion
+
+_TYPE_TO_EVENT = {0b01: "arena_pop", 0b10: "arena_stop"}
+_EVENT_TO_TYPE = {v: k for k, v in _TYPE_TO_EVENT.items()}
+
+COLOR_POP = (0, 255, 0)
+COLOR_STOP = (255, 0, 0)
+COLOR_MARKER = (0, 0, 255)
+COLOR_ONE = (255, 255, 255)
+COLOR_ZERO = (0, 0, 0)
+
+# sample classes
+_GREEN, _RED, _MARKER, _ONE, _ZERO, _OTHER = range(6)
+_CLASSES = 6
+_ZERO_COUNTS = array("I", [0]) * _CLASSES
+_ZERO_VOTES = array("I", [0]) * (_CLASSES * CODE_SEGMENTS)
+
+_stats_lock = threading.Lock()
+_stats = {"decisions": 0, "pixels": 0, "over_budget": 0, "detects": 0, "detect_ms": 0.0, "first_ms": None, "warm_ms": None}
+
+# screenshot formats WoW writes (watcher.SCREENSHOT_EXT) → Pillow encoder
+WARM_FORMATS = {".png": "PNG", ".jpg": "JPEG", ".tga": "TGA", ".bmp": "BMP"}
+WARM_SIZE = (64, 36)
+_warm_lock = threading.Lock()
+
+
+class BorderCode(NamedTuple):
+    event: str
+    seq: int     # 0..63, wraps
+    meta: int    # 0..7 (e.g. bracket / queue slot)
+
+
+def _classify(px) -> int:
+    r, g, b = px[:3]
+    if g > 200 and r < 50 and b < 50:
+        return _GREEN
+    if r > 200 and g < 50 and b < 50:
+        return _RED
+    if b > 200 and r < 50 and g < 50:
+        return _MARKER
+    if r > 200 and g > 200 and b > 200:
+        return _ONE
+    if r < 50 and g < 50 and b < 50:
+        return _ZERO
+    return _OTHER
+
+
+def _checksum(data: int) -> int:
+    """4-bit checksum over the 11 data bits (never 0 for all-zero data)."""
+    return (((data & 0xF) + ((data >> 4) & 0xF) + ((data >> 8) & 0x7)) & 0xF) ^ 0x5
+
+
+def encode_border_code(event: str, seq: int, meta: int = 0) -> list[int]:
+    """Return the 15 code bits (MSB first) for the top-edge segments."""
+    data = (_EVENT_TO_TYPE[event] << 9) | ((seq & 0x3F) << 3) | (meta & 0x7)
+    value = (data << 4) | _checksum(data)
+    return [(value >> (CODE_BITS - 1 - i)) & 1 for i in range(CODE_BITS)]
+
+
+def _majority(votes, base: int = 0) -> int | None:
+    """Winning class of one segment (votes[base:base + _CLASSES]) if it has > 50 %."""
+    total = best = 0
+    cls = None
+    for i in range(_CLASSES):
+        v = votes[base + i]
+        total += v
+        if v > best:
+            best, cls = v, i
+    return cls if total and best * 2 > total else None
+
+
+def _decode_votes(votes) -> BorderCode | None:
+    if _majority(votes, 0) != _MARKER:
+        return None
+
+    value = 0
+    for seg in range(1, CODE_SEGMENTS):
+        cls = _majority(votes, seg * _CLASSES)
+        if cls not in (_ONE, _ZERO):
+            return None
+        value = (value << 1) | (cls == _ONE)
+
+    data, chk = value >> 4, value & 0xF
+    event = _TYPE_TO_EVENT.get(data >> 9)
+    if not event or chk != _checksum(data):
+        return None
+    return BorderCode(event, (data >> 3) & 0x3F, data & 0x7)
+
+
+def _decide(counts) -> str | None:
+    if counts[_GREEN] > HIT_THRESHOLD:
         return "arena_pop"
-    if red_hits > 3:
+    if counts[_RED] > HIT_THRESHOLD:
         return "arena_stop"
     return None
 
-def detect_tag(path: str) -> str | None:
+
+def _coarse_stride(n: int) -> int:
+    return max(1, n // EDGE_SAMPLES)
+
+
+def _new_buffers() -> tuple[array, array]:
+    """(class counts, per-segment votes) — flat, reset in place by the scans."""
+    return array("I", _ZERO_COUNTS), array("I", _ZERO_VOTES)
+
+
+def _reset(counts: array, votes: array):
+    counts[:] = _ZERO_COUNTS
+    votes[:] = _ZERO_VOTES
+
+
+def _scan_border_full(img, px=None, counts=None, votes=None) -> tuple[str | None, BorderCode | None, int]:
+    """Legacy full pass: every FINE_STRIDE-th pixel on all four edges."""
+    w, h = img.size
+    px = px or img.load()
+
+    if counts is None:
+        counts, votes = _new_buffers()
+    _reset(counts, votes)
+    touched = 0
+
+    for x in range(0, w, FINE_STRIDE):
+        top = _classify(px[x, 0])
+        counts[top] += 1
+        votes[(x * CODE_SEGMENTS // w) * _CLASSES + top] += 1
+        counts[_classify(px[x, h - 1])] += 1
+        touched += 2
+    for y in range(0, h, FINE_STRIDE):
+        counts[_classify(px[0, y])] += 1
+        counts[_classify(px[w - 1, y])] += 1
+        touched += 2
+
+    code = _decode_votes(votes)
+    if code:
+        return code.event, code, touched
+    return _decide(counts), None, touched
+
+
+def _scan_border(img, counts=None, votes=None) -> tuple[str | None, BorderCode | None, int]:
+    """
+    Progressive pass, returns (event, code, pixels touched):
+      1) top row at a coarse, resolution-aware stride — decodes the code or
+         exits as soon as a solid rim passes the hit threshold
+      2) remaining edges at the same stride, still with early exit
+      3) legacy fine pass only when the result is ambiguous
+    `counts`/`votes` are caller-owned buffers (see TagDetector), reset here.
+    """
+    w, h = img.size
+    px = img.load()
+
+    if counts is None:
+        counts, votes = _new_buffers()
+    _reset(counts, votes)
+    touched = 0
+    coded = None
+
+    stride = _coarse_stride(w)
+    for x in range(0, w, stride):
+        c = _classify(px[x, 0])
+        counts[c] += 1
+        votes[(x * CODE_SEGMENTS // w) * _CLASSES + c] += 1
+        touched += 1
+
+        if coded is None and (x + stride) * CODE_SEGMENTS // w >= 1:
+            coded = _majority(votes, 0) == _MARKER
+        if coded is False:
+            event = _decide(counts)
+            if event:
+                return event, None, touched
+
+    if coded:
+        code = _decode_votes(votes)
+        if code:
+            return code.event, code, touched
+        event, code, n = _scan_border_full(img, px, counts, votes)
+        return event, code, touched + n
+
+    for x in range(0, w, stride):
+        counts[_classify(px[x, h - 1])] += 1
+        touched += 1
+        event = _decide(counts)
+        if event:
+            return event, None, touched
+
+    for y in range(0, h, _coarse_stride(h)):
+        counts[_classify(px[0, y])] += 1
+        counts[_classify(px[w - 1, y])] += 1
+        touched += 2
+        event = _decide(counts)
+        if event:
+            return event, None, touched
+
+    # a few hits below the threshold → refine; nothing at all → untagged
+    if counts[_GREEN] or counts[_RED]:
+        event, code, n = _scan_border_full(img, px, counts, votes)
+        return event, code, touched + n
+    return None, None, touched
+
+
+def _record(touched: int):
+    with _stats_lock:
+        _stats["decisions"] += 1
+        _stats["pixels"] += touched
+
+
+def get_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _detect_border_color(img):
+    event, _, touched = _scan_border(img)
+    _record(touched)
+    return event
+
+
+def _record_latency(ms: float):
+    with _stats_lock:
+        if _stats["first_ms"] is None:
+            _stats["first_ms"] = ms
+        _stats["detects"] += 1
+        _stats["detect_ms"] += ms
+
+
+class _MemoryBudget:
+    """Bytes of decoded frames allowed in flight across every detect thread."""
+
+    def __init__(self, limit: int):
+        self.limit = int(limit)
+        self.used = 0
+        self.peak = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, n: int, timeout: float = BUDGET_WAIT_S) -> bool:
+        if n > self.limit:
+            return False
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.used + n <= self.limit, timeout):
+                return False
+            self.used += n
+            self.peak = max(self.peak, self.used)
+            return True
+
+    def release(self, n: int):
+        with self._cond:
+            self.used -= n
+            self._cond.notify_all()
+
+
+_budget = _MemoryBudget(DETECT_BUDGET_BYTES)
+
+
+class TagDetector:
+    """
+    Reusable detector (one per thread, see get_detector):
+    • sample buffers allocated once and reset in place
+    • decoded frame counted against a shared memory budget before decoding
+      (the header gives the size), so concurrent 5K decodes can't pile up
+    • RGB/RGBA frames are scanned as decoded — no full-frame RGB copy
+    • file handle, mmap and pixel memory released before returning, so the
+      screenshot is never left locked for the deleter
+    """
+
+    def __init__(self, budget: _MemoryBudget | None = None):
+        self.budget = budget or _budget
+        self.counts, self.votes = _new_buffers()
+
+    def scan(self, path) -> tuple[str | None, BorderCode | None, int]:
+        """(event, code, pixels touched); `path`: file name or binary file object."""
+        with Image.open(path) as im:
+            try:
+                w, h = im.size
+                need = w * h * 4                      # Pillow stores RGB as 4 bytes/px
+                if im.mode not in DIRECT_MODES:
+                    need *= 2                         # decoded frame + RGB copy
+                if not self.budget.acquire(need):
+                    with _stats_lock:
+                        _stats["over_budget"] += 1
+                    logger.dev(f"detect_tag skipped {path}: {w}x{h} over the memory budget")
+                    return None, None, 0
+                try:
+                    im.load()
+                    img = im if im.mode in DIRECT_MODES else im.convert("RGB")
+                    try:
+                        event, code, touched = _scan_border(img, self.counts, self.votes)
+                    finally:
+                        if img is not im:
+                            img.close()
+                finally:
+                    self.budget.release(need)
+            finally:
+                im.close()
+        return event, code, touched
+
+
+_local = threading.local()
+
+
+def get_detector() -> TagDetector:
+    det = getattr(_local, "detector", None)
+    if det is None:
+        det = _local.detector = TagDetector()
+    return det
+
+
+def detect_tag_ex(path: str) -> tuple[str | None, BorderCode | None]:
+    """Tag plus decoded border code (code is None for legacy solid rims)."""
+    t0 = time.perf_counter()
     try:
-        img = Image.open(path).convert("RGB")
-        return _detect_border_color(img)
+        event, code, touched = get_detector().scan(path)
+        _record(touched)
+        return event, code
     except Exception as e:
         logger.dev(f"detect_tag failed for {path}: {e}")
-        return None
+        return None, None
+    finally:
+        _record_latency((time.perf_counter() - t0) * 1000)
+
+
+def detect_tag(path: str) -> str | None:
+    return detect_tag_ex(path)[0]
+
+
+def warm_up() -> float:
+    """
+    Pay the first-call costs before the first pop: plugin imports and
+    registration (TGA has no magic bytes → Image.open falls back to the full
+    Image.init()), decoder setup per format and the scan path itself.
+    Samples are rendered in memory, nothing is shipped or written to disk.
+    Runs once; returns the time spent in ms (0 when already warm).
+    """
+    with _warm_lock:
+        if _stats["warm_ms"] is not None:
+            return 0.0
+        t0 = time.perf_counter()
+        detector = get_detector()      # this thread's buffers, allocated now
+        sample = render_tagged_image(WARM_SIZE, event="arena_pop", seq=1)
+        for ext, fmt in WARM_FORMATS.items():
+            try:
+                buf = io.BytesIO()
+                sample.save(buf, fmt, **({"quality": 95} if fmt == "JPEG" else {}))
+                buf.seek(0)
+                event, _, _ = detector.scan(buf)
+                if event != "arena_pop":
+                    logger.dev(f"detector warm-up: {ext} sample read as {event}")
+            except Exception as e:
+                logger.dev(f"detector warm-up: {ext} failed: {e}")
+        for img in (render_tagged_image(WARM_SIZE, event="arena_stop"),   # solid-rim branch
+                    render_tagged_image(WARM_SIZE)):                      # untagged branch
+            _scan_border(img, detector.counts, detector.votes)
+        ms = (time.perf_counter() - t0) * 1000
+        with _stats_lock:
+            _stats["warm_ms"] = ms
+        logger.dev(f"detector warm-up: {ms:.0f} ms ({', '.join(WARM_FORMATS)})")
+        return ms
+
+
+def latency_summary_string() -> str:
+    s = get_stats()
+    if not s["detects"]:
+        return "detect: none"
+    warm = f"{s['warm_ms']:.0f}ms" if s["warm_ms"] is not None else "off"
+    return (f"detect: first={s['first_ms']:.1f}ms avg={s['detect_ms'] / s['detects']:.1f}ms "
+            f"n={s['detects']} warm-up={warm}")
+
+
+# -------------------------------------------------------------------------
+# Test image generator
+# -------------------------------------------------------------------------
+def render_tagged_image(
+    size: tuple[int, int] = (1920, 1080),
+    event: str | None = None,
+    seq: int | None = None,
+    meta: int = 0,
+    rim: int = 2,
+    background: tuple[int, int, int] = (40, 40, 40),
+) -> Image.Image:
+    """
+    Draw a screenshot the way the addon does: solid rim for `event`
+    (None → untagged) and, when `seq` is given, the coded top edge.
+    """
+    w, h = size
+    img = Image.new("RGB", size, background)
+    if not event:
+        return img
+
+    color = COLOR_POP if event == "arena_pop" else COLOR_STOP
+    img.paste(color, (0, 0, w, rim))
+    img.paste(color, (0, h - rim, w, h))
+    img.paste(color, (0, 0, rim, h))
+    img.paste(color, (w - rim, 0, w, h))
+
+    if seq is not None:
+        colors = [COLOR_MARKER] + [
+            COLOR_ONE if bit else COLOR_ZERO for bit in encode_border_code(event, seq, meta)
+        ]
+        for i, c in enumerate(colors):
+            x0 = i * w // CODE_SEGMENTS
+            x1 = (i + 1) * w // CODE_SEGMENTS
+            img.paste(c, (x0, 0, x1, rim))
+
+    return img
@@ -1,46 +1,247 @@
 # -*- coding: utf-8 -*-
-# Firebase server time via .info/serverTimeOffset, cached
+# Firebase server time: NTP-style estimate, cached
+#  • several samples per sync, only the minimum-RTT ones are kept
+#  • offset taken at the request midpoint → error ≤ RTT/2 by construction
+#  • server time extrapolated on time.monotonic() (immune to wall clock jumps),
+#    with the rate drift measured over the sync history (and its own error bar)
+#  • every sync runs in the background, pops never wait for it
+#  • read-only by default: pushArena's GET /ping answers with the server's
+#    Date.now() (the clock endsAt is checked against); the RTDB ".sv" timestamp
+#    write to clock_sync/<desktop_id> only with config "clock_sync_probe": true
+import threading
 import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+
 import requests
 from infrastructure.logger import logger
 from infrastructure.credentials_provider import CredentialsProvider
 
 _CACHE_TTL = 300
-_last_offset = 0
-_last_sync_time = 0
+SYNC_SAMPLES = 5
+SYNC_KEEP = 2                # minimum-RTT samples averaged into the estimate
+DRIFT_HISTORY = 12           # syncs kept for the rate estimate (~1 h at the TTL)
+DRIFT_MAX_PPM = 500          # anything larger is a broken sample, not a crystal
+DRIFT_BOUND_PPM = 100        # error growth between syncs until drift is measured
+DRIFT_RESIDUAL_PPM = 5       # rate wander on top of the measured drift's error bar
+RETRY_AFTER_FAIL_S = 30      # offline: don't stall every pop on a dead endpoint
+
+# (server_ms, sent_wall_ms, sent_mono, rtt_ms, source); raises on failure
+Sample = tuple[int, float, float, float, str]
+
+
+@dataclass
+class ClockEstimate:
+    offset_ms: float             # server - local wall clock, at the anchor
+    uncertainty_ms: float        # |true offset - offset_ms| bound at the anchor
+    rtt_ms: float                # best round trip
+    samples: int                 # taken
+    kept: int
+    source: str
+    anchor_mono: float
+    anchor_server_ms: float
+    drift_ppm: Optional[float] = None
+    drift_error_ppm: float = DRIFT_BOUND_PPM
+
+    def server_time_ms(self, mono: Optional[float] = None) -> float:
+        elapsed = (time.monotonic() if mono is None else mono) - self.anchor_mono
+        rate = 1 + (self.drift_ppm or 0) * 1e-6
+        return self.anchor_server_ms + elapsed * 1000 * rate
+
+    def error_bound_ms(self, mono: Optional[float] = None) -> float:
+        elapsed = abs((time.monotonic() if mono is None else mono) - self.anchor_mono)
+        return self.uncertainty_ms + elapsed * 1000 * self.drift_error_ppm * 1e-6
+
+    def age_s(self) -> float:
+        return time.monotonic() - self.anchor_mono
+
+    def summary_string(self) -> str:
+        drift = (f"{self.drift_ppm:+.1f}±{self.drift_error_ppm:.0f}ppm"
+                 if self.drift_ppm is not None else "n/a")
+        return (f"offset={self.offset_ms:+.0f}ms ±{self.error_bound_ms():.0f}ms "
+                f"rtt={self.rtt_ms:.0f}ms kept={self.kept}/{self.samples} "
+                f"drift={drift} src={self.source} age={self.age_s():.0f}s")
+
+
+class ClockEstimator:
+    def __init__(self, sampler: Callable[[], Sample], samples: int = SYNC_SAMPLES, keep: int = SYNC_KEEP):
+        self.sampler = sampler
+        self.samples = samples
+        self.keep = keep
+        self.estimate: Optional[ClockEstimate] = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._failed_at: Optional[float] = None
+        self._history: deque[ClockEstimate] = deque(maxlen=DRIFT_HISTORY)
+
+    def sync(self) -> Optional[ClockEstimate]:
+        taken = []
+        for _ in range(self.samples):
+            try:
+                taken.append(self.sampler())
+            except Exception as e:
+                logger.dev(f"clock sample failed: {e}")
+                break       # endpoint down → no point in the remaining samples
+        if not taken:
+            self._failed_at = time.monotonic()
+            return None
+        self._failed_at = None
+
+        # the fastest round trips carry the least path asymmetry
+        best = sorted(taken, key=lambda s: s[3])[:self.keep]
+        offsets = [server - (sent + rtt / 2) for server, sent, _, rtt, _ in best]
+        offset = sum(offsets) / len(offsets)
+        # each midpoint is within rtt/2 of the truth → so is their mean
+        uncertainty = max(rtt / 2 for *_, rtt, _ in best)
+        _, sent0, mono0, rtt0, source = best[0]
+        anchor_mono = mono0 + rtt0 / 2000
+        anchor_server = sent0 + rtt0 / 2 + offset
+
+        est = ClockEstimate(offset, uncertainty, rtt0, len(taken), len(best), source,
+                            anchor_mono, anchor_server)
+        with self._lock:
+            # rate against the oldest anchor: the longer the span, the smaller
+            # the anchors' error bars weigh in (u_old + u_new) / span
+            if self._history:
+                old = self._history[0]
+                span_ms = (anchor_mono - old.anchor_mono) * 1000
+                if span_ms > 0:
+                    ppm = ((anchor_server - old.anchor_server_ms) / span_ms - 1) * 1e6
+                    error = (old.uncertainty_ms + uncertainty) / span_ms * 1e6 + DRIFT_RESIDUAL_PPM
+                    if abs(ppm) <= DRIFT_MAX_PPM and error < DRIFT_BOUND_PPM:
+                        est.drift_ppm, est.drift_error_ppm = ppm, error
+            self._history.append(est)
+            self.estimate = est
+        logger.dev(f"clock sync: {est.summary_string()}")
+        return est
+
+    def get(self, max_age_s: float = _CACHE_TTL) -> Optional[ClockEstimate]:
+        """
+        Current estimate (None until the first sync lands). A missing or stale
+        one starts the single background sync; the caller never waits for it.
+        """
+        with self._lock:
+            est = self.estimate
+            stale = est is None or est.age_s() > max_age_s
+            backing_off = (est is None and self._failed_at is not None
+                           and time.monotonic() - self._failed_at < RETRY_AFTER_FAIL_S)
+            start = stale and not self._refreshing and not backing_off
+            if start:
+                self._refreshing = True
+        if start:
+            threading.Thread(target=self._refresh, daemon=True, name="clock-sync").start()
+        return est
+
+    def _refresh(self):
+        try:
+            self.sync()
+        finally:
+            self._refreshing = False
+
+
+_session: Optional[requests.Session] = None
+_estimators: dict[tuple[str, str], ClockEstimator] = {}
+_estimators_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        _session = requests.Session()
+    return _session
+
+
+def _ping_sampler(push_url: str) -> Callable[[], Sample]:
+    """
+    Timed GETs of pushArena's /ping health route (read-only): its `ts` is
+    stamped while the request is in flight, so the midpoint / RTT bound applies.
+    """
+    url = f"{push_url.rstrip('/')}/ping"
+
+    def sample() -> Sample:
+        sent, mono = time.time() * 1000, time.monotonic()
+        resp = _get_session().get(url, timeout=5)
+        rtt = (time.monotonic() - mono) * 1000
+        resp.raise_for_status()
+        return int(resp.json()["ts"]), sent, mono, rtt, "ping"
+
+    return sample
+
+
+def _rtdb_sampler(rtdb_url: str, desktop_id: str) -> Callable[[], Sample]:
+    """
+    RTDB server time via a {".sv": "timestamp"} write to clock_sync/<desktop_id>,
+    resolved while the request is in flight (needs write rules for clock_sync/).
+    """
+    url = f"{rtdb_url.rstrip('/')}/clock_sync/{desktop_id or 'anonymous'}.json"
+
+    def sample() -> Sample:
+        sent, mono = time.time() * 1000, time.monotonic()
+        resp = _get_session().put(url, json={".sv": "timestamp"}, timeout=5)
+        rtt = (time.monotonic() - mono) * 1000
+        resp.raise_for_status()
+        return int(resp.json()), sent, mono, rtt, "sv"
+
+    return sample
+
+
+def get_clock_estimator(cfg: dict = None) -> Optional[ClockEstimator]:
+    """pushArena /ping by default, the RTDB write with "clock_sync_probe": true."""
+    cfg = cfg or {}
+    creds = CredentialsProvider()
+    if cfg.get("clock_sync_probe", False):
+        url, desktop_id = creds.get_rtdb_url(), str(cfg.get("desktop_id", ""))
+        make = lambda: _rtdb_sampler(url, desktop_id)
+    else:
+        url, desktop_id = creds.get_push_arena_url(), ""
+        make = lambda: _ping_sampler(url)
+    if not url:
+        return None
+    key = (url, desktop_id)
+    with _estimators_lock:
+        est = _estimators.get(key)
+        if est is None:
+            est = _estimators[key] = ClockEstimator(make())
+        return est
+
+
+def get_clock_estimate(cfg: dict = None, force: bool = False) -> Optional[ClockEstimate]:
+    estimator = get_clock_estimator(cfg)
+    if estimator is None:
+        return None
+    return estimator.sync() if force else estimator.get()
+
+
+def warm_clock_sync(cfg: dict = None):
+    """Start the first sync at listener start, so the first POP already has an estimate."""
+    try:
+        get_clock_estimate(cfg)
+    except Exception as e:
+        logger.dev(f"clock warm-up failed: {e}")
+
 
 def get_firebase_server_time(cfg: dict = None) -> int:
     try:
-        provider = CredentialsProvider()
-        rtdb_url = provider.get_rtdb_url()
-        if not rtdb_url:
+        est = get_clock_estimate(cfg)
+        if est is None:
             return int(time.time() * 1000)
-
-        ts_url = f"{rtdb_url}/.info/serverTimeOffset.json"
-        resp = requests.get(ts_url, timeout=5)
-        if resp.ok:
-            offset_ms = int(resp.text)
-            return int(time.time() * 1000) + offset_ms
-        return int(time.time() * 1000)
+        return int(est.server_time_ms())
     except Exception:
         return int(time.time() * 1000)
 
+
 def get_server_offset(cfg: dict = None) -> int:
-    global _last_offset, _last_sync_time
-    now = time.time()
-    if now - _last_sync_time < _CACHE_TTL:
-        return _last_offset
     try:
-        provider = CredentialsProvider()
-        rtdb_url = provider.get_rtdb_url()
-        if not rtdb_url:
+        est = get_clock_estimate(cfg)
+        if est is None:
             return 0
-        ts_url = f"{rtdb_url}/.info/serverTimeOffset.json"
-        resp = requests.get(ts_url, timeout=5)
-        if resp.ok:
-            _last_offset = int(resp.text)
-            _last_sync_time = now
-            return _last_offset
-        return 0
+        return int(round(est.server_time_ms() - time.time() * 1000))
     except Exception:
         return 0
+
+def remaining_ms(seconds: int, deadline: float | None = None) -> int:
+    """Milliseconds left until a time.monotonic() deadline (or plain seconds)."""
+    if deadline is None:
+        return int(seconds) * 1000
+    return max(int(round((deadline - time.monotonic()) * 1000)), 0)
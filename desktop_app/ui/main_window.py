@@ -7,18 +7,22 @@ import requests
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QTabWidget, QApplication, QMessageBox, QLabel
 )
-from PySide6.QtGui import QIcon
+from PySide6.QtGui import QIcon, QKeySequence, QShortcut
 from PySide6.QtCore import Qt, QTimer, QObject, QEvent
 
 from infrastructure.config import load_config, save_config
 from infrastructure.logger import logger
 from infrastructure.credentials_provider import CredentialsProvider
+from infrastructure.watcher import invalidate_screenshot_roots
+from infrastructure.flight_recorder import dump_flight_recorder
+from infrastructure.profiler import profiled, start_from_env
 
 from controllers.listener_controller import ListenerController
 from controllers.countdown_controller import CountdownController
 from controllers.tray_controller import TrayController
 
 from ui.style_loader import apply_styles
+from ui.visibility_scheduler import VisibilityScheduler
 
 from ui.tabs.queue_tab import QueueTab
 from ui.tabs.logs_tab import LogsTab
@@ -54,6 +58,12 @@ class BroadcastPoller(QObject):
         self._tick()
         self.timer.start()
 
+    def poll_now(self):
+        """Refresh immediately (e.g. window restored from tray)."""
+        if self.rtdb_url:
+            self._tick()
+
+    @profiled("broadcast._tick")
     def _tick(self):
         try:
             url = f"{self.rtdb_url}/broadcast.json"
@@ -126,6 +136,9 @@ class MainWindow(QWidget):
         self.cfg = load_config()
         self.game_folder = self.cfg.get("game_folder", "")
 
+        # cosmetic timers pause while hidden in tray / minimized
+        self.timers = VisibilityScheduler(self)
+
         self.listener = ListenerController(self)
         self.countdown = CountdownController(self)
         self.tray = TrayController(self)
@@ -150,7 +163,8 @@ class MainWindow(QWidget):
         self._scroll_timer = QTimer(self)
         self._scroll_timer.setInterval(50)
         self._scroll_timer.timeout.connect(self._scroll_text)
-        self._scroll_timer.start()
+        # started/stopped by the bar's Show/Hide events (see eventFilter)
+        self.timers.add("marquee", self._scroll_timer)
 
         self.broadcastBar.installEventFilter(self)
 
@@ -176,15 +190,13 @@ class MainWindow(QWidget):
         root.setSpacing(0)
         root.addWidget(self.tabs)
 
-        self._resizeTimer = QTimer(self)
-        self._resizeTimer.setInterval(200)
-        self._resizeTimer.timeout.connect(lambda:
-                                          self.broadcastBar.setFixedWidth(self.width()))
-        self._resizeTimer.start()
-
         self.queue_tab.toggleRequested.connect(self.toggle_listening)
         self.queue_tab.resetRequested.connect(self.handle_reset)
 
+        # flight recorder dump (last pipeline events → logs/flight_*.txt)
+        self._flight_shortcut = QShortcut(QKeySequence("Ctrl+Shift+F"), self)
+        self._flight_shortcut.activated.connect(lambda: dump_flight_recorder("hotkey"))
+
         apply_styles(self)
 
         # # FIRST-RUN SETUP
@@ -192,9 +204,38 @@ class MainWindow(QWidget):
             self.request_game_folder()
 
         QTimer.singleShot(300, self.listener.start)
+        start_from_env()
         self.tray.init_tray(icon_path)
 
         self._broadcast = BroadcastPoller(self.broadcastBar, interval_ms=7000, parent=self)
+        if hasattr(self._broadcast, "timer"):
+            self.timers.add("broadcast", self._broadcast.timer)
+            self.timers.start("broadcast")
+
+    # Visibility → cosmetic timers
+    def _update_visibility(self):
+        visible = self.isVisible() and not self.isMinimized()
+        was_visible = self.timers.visible
+        self.timers.set_visible(visible)
+        if visible and not was_visible:
+            self._broadcast.poll_now()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._update_visibility()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._update_visibility()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange:
+            self._update_visibility()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.broadcastBar.setFixedWidth(self.width())
 
     # Hover pause
     def eventFilter(self, obj, event):
@@ -203,8 +244,13 @@ class MainWindow(QWidget):
                 self._hover_pause = True
             elif event.type() == QEvent.Leave:
                 self._hover_pause = False
+            elif event.type() == QEvent.Show:
+                self.timers.start("marquee")
+            elif event.type() == QEvent.Hide:
+                self.timers.stop("marquee")
         return super().eventFilter(obj, event)
 
+    @profiled("_scroll_text")
     def _scroll_text(self):
         if self._hover_pause:
             return
@@ -240,9 +286,18 @@ class MainWindow(QWidget):
         QMessageBox.information(self, "Select game folder", "Select your WoW directory.")
         folder = QFileDialog.getExistingDirectory(self, "Select your WoW folder")
         if folder:
-            self.game_folder = folder
             self.cfg["game_folder"] = folder
             save_config(self.cfg)
+            self.set_game_folder(folder)
+
+    def set_game_folder(self, folder: str):
+        """Switch the watched WoW folder at runtime (no restart needed)."""
+        self.game_folder = folder
+        self.cfg["game_folder"] = folder
+        invalidate_screenshot_roots()
+        if self.listener.combat_log:
+            self.listener.combat_log.base = folder
+            self.listener.combat_log.start()
 
     def handle_reset(self):
         self.countdown.stop()
@@ -1,8 +1,10 @@
 # file: desktop_app/ui/tabs/logs_tab.py
 # -*- coding: utf-8 -*-
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QTextEdit
+import time
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QTextEdit, QLabel
 from PySide6.QtCore import QTimer
 from infrastructure.logger import logger
+from infrastructure.history import get_history, summary_string
 
 # small startup buffer (filled before UI connects)
 _startup_buffer = []
@@ -16,11 +18,16 @@ class LogsTab(QWidget):
       - [DEV]     → light blue
       - WARNING   → yellow
       - ERROR     → red
+    Header: event history stats (24 h / 7 days / all), refreshed when shown.
     """
     def __init__(self, parent=None):
         super().__init__(parent)
 
         layout = QVBoxLayout(self)
+        self.stats_label = QLabel(wordWrap=True)
+        self.stats_label.setStyleSheet("color:#aaa; font-size: 11px; padding: 2px 4px;")
+        layout.addWidget(self.stats_label)
+
         self.log_view = QTextEdit(readOnly=True)
         self.log_view.setStyleSheet("""
             QTextEdit {
@@ -56,6 +63,25 @@ class LogsTab(QWidget):
 
             logger.qt_handler.emit = buffered_emit
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh_history()
+
+    def refresh_history(self):
+        cfg = getattr(self.window(), "cfg", None) or {}
+        if not cfg.get("history_enabled", True):
+            self.stats_label.setText("📊 History disabled")
+            return
+        history = get_history()
+        if history is None:
+            self.stats_label.setText("📊 History unavailable")
+            return
+        now = time.time()
+        rows = []
+        for name, since in (("24 h", now - 86400), ("7 days", now - 7 * 86400), ("All", None)):
+            rows.append(f"<b>{name}:</b> {summary_string(history.summary(since))}")
+        self.stats_label.setText("📊 " + "<br>".join(rows))
+
     def _connect_logger(self):
         if hasattr(logger, "qt_handler"):
             logger.qt_handler.emitter.new_log.connect(self.append_log)
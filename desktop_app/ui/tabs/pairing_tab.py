@@ -115,6 +115,11 @@ class PairingTab(QWidget):
         self.btn_pair.setFixedHeight(42)
         self.btn_pair.clicked.connect(self.on_pair_click)
 
+        # extra phones / tablets (e.g. a coach) once the first one is paired
+        self.btn_add = QPushButton("➕ Add device")
+        self.btn_add.setFixedHeight(42)
+        self.btn_add.clicked.connect(self.open_pair_dialog)
+
         self.btn_test = QPushButton("📡 Test connection")
         self.btn_test.setFixedHeight(42)
         self.btn_test.clicked.connect(lambda: test_connection.run_test(self))
@@ -122,6 +127,7 @@ class PairingTab(QWidget):
         row = QHBoxLayout()
         row.addStretch()
         row.addWidget(self.btn_pair)
+        row.addWidget(self.btn_add)
         row.addWidget(self.btn_test)
         row.addStretch()
         self.layout.addLayout(row)
@@ -134,9 +140,13 @@ class PairingTab(QWidget):
         self.desktop_id = status.get("desktop_id", "")
         self.device_id = status.get("device_id", "")
 
+        self.btn_add.setVisible(status["paired"])
+
         if status["paired"]:
-            self.label_status.setText("✅ <span style='color:#77ff77;'>DEVICE CONNECTED</span>")
-            self.btn_pair.setText("🗑 Unpair device")
+            count = status.get("devices", 1)
+            label = "DEVICE CONNECTED" if count <= 1 else f"{count} DEVICES CONNECTED"
+            self.label_status.setText(f"✅ <span style='color:#77ff77;'>{label}</span>")
+            self.btn_pair.setText("🗑 Unpair device" if count <= 1 else "🗑 Unpair all")
             self.btn_pair.setStyleSheet("""
                 QPushButton {
                     background-color:#c0392b; color:white;
@@ -204,6 +214,9 @@ class PairingTab(QWidget):
             pairing.unpair_device()
             self.refresh_ui()
         else:
-            dlg = PairDeviceDialog(self)
-            dlg.exec()
-            QTimer.singleShot(300, self.refresh_ui)
+            self.open_pair_dialog()
+
+    def open_pair_dialog(self):
+        dlg = PairDeviceDialog(self)
+        dlg.exec()
+        QTimer.singleShot(300, self.refresh_ui)
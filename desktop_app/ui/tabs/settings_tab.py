@@ -7,9 +7,9 @@ from PySide6.QtCore import Qt
 
 from infrastructure.config import load_config, save_config
 from infrastructure.logger import logger
-from infrastructure.watcher import get_latest_screenshot_info, resolve_screenshots_folder, list_screenshots
+from infrastructure.watcher import get_latest_screenshot_info, resolve_screenshot_roots, list_screenshots
 from services.tag_detector import detect_tag
-from infrastructure.utils import safe_delete
+from infrastructure.utils import deferred_delete, is_pending_delete
 
 from ui.toast import Toast
 
@@ -83,6 +83,8 @@ class SettingsTab(QWidget):
         try:
             self.cfg["game_folder"] = folder
             save_config(self.cfg)
+            if self.parent_window and hasattr(self.parent_window, "set_game_folder"):
+                self.parent_window.set_game_folder(folder)
             self.folder_label.setText(f"Game folder: {folder}")
             _, ts = get_latest_screenshot_info(folder) or (None, None)
             logger.dev(f"📂 WoW folder selected: {folder}")
@@ -123,12 +125,12 @@ class SettingsTab(QWidget):
 
     # ---------------------------------------------------------------------
     def clean_tagged_screenshots(self):
-        folder = resolve_screenshots_folder(self.cfg.get("game_folder", ""))
-        if not folder:
+        roots = resolve_screenshot_roots(self.cfg.get("game_folder", ""))
+        if not roots:
             QMessageBox.information(self, "Cleanup", "No Screenshots folder found.")
             return
 
-        shots = list_screenshots(folder)
+        shots = [p for folder in roots for p in list_screenshots(folder)]
         if not shots:
             QMessageBox.information(self, "Cleanup", "📭 No screenshots found.")
             return
@@ -136,9 +138,11 @@ class SettingsTab(QWidget):
         removed = 0
         kept = 0
         for img in shots:
+            if is_pending_delete(img):
+                continue
             tag = detect_tag(str(img))
             if tag in ("arena_pop", "arena_stop"):
-                safe_delete(img)
+                deferred_delete(img)
                 removed += 1
             else:
                 kept += 1
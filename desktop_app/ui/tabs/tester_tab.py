@@ -8,8 +8,10 @@ from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QSpinBo
 from PySide6.QtCore import Qt, QTimer
 from services.firebase_notify import send_fcm_message
 from infrastructure.logger import logger
-from services.time_sync import get_server_offset, get_firebase_server_time
+from services.time_sync import get_server_offset, get_firebase_server_time, get_clock_estimate
 from infrastructure.credentials_provider import CredentialsProvider
+from infrastructure.flight_recorder import dump_flight_recorder
+from infrastructure.profiler import start_profiling, is_profiling
 import time
 import uuid
 import threading
@@ -71,6 +73,24 @@ class TesterTab(QWidget):
         layout.addWidget(debug_btn)
         layout.addWidget(clock_btn)
 
+        flight_btn = QPushButton("🛩 Dump Flight Recorder (Ctrl+Shift+F)")
+        flight_btn.setStyleSheet("background-color: #795548; color: white; font-size: 14px; padding: 8px;")
+        flight_btn.clicked.connect(self.dump_flight_recorder)
+        layout.addWidget(flight_btn)
+
+        self.profile_input = QSpinBox()
+        self.profile_input.setRange(5, 600)
+        self.profile_input.setValue(30)
+        self.profile_input.setPrefix("Profile for ")
+        self.profile_input.setSuffix(" s")
+        self.profile_input.setAlignment(Qt.AlignCenter)
+
+        profile_btn = QPushButton("🔬 Start Sampling Profiler (all threads)")
+        profile_btn.setStyleSheet("background-color: #455A64; color: white; font-size: 14px; padding: 8px;")
+        profile_btn.clicked.connect(self.start_profiler)
+        layout.addWidget(self.profile_input)
+        layout.addWidget(profile_btn)
+
     # -------------------------------------------------------------------------
     # FULL REMOTE TEST
     # -------------------------------------------------------------------------
@@ -170,32 +190,76 @@ class TesterTab(QWidget):
     # CLOCK SYNC
     # -------------------------------------------------------------------------
     def check_clock_sync(self):
-        """Check local vs Firebase server time offset."""
+        """Fresh multi-sample estimate of local vs Firebase server time."""
         try:
             provider = CredentialsProvider()
-            rtdb_url = provider.get_rtdb_url()
-            offset_ms = get_server_offset(self.cfg)
+            probe = self.cfg.get("clock_sync_probe", False)
+            url = provider.get_rtdb_url() if probe else provider.get_push_arena_url()
+            est = get_clock_estimate(self.cfg, force=True)
+            if est is None:
+                raise RuntimeError("no sample succeeded (offline or "
+                                   f"{'RTDB_URL' if probe else 'PUSH_ARENA_URL'} missing)")
+
             local_time = int(time.time() * 1000)
-            server_time = local_time + offset_ms
+            server_time = int(est.server_time_ms())
+            offset_ms = server_time - local_time
+            bound_ms = est.error_bound_ms()
+            drift = f"{est.drift_ppm:+.1f} ppm" if est.drift_ppm is not None else "not measured yet"
+            source = "RTDB .sv timestamp" if est.source == "sv" else "pushArena /ping"
 
             logger.info("───────────────────────────────────────────────")
-            logger.info(f"🕒 Clock sync check ({rtdb_url})")
+            logger.info(f"🕒 Clock sync check ({url})")
             logger.info(f"  Local time: {local_time}")
-            logger.info(f"  Offset: {offset_ms} ms")
+            logger.info(f"  Offset: {offset_ms} ms ± {bound_ms:.0f} ms")
             logger.info(f"  Server ≈ {server_time}")
+            logger.info(f"  {est.summary_string()}")
             logger.info("───────────────────────────────────────────────")
 
             QMessageBox.information(
                 self,
                 "Clock Sync Check",
                 f"🕒 Firebase Clock Sync:\n\n"
-                f"RTDB URL: {rtdb_url}\n"
+                f"URL: {url}\n"
                 f"Local time: {local_time}\n"
-                f"Offset: {offset_ms} ms\n"
-                f"Server time ≈ {server_time}\n\n"
+                f"Offset: {offset_ms} ms ± {bound_ms:.0f} ms\n"
+                f"Server time ≈ {server_time}\n"
+                f"Best round trip: {est.rtt_ms:.0f} ms ({est.kept}/{est.samples} samples kept)\n"
+                f"Drift: {drift}\n"
+                f"Source: {source}\n\n"
                 f"{'✅ Clock is well-synced.' if abs(offset_ms) < 300 else '⚠️ Noticeable drift detected!'}"
             )
 
         except Exception as e:
             logger.error(f"❌ Clock sync check failed: {e}")
             QMessageBox.warning(self, "Error", f"Failed to check clock sync:\n{e}")
+
+    # -------------------------------------------------------------------------
+    # FLIGHT RECORDER
+    # -------------------------------------------------------------------------
+    def dump_flight_recorder(self):
+        """Last pipeline events (watcher, tags, drops, sends) → logs directory."""
+        try:
+            path = dump_flight_recorder("tester")
+            if path is None:
+                QMessageBox.information(self, "Flight Recorder", "Nothing recorded yet.")
+                return
+            QMessageBox.information(self, "Flight Recorder", f"🛩 Dumped to:\n{path}")
+        except Exception as e:
+            logger.error(f"❌ Flight recorder dump failed: {e}")
+            QMessageBox.warning(self, "Error", f"Failed to dump the flight recorder:\n{e}")
+
+    # -------------------------------------------------------------------------
+    # PROFILER
+    # -------------------------------------------------------------------------
+    def start_profiler(self):
+        """Collapsed stacks + QTimer callback stats → logs directory when done."""
+        if is_profiling():
+            QMessageBox.information(self, "Profiler", "A profiling session is already running.")
+            return
+        seconds = self.profile_input.value()
+        start_profiling(seconds)
+        QMessageBox.information(
+            self, "Profiler",
+            f"🔬 Profiling for {seconds} s.\n\n"
+            f"Results go to the logs folder (profile_*.collapsed, profile_*_callbacks.txt)."
+        )
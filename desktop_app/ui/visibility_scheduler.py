@@ -0,0 +1,58 @@
+# file: desktop_app/ui/visibility_scheduler.py
+# ✅ Cosmetic timers run only while the window is actually on screen
+# ✅ Counts wakeups per timer (visible in the session summary)
+
+from PySide6.QtCore import QObject, QTimer
+
+
+class VisibilityScheduler(QObject):
+    """
+    Registry of QTimers owned by the main window.
+    visible_only timers keep a *desired* state (start/stop) and are really
+    running only while the window is visible; other timers are just counted.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.visible = True
+        self._timers: dict[str, tuple[QTimer, bool]] = {}
+        self._wanted: dict[str, bool] = {}
+        self.wakeups: dict[str, int] = {}
+
+    def add(self, name: str, timer: QTimer, visible_only: bool = True) -> QTimer:
+        self._timers[name] = (timer, visible_only)
+        self._wanted.setdefault(name, False)
+        self.wakeups.setdefault(name, 0)
+        timer.timeout.connect(lambda n=name: self._count(n))
+        return timer
+
+    def start(self, name: str):
+        self._wanted[name] = True
+        self._apply(name)
+
+    def stop(self, name: str):
+        self._wanted[name] = False
+        self._apply(name)
+
+    def set_visible(self, visible: bool):
+        if visible == self.visible:
+            return
+        self.visible = visible
+        for name, (_, visible_only) in self._timers.items():
+            if visible_only:
+                self._apply(name)
+
+    def _apply(self, name: str):
+        timer, visible_only = self._timers[name]
+        run = self._wanted[name] and (self.visible or not visible_only)
+        if run and not timer.isActive():
+            timer.start()
+        elif not run and timer.isActive():
+            timer.stop()
+
+    def _count(self, name: str):
+        self.wakeups[name] += 1
+
+    def summary_string(self) -> str:
+        parts = ", ".join(f"{n}={c}" for n, c in self.wakeups.items())
+        return f"timer wakeups: {parts}, total={sum(self.wakeups.values())}"